@@ -1,11 +1,14 @@
 from . import networks
+from .script.opcodes import compiled_tables
 
 network = networks.get_network('bitcoin_main')
+compiled_tables(network)
 
 
 def select_network(name):
     global network
     network = networks.get_network(name)
+    compiled_tables(network)
 
 
 def get_current_network():
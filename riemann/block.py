@@ -0,0 +1,192 @@
+from riemann import utils
+from riemann.tx import shared
+from riemann.tx.tx import Tx, _layout
+
+
+class BlockHeader(shared.ByteData):
+    '''
+    The 80-byte Bitcoin-style block header.
+    '''
+
+    def __init__(self, version, prev_block, merkle_root,
+                 timestamp, bits, nonce):
+        super().__init__()
+
+        self.validate_bytes(version, 4)
+        self.validate_bytes(prev_block, 32)
+        self.validate_bytes(merkle_root, 32)
+        self.validate_bytes(timestamp, 4)
+        self.validate_bytes(bits, 4)
+        self.validate_bytes(nonce, 4)
+
+        self += version
+        self += prev_block
+        self += merkle_root
+        self += timestamp
+        self += bits
+        self += nonce
+
+        self.version = version
+        self.prev_block = prev_block
+        self.merkle_root = merkle_root
+        self.timestamp = timestamp
+        self.bits = bits
+        self.nonce = nonce
+
+        self._make_immutable()
+
+    @shared.cached_property
+    def block_hash_le(self):
+        return utils.hash256(self.to_bytes())
+
+    @shared.cached_property
+    def block_hash(self):
+        return utils.change_endianness(self.block_hash_le)
+
+    def copy(self, version=None, prev_block=None, merkle_root=None,
+             timestamp=None, bits=None, nonce=None):
+        '''
+        BlockHeader, ... -> BlockHeader
+
+        Makes a copy. Allows over-writing specific pieces.
+        '''
+        return BlockHeader(
+            version=version if version is not None else self.version,
+            prev_block=(prev_block if prev_block is not None
+                        else self.prev_block),
+            merkle_root=(merkle_root if merkle_root is not None
+                         else self.merkle_root),
+            timestamp=timestamp if timestamp is not None else self.timestamp,
+            bits=bits if bits is not None else self.bits,
+            nonce=nonce if nonce is not None else self.nonce)
+
+    @classmethod
+    def from_bytes(BlockHeader, byte_string):
+        '''
+        byte-like -> BlockHeader
+        '''
+        if len(byte_string) != 80:
+            raise ValueError(
+                'Expected 80-byte block header. Got {} bytes.'
+                .format(len(byte_string)))
+        byte_string = bytes(byte_string)
+        return BlockHeader(
+            version=byte_string[0:4],
+            prev_block=byte_string[4:36],
+            merkle_root=byte_string[36:68],
+            timestamp=byte_string[68:72],
+            bits=byte_string[72:76],
+            nonce=byte_string[76:80])
+
+
+class Block(shared.ByteData):
+    '''
+    byte-like -> Block
+    A serialized block and a table of transaction offsets.
+    The tx count and every tx boundary are found in a single pass over the
+    buffer. Txs are parsed on access.
+    '''
+
+    def __init__(self, byte_string):
+        super().__init__()
+
+        view = memoryview(byte_string)
+        if len(view) < 81:
+            raise ValueError(
+                'Block too short. Expected at least 81 bytes. Got {} bytes.'
+                .format(len(view)))
+
+        layouts = []
+        try:
+            tx_count, current = shared.VarInt._read_number(view, 80)
+            if tx_count == 0:
+                raise ValueError('Block must contain at least one tx.')
+
+            for _ in range(tx_count):
+                segwit, _, tx_outs, _, end = _layout(view, current)
+                # start, end, and the end of the outputs for stripping
+                # witnesses
+                layouts.append(
+                    (current, end, tx_outs[-1] if segwit else None))
+                current = end
+        except IndexError:
+            raise ValueError('Block extends past the end of the buffer.')
+
+        if current != len(view):
+            raise ValueError(
+                'Expected a single serialized Block. '
+                'Got {} trailing bytes.'.format(len(view) - current))
+
+        self._bytes = bytes(byte_string)
+        self.tx_count = tx_count
+        self._layouts = tuple(layouts)
+
+        self._make_immutable()
+
+    @classmethod
+    def from_bytes(Block, byte_string):
+        return Block(byte_string)
+
+    @shared.cached_property
+    def header(self):
+        return BlockHeader.from_bytes(self._bytes[:80])
+
+    @shared.cached_property
+    def block_hash_le(self):
+        return self.header.block_hash_le
+
+    @shared.cached_property
+    def block_hash(self):
+        return self.header.block_hash
+
+    def tx(self, index):
+        '''
+        int -> Tx
+        Parses a single tx without parsing the others
+        '''
+        start = self._layouts[index][0]
+        return Tx._parse(memoryview(self._bytes), start)[0]
+
+    def iter_txs(self):
+        '''
+        Block -> generator(Tx)
+        Parses the txs in order, one at a time
+        '''
+        view = memoryview(self._bytes)
+        for start, _, _ in self._layouts:
+            yield Tx._parse(view, start)[0]
+
+    @shared.cached_property
+    def txs(self):
+        return tuple(self.iter_txs())
+
+    def _no_witness(self, index):
+        start, end, tx_outs_end = self._layouts[index]
+        if tx_outs_end is None:
+            return self._bytes[start:end]
+        return (self._bytes[start:start + 4]
+                + self._bytes[start + 6:tx_outs_end]
+                + self._bytes[end - 4:end])
+
+    @shared.cached_property
+    def tx_ids_le(self):
+        return tuple(utils.hash256(self._no_witness(i))
+                     for i in range(self.tx_count))
+
+    @shared.cached_property
+    def tx_ids(self):
+        return tuple(utils.change_endianness(t) for t in self.tx_ids_le)
+
+    @shared.cached_property
+    def wtx_ids_le(self):
+        '''
+        The coinbase wtxid is 32 zero bytes, per BIP141
+        '''
+        view = memoryview(self._bytes)
+        return (b'\x00' * 32,) + tuple(
+            utils.hash256(view[start:end])
+            for start, end, _ in self._layouts[1:])
+
+    @shared.cached_property
+    def wtx_ids(self):
+        return tuple(utils.change_endianness(t) for t in self.wtx_ids_le)
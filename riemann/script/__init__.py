@@ -1,3 +1,5 @@
 # flake8: noqa
 
 from .serialization import *
+from .template import ScriptTemplate
+from .classification import ScriptType, classify, classify_many
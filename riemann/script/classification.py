@@ -0,0 +1,170 @@
+from enum import IntEnum
+
+
+class ScriptType(IntEnum):
+    '''
+    Output script types recognized by classify
+    '''
+    NONSTANDARD = 0
+    P2PKH = 1
+    P2SH = 2
+    P2WPKH = 3
+    P2WSH = 4
+    P2TR = 5
+    P2PK = 6
+    MULTISIG = 7
+    OP_RETURN = 8
+
+
+def _numpy():
+    '''
+    None -> module
+    numpy is optional. Only classify_many needs it.
+    '''
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            'classify_many requires numpy. '
+            'Install it with `pip install numpy`.')
+    return numpy
+
+
+def _multisig(output_script):
+    '''
+    byte-like -> (int, int, tuple(int))
+    m, n and the offset of each pubkey in a bare multisig script.
+    None if the script isn't one.
+    '''
+    length = len(output_script)
+    if length < 37 or output_script[-1] != 0xae:  # OP_CHECKMULTISIG
+        return None
+    m = output_script[0] - 0x50  # OP_1 through OP_16
+    n = output_script[-2] - 0x50
+    if not 1 <= m <= n <= 16:
+        return None
+
+    pubkeys = []
+    i = 1
+    while i < length - 2:
+        push = output_script[i]
+        if push != 33 and push != 65:
+            return None
+        pubkeys.append(i + 1)
+        i += 1 + push
+    if i != length - 2 or len(pubkeys) != n:
+        return None
+    return m, n, tuple(pubkeys)
+
+
+def classify(output_script):
+    '''
+    byte-like -> (ScriptType, byte-like)
+    Identifies a standard output script by its fixed byte pattern.
+    The payload is the pubkey hash or script hash for p2pkh, p2sh,
+    p2wpkh and p2wsh, the output key for p2tr, the pubkey for p2pk, and
+    the bytes after OP_RETURN for OP_RETURN. For bare multisig it is a
+    tuple (m, n, pubkey_offsets). Nonstandard scripts have no payload.
+    Patterns are matched as-is, whether or not the current network
+    supports them.
+    '''
+    length = len(output_script)
+    if length == 25:
+        if (output_script[:3] == b'\x76\xa9\x14'  # OP_DUP OP_HASH160 PUSH20
+                and output_script[23:] == b'\x88\xac'):
+            return ScriptType.P2PKH, output_script[3:23]
+    elif length == 23:
+        if output_script[:2] == b'\xa9\x14' and output_script[22] == 0x87:
+            return ScriptType.P2SH, output_script[2:22]
+    elif length == 22:
+        if output_script[:2] == b'\x00\x14':
+            return ScriptType.P2WPKH, output_script[2:]
+    elif length == 34:
+        prefix = output_script[:2]
+        if prefix == b'\x00\x20':
+            return ScriptType.P2WSH, output_script[2:]
+        if prefix == b'\x51\x20':  # OP_1 PUSH32
+            return ScriptType.P2TR, output_script[2:]
+    elif length == 35 or length == 67:
+        if output_script[0] == length - 2 and output_script[-1] == 0xac:
+            return ScriptType.P2PK, output_script[1:-1]
+
+    if length != 0 and output_script[0] == 0x6a:
+        return ScriptType.OP_RETURN, output_script[1:]
+
+    multisig = _multisig(output_script)
+    if multisig is not None:
+        return ScriptType.MULTISIG, multisig
+    return ScriptType.NONSTANDARD, None
+
+
+def classify_many(scripts, offsets, lengths):
+    '''
+    byte-like, array, array -> (np.ndarray, np.ndarray, np.ndarray)
+    Classifies every script in a columnar blob, e.g. TxBatch.scripts with
+    its out_script_offset and out_script_len columns.
+    Returns the ScriptType of each script as uint8, and the offset and
+    length of its payload in the blob as int64. For bare multisig the
+    payload is the whole script. Use classify on it for m, n and the
+    pubkey offsets. Nonstandard scripts have an empty payload.
+    Requires numpy.
+    '''
+    np = _numpy()
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    types = np.zeros(len(offsets), dtype=np.uint8)
+    payload_offsets = offsets.copy()
+    payload_lens = np.zeros(len(offsets), dtype=np.int64)
+
+    blob = np.frombuffer(scripts, dtype=np.uint8)
+    if len(blob) == 0:
+        return types, payload_offsets, payload_lens
+
+    def byte_at(index):
+        # Out of range reads are clipped, and masked out by the length
+        # checks below
+        return blob[np.clip(index, 0, len(blob) - 1)].astype(np.int64)
+
+    first = byte_at(offsets)
+    second = byte_at(offsets + 1)
+    last = byte_at(offsets + lengths - 1)
+
+    def mark(mask, script_type, start, length):
+        types[mask] = script_type
+        payload_offsets[mask] = offsets[mask] + start
+        payload_lens[mask] = length if np.isscalar(length) else length[mask]
+
+    mark((lengths == 25) & (first == 0x76) & (second == 0xa9)
+         & (byte_at(offsets + 2) == 0x14) & (byte_at(offsets + 23) == 0x88)
+         & (last == 0xac),
+         ScriptType.P2PKH, 3, 20)
+    mark((lengths == 23) & (first == 0xa9) & (second == 0x14)
+         & (last == 0x87),
+         ScriptType.P2SH, 2, 20)
+    mark((lengths == 22) & (first == 0x00) & (second == 0x14),
+         ScriptType.P2WPKH, 2, 20)
+    mark((lengths == 34) & (first == 0x00) & (second == 0x20),
+         ScriptType.P2WSH, 2, 32)
+    mark((lengths == 34) & (first == 0x51) & (second == 0x20),
+         ScriptType.P2TR, 2, 32)
+    mark(((lengths == 35) | (lengths == 67)) & (first == lengths - 2)
+         & (last == 0xac),
+         ScriptType.P2PK, 1, lengths - 2)
+    mark((lengths != 0) & (first == 0x6a),
+         ScriptType.OP_RETURN, 1, lengths - 1)
+
+    # Bare multisig is rare. Only scripts that start with OP_m and end
+    # with OP_n OP_CHECKMULTISIG are walked one at a time.
+    op_n = byte_at(offsets + lengths - 2)
+    candidates = np.flatnonzero(
+        (lengths >= 37) & (last == 0xae)
+        & (first >= 0x51) & (first <= 0x60)
+        & (op_n >= 0x51) & (op_n <= 0x60))
+    view = memoryview(scripts)
+    for i in candidates:
+        start = int(offsets[i])
+        if _multisig(view[start:start + int(lengths[i])]) is not None:
+            types[i] = ScriptType.MULTISIG
+            payload_lens[i] = lengths[i]
+
+    return types, payload_offsets, payload_lens
@@ -148,3 +148,33 @@ for i in range(1, 76):
 
 CODE_TO_INT = dict(o for o in OPCODE_LIST)
 INT_TO_CODE = dict(reversed(o) for o in OPCODE_LIST)
+
+_COMPILED_TABLES = {}
+
+
+def compiled_tables(network):
+    '''
+    Network -> tuple(dict, tuple)
+    Merges the network's OPCODE_CHANGES into the opcode tables above.
+    Returns a name-to-int dict and a 256-entry int-to-name tuple.
+    OP_CODESEPARATOR and OP_PUSHDATA4 are left out of both, and unknown
+    bytes map to None. Computed once per network.
+    '''
+    try:
+        return _COMPILED_TABLES[network]
+    except KeyError:
+        pass
+
+    code_to_int = dict(CODE_TO_INT)
+    int_to_code = [INT_TO_CODE.get(i) for i in range(256)]
+    for name, opcode in network.OPCODE_CHANGES:
+        if name is None:
+            continue
+        code_to_int[name] = opcode
+        int_to_code[opcode] = name
+    for name in ('OP_CODESEPARATOR', 'OP_PUSHDATA4'):
+        int_to_code[code_to_int.pop(name)] = None
+
+    tables = (code_to_int, tuple(int_to_code))
+    _COMPILED_TABLES[network] = tables
+    return tables
@@ -1,52 +1,42 @@
 import riemann
-from .. import utils
-from .opcodes import CODE_TO_INT, INT_TO_CODE
+from .opcodes import compiled_tables
 
 
 def serialize(script_string):
     '''
     str -> bytearray
     '''
-    string_tokens = script_string.split()
+    code_to_int = compiled_tables(riemann.network)[0]
     serialized_script = bytearray()
 
-    for token in string_tokens:
+    for token in script_string.split():
+        if token in code_to_int:
+            serialized_script.append(code_to_int[token])
+            continue
+
         if token == 'OP_CODESEPARATOR' or token == 'OP_PUSHDATA4':
             raise NotImplementedError('{} is a bad idea.'.format(token))
 
-        if token in riemann.network.CODE_TO_INT_OVERWRITE:
-            serialized_script.extend(
-                [riemann.network.CODE_TO_INT_OVERWRITE[token]])
+        token_bytes = bytes.fromhex(token)
+        serialized_script.extend(_push_prefix(len(token_bytes)))
+        serialized_script.extend(token_bytes)
 
-        elif token in CODE_TO_INT:
-            serialized_script.extend([CODE_TO_INT[token]])
+    return serialized_script
 
-        else:
-            token_bytes = bytes.fromhex(token)
-
-            if len(token_bytes) <= 75:
-                op = 'OP_PUSH_{}'.format(len(token_bytes))
-                serialized_script.extend([CODE_TO_INT[op]])
-                serialized_script.extend(token_bytes)
-
-            elif len(token_bytes) > 75 and len(token_bytes) <= 255:
-                op = 'OP_PUSHDATA1'
-                serialized_script.extend([CODE_TO_INT[op]])
-                serialized_script.extend(utils.i2le(len(token_bytes)))
-                serialized_script.extend(token_bytes)
-
-            elif len(token_bytes) > 255 and len(token_bytes) <= 1000:
-                op = 'OP_PUSHDATA2'
-                serialized_script.extend([CODE_TO_INT[op]])
-                serialized_script.extend(
-                    utils.i2le_padded(len(token_bytes), 2))
-                serialized_script.extend(token_bytes)
-
-            else:
-                raise NotImplementedError(
-                    'Hex string too long to serialize.')
 
-    return serialized_script
+def _push_prefix(data_len):
+    '''
+    int -> bytes
+    The opcode (and length) that pushes data_len bytes
+    '''
+    if data_len <= 75:
+        return bytes([data_len])
+    if data_len <= 255:
+        return bytes([0x4c, data_len])  # OP_PUSHDATA1
+    if data_len <= 1000:
+        return bytes([0x4d, data_len & 0xff, data_len >> 8])  # OP_PUSHDATA2
+    raise NotImplementedError(
+        'Hex string too long to serialize.')
 
 
 def hex_serialize(script_string):
@@ -56,61 +46,112 @@ def hex_serialize(script_string):
     return serialize(script_string).hex()
 
 
-def deserialize(serialized_script):
+def iter_ops(script):
     '''
-    bytearray -> str
+    byte-like -> generator(tuple(int, memoryview, int))
+    Walks a serialized script one op at a time, without building strings.
+    Yields (opcode, data, offset) for each op. data is a memoryview of the
+    pushed bytes for push opcodes, or None for any other opcode, including
+    OP_0. offset is where the op starts in the script.
+    Raises IndexError if a push runs past the end of the script.
     '''
-    deserialized = []
+    view = memoryview(script)
+    end = len(view)
     i = 0
-    while i < len(serialized_script):
-        current_byte = serialized_script[i]
-        if current_byte == 0xab:
-            raise NotImplementedError('OP_CODESEPARATOR is a bad idea.')
-        if current_byte <= 75 and current_byte != 0:
-
-            deserialized.append(
-                serialized_script[i + 1: i + 1 + current_byte].hex())
+    while i < end:
+        opcode = view[i]
+        if opcode == 0 or opcode > 77:
+            if opcode == 78:
+                raise NotImplementedError('OP_PUSHDATA4 is a bad idea.')
+            yield opcode, None, i
+            i += 1
+            continue
 
-            i += 1 + current_byte
-            if i > len(serialized_script):
+        if opcode <= 75:
+            data_start = i + 1
+            data_len = opcode
+        else:
+            data_start = i + (2 if opcode == 76 else 3)  # OP_PUSHDATA1/2
+            if data_start > end:
                 raise IndexError(
-                    'Push {} caused out of bounds exception.'
-                    .format(current_byte))
-
-        elif current_byte == 76:
-            # next hex blob length
-            blob_len = serialized_script[i + 1]
-
-            deserialized.append(
-                serialized_script[i + 2: i + 2 + blob_len].hex())
-
-            i += 2 + blob_len
+                    'Push {} caused out of bounds exception.'.format(opcode))
+            data_len = int.from_bytes(view[i + 1:data_start], 'little')
 
-        elif current_byte == 77:
-            # next hex blob length
-            blob_len = utils.le2i(serialized_script[i + 1: i + 3])
+        data_end = data_start + data_len
+        if data_end > end:
+            raise IndexError(
+                'Push {} caused out of bounds exception.'.format(opcode))
+        yield opcode, view[data_start:data_end], i
+        i = data_end
 
-            deserialized.append(
-                serialized_script[i + 3: i + 3 + blob_len].hex())
 
-            i += 3 + blob_len
-
-        elif current_byte == 78:
-            raise NotImplementedError('OP_PUSHDATA4 is a bad idea.')
-
-        else:
-            if current_byte in riemann.network.INT_TO_CODE_OVERWRITE:
-                deserialized.append(
-                    riemann.network.INT_TO_CODE_OVERWRITE[current_byte])
-            elif current_byte in INT_TO_CODE:
-                deserialized.append(INT_TO_CODE[current_byte])
-            else:
-                raise ValueError(
-                    'Unsupported opcode. '
-                    'Got 0x%x' % serialized_script[i])
+def _last_push(script, int_to_code):
+    '''
+    byte-like, tuple -> (int, int)
+    Walks a serialized script without building strings or raising.
+    Returns where the last op starts and where its pushed data starts.
+    The data start is -1 if the last op isn't a push, and both are -1 for
+    an empty script. Returns None if the script doesn't deserialize with
+    the int_to_code table from compiled_tables.
+    '''
+    end = len(script)
+    i = 0
+    op_start = data_start = -1
+    while i < end:
+        opcode = script[i]
+        op_start = i
+        if opcode == 0 or opcode > 77:
+            if int_to_code[opcode] is None:
+                return None
+            data_start = -1
             i += 1
+            continue
+
+        if opcode <= 75:
+            data_start = i + 1
+            i = data_start + opcode
+        elif opcode == 76:  # OP_PUSHDATA1
+            data_start = i + 2
+            if data_start > end:
+                return None
+            i = data_start + script[i + 1]
+        else:  # OP_PUSHDATA2
+            data_start = i + 3
+            if data_start > end:
+                return None
+            i = data_start + script[i + 1] + (script[i + 2] << 8)
+
+    if i > end:
+        return None
+    return op_start, data_start
+
+
+def _op_string(opcode, data, int_to_code=None):
+    '''
+    int, memoryview, tuple -> str
+    The string form of an op from iter_ops
+    '''
+    if data is not None:
+        return data.hex()
+    if int_to_code is None:
+        int_to_code = compiled_tables(riemann.network)[1]
+    name = int_to_code[opcode]
+    if name is not None:
+        return name
+    if opcode == 0xab:
+        raise NotImplementedError('OP_CODESEPARATOR is a bad idea.')
+    raise ValueError('Unsupported opcode. Got 0x%x' % opcode)
+
 
-    return ' '.join(deserialized)
+def deserialize(serialized_script):
+    '''
+    bytearray -> str
+    '''
+    int_to_code = compiled_tables(riemann.network)[1]
+    return ' '.join([data.hex() if data is not None
+                     else int_to_code[opcode]
+                     or _op_string(opcode, data, int_to_code)
+                     for opcode, data, _ in iter_ops(serialized_script)])
 
 
 def hex_deserialize(script_hex):
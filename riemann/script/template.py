@@ -0,0 +1,70 @@
+from . import serialization
+
+
+class ScriptTemplate:
+    '''
+    A human-readable script with {named} placeholders, serialized once.
+    The fixed parts are serialized at compile time, using the network
+    selected at that point. fill() pushes raw bytes into the placeholders.
+    '''
+
+    def __init__(self, fixed_parts, names):
+        self._fixed_parts = fixed_parts
+        self._names = names
+        self._slots = tuple(zip(names, fixed_parts[1:]))
+
+    def __repr__(self):
+        return 'ScriptTemplate(placeholders={})'.format(list(self._names))
+
+    @classmethod
+    def compile(ScriptTemplate, script_string):
+        '''
+        str -> ScriptTemplate
+        Placeholders are whole tokens like {pubkey}. A name may be used
+        more than once.
+        '''
+        fixed_parts = []
+        names = []
+        fixed_tokens = []
+        for token in script_string.split():
+            if len(token) > 2 and token[0] == '{' and token[-1] == '}':
+                fixed_parts.append(
+                    bytes(serialization.serialize(' '.join(fixed_tokens))))
+                names.append(token[1:-1])
+                fixed_tokens = []
+            else:
+                fixed_tokens.append(token)
+        fixed_parts.append(
+            bytes(serialization.serialize(' '.join(fixed_tokens))))
+        return ScriptTemplate(
+            fixed_parts=tuple(fixed_parts),
+            names=tuple(names))
+
+    @property
+    def placeholders(self):
+        '''
+        -> tuple(str)
+        The placeholder names, in script order, without duplicates
+        '''
+        return tuple(dict.fromkeys(self._names))
+
+    def fill(self, **values):
+        '''
+        byte-like -> bytes
+        Pushes each value into its placeholders and returns the script.
+        '''
+        script = bytearray(self._fixed_parts[0])
+        for name, fixed in self._slots:
+            try:
+                data = values[name]
+            except KeyError:
+                raise ValueError(
+                    'Missing value for placeholder {}.'.format(name))
+            if not isinstance(data, (bytes, bytearray)):
+                raise ValueError(
+                    'Expected byte-like object for placeholder {}. '
+                    'Got: {}'.format(name, type(data)))
+            script.extend(serialization._push_prefix(len(data)))
+            script.extend(data)
+            script.extend(fixed)
+        return bytes(script)
@@ -31,11 +31,14 @@ def guess_version(redeem_script):
 
 def guess_sequence(redeem_script):
     '''
-    str -> int
+    str or bytes -> int
     If OP_CSV is used, guess an appropriate sequence
     Otherwise, disable RBF, but leave lock_time on.
     Fails if there's not a constant before OP_CSV
     '''
+    if isinstance(redeem_script, (bytes, bytearray)):
+        sequence = _push_before(redeem_script, 0xb2)  # OP_CSV
+        return 0xFFFFFFFE if sequence is None else sequence
     try:
         script_array = redeem_script.split()
         loc = script_array.index('OP_CHECKSEQUENCEVERIFY')
@@ -44,6 +47,21 @@ def guess_sequence(redeem_script):
         return 0xFFFFFFFE  # Enable lock_time, disable RBF
 
 
+def _push_before(script, opcode):
+    '''
+    bytes, int -> int
+    The data pushed right before the first use of opcode, as guess_sequence
+    reads it from a string. None if opcode isn't used or isn't preceded by
+    a push.
+    '''
+    data = None
+    for op, op_data, _ in script_ser.iter_ops(script):
+        if op == opcode:
+            return None if not data else int.from_bytes(data, 'big')
+        data = op_data
+    return None
+
+
 def guess_locktime(redeem_script):
     '''
     str -> int
@@ -151,17 +169,29 @@ def p2pkh_input_and_witness(outpoint, sig, pubkey, sequence=0xFFFFFFFE):
         sequence=sequence)
 
 
+def _push_redeem_script(redeem_script):
+    '''
+    str or bytes -> bytes
+    The redeem script push at the end of a p2sh script_sig
+    '''
+    if not isinstance(redeem_script, (bytes, bytearray)):
+        redeem_script = script_ser.serialize(redeem_script)
+    if len(redeem_script) == 0:
+        return b''
+    return (script_ser._push_prefix(len(redeem_script))
+            + bytes(redeem_script))
+
+
 def p2sh_input(outpoint, stack_script, redeem_script, sequence=None):
     '''
-    OutPoint, str, str, int -> TxIn
+    OutPoint, str, str or bytes, int -> TxIn
     Create a signed legacy TxIn from a p2pkh prevout
     '''
     if sequence is None:
         sequence = guess_sequence(redeem_script)
 
     stack_script = script_ser.serialize(stack_script)
-    redeem_script = script_ser.hex_serialize(redeem_script)
-    redeem_script = script_ser.serialize(redeem_script)
+    redeem_script = _push_redeem_script(redeem_script)
 
     return tb.make_legacy_input(
         outpoint=outpoint,
@@ -173,7 +203,7 @@ def p2sh_input(outpoint, stack_script, redeem_script, sequence=None):
 def p2sh_input_and_witness(outpoint, stack_script,
                            redeem_script, sequence=None):
     '''
-    OutPoint, str, str, int -> (TxIn, InputWitness)
+    OutPoint, str, str or bytes, int -> (TxIn, InputWitness)
     Create a signed legacy TxIn from a p2pkh prevout
     Create an empty InputWitness for it
     Useful for transactions spending some witness and some legacy prevouts
@@ -182,8 +212,7 @@ def p2sh_input_and_witness(outpoint, stack_script,
         sequence = guess_sequence(redeem_script)
 
     stack_script = script_ser.serialize(stack_script)
-    redeem_script = script_ser.hex_serialize(redeem_script)
-    redeem_script = script_ser.serialize(redeem_script)
+    redeem_script = _push_redeem_script(redeem_script)
 
     return tb.make_legacy_input_and_empty_witness(
         outpoint=outpoint,
@@ -205,14 +234,16 @@ def p2wpkh_input_and_witness(outpoint, sig, pubkey, sequence=0xFFFFFFFE):
 
 def p2wsh_input_and_witness(outpoint, stack, witness_script, sequence=None):
     '''
-    Outpoint, str, str, int -> (TxIn, InputWitness)
+    Outpoint, str, str or bytes, int -> (TxIn, InputWitness)
     Create a signed witness TxIn and InputWitness from a p2wsh prevout
     '''
     if sequence is None:
         sequence = guess_sequence(witness_script)
     stack = list(map(
         lambda x: b'' if x == 'NONE' else bytes.fromhex(x), stack.split()))
-    stack.append(script_ser.serialize(witness_script))
+    if not isinstance(witness_script, (bytes, bytearray)):
+        witness_script = script_ser.serialize(witness_script)
+    stack.append(witness_script)
     return tb.make_witness_input_and_witness(outpoint, sequence, stack)
 
 
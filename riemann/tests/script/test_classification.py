@@ -0,0 +1,88 @@
+import unittest
+from riemann.script import ScriptType, classify, classify_many
+from riemann.tests import helpers
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+PKH = bytes(range(20))
+SH = bytes(range(32))
+PK = b'\x02' + bytes(range(32))
+PK_LONG = b'\x04' + bytes(range(64))
+
+SCRIPTS = [
+    (b'\x76\xa9\x14' + PKH + b'\x88\xac', ScriptType.P2PKH, PKH),
+    (b'\xa9\x14' + PKH + b'\x87', ScriptType.P2SH, PKH),
+    (b'\x00\x14' + PKH, ScriptType.P2WPKH, PKH),
+    (b'\x00\x20' + SH, ScriptType.P2WSH, SH),
+    (b'\x51\x20' + SH, ScriptType.P2TR, SH),
+    (b'\x21' + PK + b'\xac', ScriptType.P2PK, PK),
+    (b'\x41' + PK_LONG + b'\xac', ScriptType.P2PK, PK_LONG),
+    (b'\x6a\x02\xbe\xef', ScriptType.OP_RETURN, b'\x02\xbe\xef'),
+    (b'\x6a', ScriptType.OP_RETURN, b''),
+    (b'\x76\xa9\x14' + PKH + b'\x88\xad', ScriptType.NONSTANDARD, None),
+    (b'\x00\x14' + PKH[:-1], ScriptType.NONSTANDARD, None),
+    (b'\x52\x20' + SH, ScriptType.NONSTANDARD, None),
+    (b'', ScriptType.NONSTANDARD, None),
+]
+
+
+class TestClassify(unittest.TestCase):
+
+    def test_classify(self):
+        for script, script_type, payload in SCRIPTS:
+            self.assertEqual(classify(script), (script_type, payload))
+        self.assertEqual(
+            classify(helpers.OP_IF['output_script'])[0],
+            ScriptType.P2SH)
+
+    def test_classify_multisig(self):
+        script = (b'\x52' + b'\x21' + PK + b'\x41' + PK_LONG + b'\x21' + PK
+                  + b'\x53\xae')
+        self.assertEqual(
+            classify(script),
+            (ScriptType.MULTISIG, (2, 3, (2, 36, 102))))
+        self.assertEqual(
+            classify(helpers.MSIG_2_2['ser_script'])[1][:2],
+            (2, 2))
+
+        # n doesn't match the pubkey count
+        self.assertEqual(
+            classify(script[:-2] + b'\x52\xae')[0],
+            ScriptType.NONSTANDARD)
+        # m > n
+        self.assertEqual(
+            classify(b'\x54' + script[1:])[0],
+            ScriptType.NONSTANDARD)
+        # A pubkey push of the wrong size
+        self.assertEqual(
+            classify(b'\x51\x20' + SH + b'\x51\xae')[0],
+            ScriptType.NONSTANDARD)
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_classify_many(self):
+        multisig = b'\x51\x21' + PK + b'\x21' + PK + b'\x52\xae'
+        scripts = [s for s, _, _ in SCRIPTS] + [multisig]
+        blob = b''.join(scripts)
+        lengths = [len(s) for s in scripts]
+        offsets = [sum(lengths[:i]) for i in range(len(scripts))]
+
+        types, payload_offsets, payload_lens = classify_many(
+            blob, offsets, lengths)
+        self.assertEqual(types.dtype, np.uint8)
+        self.assertEqual(
+            types.tolist(),
+            [t for _, t, _ in SCRIPTS] + [ScriptType.MULTISIG])
+        for i, (_, _, payload) in enumerate(SCRIPTS):
+            start = payload_offsets[i]
+            self.assertEqual(
+                blob[start:start + payload_lens[i]],
+                payload if payload is not None else b'')
+        self.assertEqual(
+            blob[payload_offsets[-1]:payload_offsets[-1] + payload_lens[-1]],
+            multisig)
+
+        types = classify_many(b'', [0], [0])[0]
+        self.assertEqual(types.tolist(), [ScriptType.NONSTANDARD])
@@ -103,6 +103,42 @@ class TestSerialization(unittest.TestCase):
             'Unsupported opcode. Got 0xfe',
             str(context.exception))
 
+    def test_deserialize_truncated_pushdata(self):
+        for script in (b'\x4c', b'\x4c\x02\x00',
+                       b'\x4d\x01', b'\x4d\x02\x00'):
+            with self.assertRaises(IndexError) as context:
+                ser.deserialize(script)
+            self.assertIn('out of bounds', str(context.exception))
+
+    def test_iter_ops(self):
+        script = helpers.MSIG_2_2['ser_script']
+        ops = list(ser.iter_ops(script))
+        self.assertEqual(
+            [(opcode, data if data is None else bytes(data), offset)
+             for opcode, data, offset in ops],
+            [(0x52, None, 0),
+             (0x41, script[2:67], 1),
+             (0x41, script[68:133], 67),
+             (0x52, None, 133),
+             (0xae, None, 134)])
+        self.assertIsInstance(ops[1][1], memoryview)
+
+        pushdata = (b'\x00' + b'\x4c\x01\xff' + b'\x4d\x02\x00\xaa\xbb'
+                    + b'\xab')
+        self.assertEqual(
+            [(opcode, data if data is None else bytes(data), offset)
+             for opcode, data, offset in ser.iter_ops(pushdata)],
+            [(0x00, None, 0),
+             (0x4c, b'\xff', 1),
+             (0x4d, b'\xaa\xbb', 4),
+             (0xab, None, 9)])
+
+        self.assertEqual(list(ser.iter_ops(b'')), [])
+        with self.assertRaises(IndexError):
+            list(ser.iter_ops(b'\x02\x00'))
+        with self.assertRaises(NotImplementedError):
+            list(ser.iter_ops(b'\x4e\x00\x00\x00\x00'))
+
     def test_hex_deserialize(self):
         self.assertEqual(
             helpers.MSIG_2_2['redeem_script'],
@@ -127,6 +163,25 @@ class TestSerialization(unittest.TestCase):
             'c0',
             ser.hex_serialize('OP_SHA256'))
 
+    def test_overwrites_reset(self):
+        riemann.select_network('decred_main')
+        ser.hex_serialize('OP_BLAKE256')
+        riemann.select_network('bitcoin_main')
+        self.assertEqual(
+            'OP_SHA256',
+            ser.hex_deserialize('a8'))
+        self.assertEqual(
+            'a8',
+            ser.hex_serialize('OP_SHA256'))
+        with self.assertRaises(ValueError):
+            ser.hex_serialize('OP_BLAKE256')
+        with self.assertRaises(ValueError) as context:
+            ser.hex_deserialize('c0')
+
+        self.assertIn(
+            'Unsupported opcode. Got 0xc0',
+            str(context.exception))
+
     def test_pushdata4_error(self):
         with self.assertRaises(NotImplementedError) as context:
             ser.deserialize(bytes([78]))
@@ -0,0 +1,71 @@
+import unittest
+import riemann
+from riemann.script import examples
+from riemann.script import serialization as ser
+from riemann.script import ScriptTemplate
+
+
+class TestScriptTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.values = {
+            'secret_hash': bytes(range(32)),
+            'pkh0': b'\xaa' * 20,
+            'timeout': b'\x80\x51\x01',
+            'pkh1': b'\xbb' * 20}
+
+    def tearDown(self):
+        riemann.select_network('bitcoin_main')
+
+    def test_fill(self):
+        template = ScriptTemplate.compile(examples.htlc_redeem_script)
+        self.assertEqual(
+            template.fill(**self.values),
+            ser.serialize(examples.htlc_redeem_script.format(
+                **{k: v.hex() for k, v in self.values.items()})))
+        self.assertEqual(
+            template.placeholders,
+            ('secret_hash', 'pkh0', 'timeout', 'pkh1'))
+
+    def test_fill_repeated_and_long(self):
+        template = ScriptTemplate.compile('{pk} {pk} OP_2 OP_CHECKMULTISIG')
+        self.assertEqual(template.placeholders, ('pk',))
+        self.assertEqual(
+            template.fill(pk=b'\x02' * 33),
+            b'\x21' + b'\x02' * 33 + b'\x21' + b'\x02' * 33 + b'\x52\xae')
+
+        template = ScriptTemplate.compile('{data}')
+        self.assertEqual(
+            template.fill(data=b'\x01' * 76),
+            b'\x4c\x4c' + b'\x01' * 76)
+        self.assertEqual(
+            template.fill(data=b'\x01' * 300),
+            b'\x4d\x2c\x01' + b'\x01' * 300)
+        with self.assertRaises(NotImplementedError):
+            template.fill(data=b'\x01' * 1001)
+
+    def test_fill_errors(self):
+        template = ScriptTemplate.compile(examples.htlc_redeem_script)
+        del self.values['pkh1']
+        with self.assertRaises(ValueError) as context:
+            template.fill(**self.values)
+
+        self.assertIn(
+            'Missing value for placeholder pkh1.',
+            str(context.exception))
+
+        self.values['pkh1'] = 'bb' * 20
+        with self.assertRaises(ValueError) as context:
+            template.fill(**self.values)
+
+        self.assertIn(
+            'Expected byte-like object for placeholder pkh1.',
+            str(context.exception))
+
+    def test_compile_uses_network(self):
+        riemann.select_network('decred_main')
+        template = ScriptTemplate.compile('OP_SHA256 {h} OP_EQUAL')
+        riemann.select_network('bitcoin_main')
+        self.assertEqual(
+            template.fill(h=b'\x00' * 32),
+            b'\xc0\x20' + b'\x00' * 32 + b'\x87')
@@ -0,0 +1,118 @@
+import unittest
+from riemann import block
+from riemann import tx
+from riemann import utils
+from riemann.tests import helpers
+
+GENESIS_HEADER = bytes.fromhex(
+    '0100000000000000000000000000000000000000000000000000000000000000000000'
+    '003ba3edfd7a7b12b27ac72c3e67768f617fc81bc3888a51323a9fb8aa4b1e5e4a29ab'
+    '5f49ffff001d1dac2b7c')
+GENESIS_COINBASE = bytes.fromhex(
+    '01000000010000000000000000000000000000000000000000000000000000000000'
+    '000000ffffffff4d04ffff001d0104455468652054696d65732030332f4a616e2f32'
+    '303039204368616e63656c6c6f72206f6e206272696e6b206f66207365636f6e6420'
+    '6261696c6f757420666f722062616e6b73ffffffff0100f2052a0100000043410467'
+    '8afdb0fe5548271967f1a67130b7105cd6a828e03909a67962e0ea1f61deb649f6bc'
+    '3f4cef38c4f35504e51ec112de5c384df7ba0b8d578a4c702b6bf11d5fac00000000')
+GENESIS_HASH = bytes.fromhex(
+    '000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f')
+GENESIS_MERKLE_ROOT = bytes.fromhex(
+    '4a5e1e4baab89f3a32518a88c31bc87f618f76673e2cc77ab2127b7afdeda33b')
+
+
+class TestBlockHeader(unittest.TestCase):
+
+    def test_from_bytes(self):
+        h = block.BlockHeader.from_bytes(GENESIS_HEADER)
+        self.assertEqual(h, GENESIS_HEADER)
+        self.assertEqual(h.version, b'\x01\x00\x00\x00')
+        self.assertEqual(h.prev_block, b'\x00' * 32)
+        self.assertEqual(h.merkle_root, GENESIS_MERKLE_ROOT[::-1])
+        self.assertEqual(h.bits, bytes.fromhex('ffff001d'))
+        self.assertEqual(h.block_hash, GENESIS_HASH)
+        self.assertEqual(h.block_hash_le, GENESIS_HASH[::-1])
+
+    def test_from_bytes_bad_length(self):
+        with self.assertRaises(ValueError) as context:
+            block.BlockHeader.from_bytes(GENESIS_HEADER[:79])
+        self.assertIn('Expected 80-byte block header', str(context.exception))
+
+    def test_copy(self):
+        h = block.BlockHeader.from_bytes(GENESIS_HEADER)
+        self.assertEqual(h, h.copy())
+        self.assertEqual(h.copy(nonce=b'\x00' * 4)[-4:], b'\x00' * 4)
+
+
+class TestBlock(unittest.TestCase):
+
+    def setUp(self):
+        self.genesis = GENESIS_HEADER + b'\x01' + GENESIS_COINBASE
+
+        self.txs = [
+            GENESIS_COINBASE,
+            helpers.P2PKH1['ser']['tx']['signed'],
+            helpers.P2WSH['ser']['tx']['signed']]
+        self.segwit = GENESIS_HEADER + b'\x03' + b''.join(self.txs)
+
+    def test_genesis(self):
+        b = block.Block.from_bytes(self.genesis)
+        self.assertEqual(b, self.genesis)
+        self.assertEqual(b.tx_count, 1)
+        self.assertEqual(b.block_hash, GENESIS_HASH)
+        self.assertEqual(b.header, GENESIS_HEADER)
+        self.assertEqual(b.tx_ids, (GENESIS_MERKLE_ROOT,))
+        self.assertEqual(b.tx(0), GENESIS_COINBASE)
+
+    def test_txs(self):
+        b = block.Block(self.segwit)
+        self.assertEqual(b.tx_count, 3)
+        self.assertEqual(b.txs, tuple(self.txs))
+        self.assertEqual(list(b.iter_txs()), self.txs)
+        self.assertEqual(b.tx(2), self.txs[2])
+        self.assertEqual(b.tx(-1), self.txs[2])
+        self.assertIsInstance(b.tx(1), tx.Tx)
+
+    def test_tx_ids(self):
+        b = block.Block(self.segwit)
+        self.assertNotIn('txs', b.__dict__)
+
+        expected = [tx.Tx.from_bytes(t) for t in self.txs]
+        self.assertEqual(b.tx_ids_le, tuple(t.tx_id_le for t in expected))
+        self.assertEqual(b.tx_ids, tuple(t.tx_id for t in expected))
+        self.assertEqual(
+            b.wtx_ids_le,
+            (b'\x00' * 32,
+             utils.hash256(self.txs[1]),
+             expected[2].wtx_id_le))
+        self.assertEqual(b.wtx_ids[2], expected[2].wtx_id)
+        self.assertNotIn('txs', b.__dict__)
+
+    def test_immutable(self):
+        b = block.Block(self.genesis)
+        with self.assertRaises(TypeError):
+            b.tx_count = 2
+
+    def test_bad_bytes(self):
+        with self.assertRaises(ValueError) as context:
+            block.Block(GENESIS_HEADER)
+        self.assertIn('Block too short', str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            block.Block(GENESIS_HEADER + b'\x00')
+        self.assertIn('at least one tx', str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            block.Block(self.genesis + b'\x00')
+        self.assertIn('1 trailing bytes', str(context.exception))
+
+        for cut in (82, 100, len(self.segwit) - 2):
+            with self.assertRaises(ValueError) as context:
+                block.Block(self.segwit[:cut])
+            self.assertIn(
+                'Block extends past the end of the buffer.',
+                str(context.exception))
+        with self.assertRaises(ValueError):
+            block.Block(self.genesis[:-1])
+        with self.assertRaises(ValueError):
+            block.Block(GENESIS_HEADER + b'\xfd\x01')
@@ -43,6 +43,15 @@ class TestSimple(unittest.TestCase):
         self.assertEqual(
             simple.guess_sequence('0000FFEE OP_CHECKSEQUENCEVERIFY'),
             0x0000FFEE)
+        self.assertEqual(
+            simple.guess_sequence(b'\x63'),
+            0xFFFFFFFE)
+        self.assertEqual(
+            simple.guess_sequence(b'\x51\xb2'),
+            0xFFFFFFFE)
+        self.assertEqual(
+            simple.guess_sequence(b'\x04\x00\x00\xff\xee\xb2'),
+            0x0000FFEE)
 
     def test_guess_locktime(self):
         self.assertEqual(
@@ -166,6 +175,17 @@ class TestSimple(unittest.TestCase):
             tx_p2sh_input,
             helpers.P2SH_PD1['ser']['ins'][0]['input'])
 
+        # The serialized redeem script, without its OP_PUSHDATA1 prefix
+        redeem_script = helpers.P2SH_PD1['ser']['ins'][0]['redeem_script'][2:]
+        tx_p2sh_input = simple.p2sh_input(
+            outpoint=outpoint,
+            stack_script=helpers.P2SH_PD1['human']['ins'][0]['stack_script'],
+            redeem_script=redeem_script,
+            sequence=helpers.P2SH_PD1['human']['ins'][0]['sequence'])
+        self.assertEqual(
+            tx_p2sh_input,
+            helpers.P2SH_PD1['ser']['ins'][0]['input'])
+
         # Seems weird, but tests sequence guessing
         outpoint = simple.outpoint(
             tx_id=helpers.P2PKH['human']['ins'][0]['hash'],
@@ -203,6 +223,16 @@ class TestSimple(unittest.TestCase):
             tx_p2sh_input,
             helpers.P2SH_PD1['ser']['ins'][0]['input'])
 
+        redeem_script = helpers.P2SH_PD1['ser']['ins'][0]['redeem_script'][2:]
+        (tx_p2sh_input, witness) = simple.p2sh_input_and_witness(
+            outpoint=outpoint,
+            stack_script=helpers.P2SH_PD1['human']['ins'][0]['stack_script'],
+            redeem_script=redeem_script,
+            sequence=helpers.P2SH_PD1['human']['ins'][0]['sequence'])
+        self.assertEqual(
+            tx_p2sh_input,
+            helpers.P2SH_PD1['ser']['ins'][0]['input'])
+
         # Seems weird but tests sequence guessing
         outpoint = simple.outpoint(
             tx_id=helpers.P2PKH['human']['ins'][0]['hash'],
@@ -268,6 +298,17 @@ class TestSimple(unittest.TestCase):
             tx_in,
             helpers.INPUT_FOR_WITNESS_SEQUENCE_GUESSING)
 
+        (tx_in, witness) = simple.p2wsh_input_and_witness(
+            outpoint=outpoint,
+            stack=helper_witness['stack'],
+            witness_script=helpers.P2WSH['ser']['witnesses'][0]['wit_script'],
+            sequence=None)
+
+        self.assertEqual(
+            tx_in,
+            helpers.INPUT_FOR_WITNESS_SEQUENCE_GUESSING)
+        self.assertEqual(witness, helpers.P2WSH['ser']['tx']['witness'])
+
     def test_empty_input_witness(self):
         self.assertEqual(
             simple.empty_input_witness(),
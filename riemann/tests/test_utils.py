@@ -94,6 +94,14 @@ class TestUtils(unittest.TestCase):
             utils.sha256(helpers.P2WSH['ser']['witnesses'][0]['wit_script']),
             helpers.P2WSH['ser']['ins'][0]['pk_script'][2:])
 
+    def test_tagged_hash(self):
+        for tag, msg in [(b'TapSighash', b''), (b'TapLeaf', b'\xc0\x01Q'),
+                         (b'TapSighash', bytearray(100))]:
+            tag_hash = utils.sha256(tag)
+            self.assertEqual(
+                utils.tagged_hash(tag, msg),
+                utils.sha256(tag_hash + tag_hash + msg))
+
     def test_hash160(self):
         self.assertEqual(
             utils.hash160(bytes.fromhex(helpers.PK['human'][0]['pk'])),
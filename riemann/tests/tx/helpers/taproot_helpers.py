@@ -0,0 +1,67 @@
+# flake8: noqa
+
+# keyPathSpending from the BIP341 wallet test vectors
+# https://github.com/bitcoin/bips/blob/master/bip-0341/wallet-test-vectors.json
+KEY_PATH = {
+    'tx': '02000000097de20cbff686da83a54981d2b9bab3586f4ca7e48f57f5b55963115f3b334e9c010000000000000000d7b7cab57b1393ace2d064f4d4a2cb8af6def61273e127517d44759b6dafdd990000000000fffffffff8e1f583384333689228c5d28eac13366be082dc57441760d957275419a418420000000000fffffffff0689180aa63b30cb162a73c6d2a38b7eeda2a83ece74310fda0843ad604853b0100000000feffffffaa5202bdf6d8ccd2ee0f0202afbbb7461d9264a25e5bfd3c5a52ee1239e0ba6c0000000000feffffff956149bdc66faa968eb2be2d2faa29718acbfe3941215893a2a3446d32acd050000000000000000000e664b9773b88c09c32cb70a2a3e4da0ced63b7ba3b22f848531bbb1d5d5f4c94010000000000000000e9aa6b8e6c9de67619e6a3924ae25696bb7b694bb677a632a74ef7eadfd4eabf0000000000ffffffffa778eb6a263dc090464cd125c466b5a99667720b1c110468831d058aa1b82af10100000000ffffffff0200ca9a3b000000001976a91406afd46bcdfd22ef94ac122aa11f241244a37ecc88ac807840cb0000000020ac9a87f5594be208f8532db38cff670c450ed2fea8fcdefcc9a663f78bab962b0065cd1d',
+    'utxos': [
+        {'pk_script': '512053a1f6e454df1aa2776a2814a721372d6258050de330b3c6d10ee8f4e0dda343', 'value': 420000000},
+        {'pk_script': '5120147c9c57132f6e7ecddba9800bb0c4449251c92a1e60371ee77557b6620f3ea3', 'value': 462000000},
+        {'pk_script': '76a914751e76e8199196d454941c45d1b3a323f1433bd688ac', 'value': 294000000},
+        {'pk_script': '5120e4d810fd50586274face62b8a807eb9719cef49c04177cc6b76a9a4251d5450e', 'value': 504000000},
+        {'pk_script': '512091b64d5324723a985170e4dc5a0f84c041804f2cd12660fa5dec09fc21783605', 'value': 630000000},
+        {'pk_script': '00147dd65592d0ab2fe0d0257d571abf032cd9db93dc', 'value': 378000000},
+        {'pk_script': '512075169f4001aa68f15bbed28b218df1d0a62cbbcf1188c6665110c293c907b831', 'value': 672000000},
+        {'pk_script': '5120712447206d7a5238acc7ff53fbe94a3b64539ad291c7cdbc490b7577e4b17df5', 'value': 546000000},
+        {'pk_script': '512077e30a5522dd9f894c3f8b8bd4c4b2cf82ca7da8a3ea6a239655c39c050ab220', 'value': 588000000},
+    ],
+    'hash_amounts': '58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde6',
+    'hash_outputs': 'a2e6dab7c1f0dcd297c8d61647fd17d821541ea69c3cc37dcbad7f90d4eb4bc5',
+    'hash_prevouts': 'e3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f',
+    'hash_scriptpubkeys': '23ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e21',
+    'hash_sequences': '18959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957e',
+    'inputs': [
+        {
+            'index': 0,
+            'hash_type': 0x03,
+            'sig_msg': '0003020000000065cd1de3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde623ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e2118959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957e0000000000d0418f0e9a36245b9a50ec87f8bf5be5bcae434337b87139c3a5b1f56e33cba0',
+            'sighash': '2514a6272f85cfa0f45eb907fcb0d121b808ed37c6ea160a5a9046ed5526d555',
+        },
+        {
+            'index': 1,
+            'hash_type': 0x83,
+            'sig_msg': '0083020000000065cd1d00d7b7cab57b1393ace2d064f4d4a2cb8af6def61273e127517d44759b6dafdd9900000000808f891b00000000225120147c9c57132f6e7ecddba9800bb0c4449251c92a1e60371ee77557b6620f3ea3ffffffffffcef8fb4ca7efc5433f591ecfc57391811ce1e186a3793024def5c884cba51d',
+            'sighash': '325a644af47e8a5a2591cda0ab0723978537318f10e6a63d4eed783b96a71a4d',
+        },
+        {
+            'index': 3,
+            'hash_type': 0x01,
+            'sig_msg': '0001020000000065cd1de3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde623ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e2118959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957ea2e6dab7c1f0dcd297c8d61647fd17d821541ea69c3cc37dcbad7f90d4eb4bc50003000000',
+            'sighash': 'bf013ea93474aa67815b1b6cc441d23b64fa310911d991e713cd34c7f5d46669',
+        },
+        {
+            'index': 4,
+            'hash_type': 0x00,
+            'sig_msg': '0000020000000065cd1de3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde623ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e2118959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957ea2e6dab7c1f0dcd297c8d61647fd17d821541ea69c3cc37dcbad7f90d4eb4bc50004000000',
+            'sighash': '4f900a0bae3f1446fd48490c2958b5a023228f01661cda3496a11da502a7f7ef',
+        },
+        {
+            'index': 6,
+            'hash_type': 0x02,
+            'sig_msg': '0002020000000065cd1de3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde623ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e2118959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957e0006000000',
+            'sighash': '15f25c298eb5cdc7eb1d638dd2d45c97c4c59dcaec6679cfc16ad84f30876b85',
+        },
+        {
+            'index': 7,
+            'hash_type': 0x82,
+            'sig_msg': '0082020000000065cd1d00e9aa6b8e6c9de67619e6a3924ae25696bb7b694bb677a632a74ef7eadfd4eabf00000000804c8b2000000000225120712447206d7a5238acc7ff53fbe94a3b64539ad291c7cdbc490b7577e4b17df5ffffffff',
+            'sighash': 'cd292de50313804dabe4685e83f923d2969577191a3e1d2882220dca88cbeb10',
+        },
+        {
+            'index': 8,
+            'hash_type': 0x81,
+            'sig_msg': '0081020000000065cd1da2e6dab7c1f0dcd297c8d61647fd17d821541ea69c3cc37dcbad7f90d4eb4bc500a778eb6a263dc090464cd125c466b5a99667720b1c110468831d058aa1b82af101000000002b0c230000000022512077e30a5522dd9f894c3f8b8bd4c4b2cf82ca7da8a3ea6a239655c39c050ab220ffffffff',
+            'sighash': 'cccb739eca6c13a8a89e6e5cd317ffe55669bbda23f2fd37b0f18755e008edd2',
+        },
+    ],
+}
@@ -0,0 +1,119 @@
+import unittest
+from riemann import tx
+from riemann import utils
+from riemann.tests import helpers
+from riemann.script import ScriptType, classify
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestTxBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.raws = [helpers.P2PKH1['ser']['tx']['signed'],
+                     helpers.P2WSH['ser']['tx']['signed'],
+                     helpers.P2SH['ser']['tx']['signed']]
+        self.txs = [tx.Tx.from_bytes(r) for r in self.raws]
+
+    def check_columns(self, batch):
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(
+            batch.version.tolist(),
+            [utils.le2i(t.version) for t in self.txs])
+        self.assertEqual(
+            batch.lock_time.tolist(),
+            [utils.le2i(t.lock_time) for t in self.txs])
+        self.assertEqual(batch.size.tolist(), [len(r) for r in self.raws])
+        self.assertEqual(
+            batch.weight.tolist(),
+            [len(t.no_witness()) * 3 + len(t) for t in self.txs])
+
+        tx_ins = [tx_in for t in self.txs for tx_in in t.tx_ins]
+        self.assertEqual(
+            batch.tx_ins.tolist(),
+            [0, 1, 2, 3])
+        self.assertEqual(batch.in_tx.tolist(), [0, 1, 2])
+        self.assertEqual(
+            [bytes(row) for row in batch.in_tx_id],
+            [tx_in.outpoint.tx_id for tx_in in tx_ins])
+        self.assertEqual(
+            batch.in_index.tolist(),
+            [utils.le2i(tx_in.outpoint.index) for tx_in in tx_ins])
+        self.assertEqual(
+            batch.in_sequence.tolist(),
+            [utils.le2i(tx_in.sequence) for tx_in in tx_ins])
+
+        tx_outs = [tx_out for t in self.txs for tx_out in t.tx_outs]
+        self.assertEqual(batch.tx_outs.tolist(), [0, 2, 6, 8])
+        self.assertEqual(batch.out_tx.tolist(), [0, 0, 1, 1, 1, 1, 2, 2])
+        self.assertEqual(
+            batch.out_value.tolist(),
+            [utils.le2i(tx_out.value) for tx_out in tx_outs])
+        self.assertEqual(
+            batch.out_script_len.tolist(),
+            [len(tx_out.output_script) for tx_out in tx_outs])
+        for i, tx_out in enumerate(tx_outs):
+            self.assertEqual(batch.output_script(i), tx_out.output_script)
+
+        self.assertEqual(
+            batch.output_values_by_tx().tolist(),
+            [sum(utils.le2i(o.value) for o in t.tx_outs) for t in self.txs])
+
+    def test_from_list(self):
+        self.check_columns(tx.TxBatch(self.raws))
+        self.check_columns(tx.TxBatch(iter(self.raws)))
+
+    def test_from_buffer(self):
+        self.check_columns(tx.TxBatch.from_buffer(b''.join(self.raws)))
+
+    def test_dtypes(self):
+        batch = tx.TxBatch(self.raws)
+        self.assertEqual(batch.out_value.dtype, np.uint64)
+        self.assertEqual(batch.version.dtype, np.uint32)
+        self.assertEqual(batch.in_tx_id.shape, (3, 32))
+        self.assertEqual(len(batch.scripts), sum(batch.out_script_len))
+
+    def test_classify_outputs(self):
+        batch = tx.TxBatch(self.raws)
+        types, payload_offsets, payload_lens = batch.classify_outputs()
+        tx_outs = [tx_out for t in self.txs for tx_out in t.tx_outs]
+        for i, tx_out in enumerate(tx_outs):
+            script_type, payload = classify(tx_out.output_script)
+            self.assertEqual(types[i], script_type)
+            start = payload_offsets[i]
+            self.assertEqual(
+                batch.scripts[start:start + payload_lens[i]], payload)
+        self.assertEqual(
+            types.tolist(),
+            [ScriptType.P2PKH, ScriptType.P2PKH,
+             ScriptType.P2PKH, ScriptType.P2SH,
+             ScriptType.P2PKH, ScriptType.P2WSH,
+             ScriptType.P2SH, ScriptType.P2SH])
+
+    def test_empty(self):
+        batch = tx.TxBatch([])
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(batch.output_values_by_tx().tolist(), [])
+        self.assertEqual(batch.classify_outputs()[0].tolist(), [])
+
+    def test_trailing_bytes(self):
+        with self.assertRaises(ValueError) as context:
+            tx.TxBatch([self.raws[0] + b'\x00'])
+        self.assertIn('1 trailing bytes', str(context.exception))
+
+    def test_truncated(self):
+        with self.assertRaises(ValueError) as context:
+            tx.TxBatch([self.raws[0][:-1]])
+        self.assertIn(
+            'Tx extends past the end of the buffer.',
+            str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            tx.TxBatch.from_buffer(b''.join(self.raws)[:-10])
+        self.assertIn(
+            'Tx extends past the end of the buffer.',
+            str(context.exception))
@@ -0,0 +1,76 @@
+import riemann
+import unittest
+from riemann import tx
+from riemann.tx import bulk
+from riemann.tests import helpers
+
+
+class TestParseMany(unittest.TestCase):
+
+    def setUp(self):
+        self.raws = [helpers.P2PKH1['ser']['tx']['signed'],
+                     helpers.P2WSH['ser']['tx']['signed'],
+                     helpers.P2SH['ser']['tx']['signed']] * 5
+
+    def tearDown(self):
+        riemann.select_network('bitcoin_main')
+
+    def test_parse_many(self):
+        res = tx.parse_many(self.raws, workers=2, chunksize=2)
+        self.assertIsInstance(res, list)
+        self.assertEqual(len(res), len(self.raws))
+        for t, raw in zip(res, self.raws):
+            self.assertIsInstance(t, tx.Tx)
+            self.assertEqual(t, raw)
+        self.assertEqual(res[1].tx_witnesses[0],
+                         helpers.P2WSH['ser']['tx']['witness'])
+
+    def test_parse_many_stream(self):
+        res = tx.parse_many(
+            (memoryview(raw) for raw in self.raws),
+            workers=2, chunksize=4, stream=True)
+        self.assertNotIsInstance(res, list)
+        self.assertEqual([t.to_bytes() for t in res], self.raws)
+
+    def test_parse_many_hex(self):
+        res = tx.parse_many_hex(
+            [raw.hex() for raw in self.raws], workers=1, chunksize=100)
+        self.assertEqual([t.to_bytes() for t in res], self.raws)
+
+    def test_network(self):
+        riemann.select_network('bitcoin_test')
+        bulk._parse_chunk('litecoin_main', self.raws[:1])
+        self.assertEqual(riemann.get_current_network_name(), 'litecoin_main')
+
+        riemann.select_network('bitcoin_test')
+        res = tx.parse_many(self.raws[:3], workers=1)
+        self.assertEqual([t.to_bytes() for t in res], self.raws[:3])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError) as context:
+            tx.parse_many(self.raws, workers=0)
+        self.assertIn('Expected at least 1 worker', str(context.exception))
+
+        with self.assertRaises(ValueError):
+            tx.parse_many([self.raws[0][:-1]], workers=1)
+
+
+class TestBatchSighashes(unittest.TestCase):
+
+    def test_batch_sighashes(self):
+        t = tx.Tx.from_bytes(helpers.P2WPKH['ser']['tx']['signed'])
+        script = helpers.P2WPKH['ser']['ins'][0]['pk_script']
+        value = helpers.P2WPKH['ser']['ins'][0]['value']
+        specs = [(0, script, value, tx.shared.SIGHASH_ALL),
+                 (0, script, value, tx.shared.SIGHASH_SINGLE)]
+
+        res = tx.batch_sighashes([(t, specs)] * 3, workers=1, chunksize=2)
+        self.assertEqual(
+            res,
+            [[helpers.P2WPKH['ser']['segwit_sighash']['all'],
+              helpers.P2WPKH['ser']['segwit_sighash']['single']]] * 3)
+
+        res = tx.batch_sighashes(iter([(t, specs[:1])]), workers=1,
+                                 stream=True)
+        self.assertEqual(
+            list(res), [[helpers.P2WPKH['ser']['segwit_sighash']['all']]])
@@ -505,6 +505,69 @@ class TestDecredTx(DecredTestCase):
             'SIGHASH_NONE is a bad idea.',
             str(context.exception))
 
+    def test_sighash_matches_copies(self):
+        t = tx.DecredTx(
+            version=self.version,
+            tx_ins=[self.tx_in] * 2,
+            tx_outs=[self.tx_out] * 2,
+            lock_time=self.lock_time,
+            expiry=self.expiry,
+            tx_witnesses=[self.witness] * 2)
+        script = b'\x51'
+        blank = self.witness.copy(stack_script=b'', redeem_script=b'')
+        signing = self.witness.copy(stack_script=script, redeem_script=b'')
+
+        def expected(copy_tx, sighash_type):
+            return utils.blake256(
+                utils.i2le_padded(sighash_type, 4)
+                + copy_tx.prefix_hash()
+                + copy_tx.witness_signing_hash())
+
+        copy_tx = t.copy(tx_witnesses=[blank, signing])
+        self.assertEqual(t.sighash_all(1, script), expected(copy_tx, 0x01))
+        self.assertEqual(
+            t.sighash_all(1, script, anyone_can_pay=True),
+            expected(copy_tx, 0x81))
+
+        copy_tx = t.copy(
+            tx_ins=[self.tx_in.copy(sequence=b'\x00' * 4), self.tx_in],
+            tx_outs=[tx.DecredTxOut(b'\xff' * 8, self.tx_out.version, b''),
+                     self.tx_out])
+        copy_tx = copy_tx.copy(tx_witnesses=[blank, signing])
+        self.assertEqual(
+            t.sighash_single(1, script), expected(copy_tx, 0x03))
+
+        with self.assertRaises(NotImplementedError):
+            t.copy(tx_outs=[self.tx_out]).sighash_single(1, script)
+
+    def test_sighash_single_bytes_outpoint(self):
+        outpoint = self.outpoint.to_bytes()
+        tx_ins = [tx.DecredTxIn(outpoint, self.sequence),
+                  tx.DecredTxIn(outpoint[:32] + b'\x07' + b'\x00' * 4,
+                                b'\xfe\xff\xff\xff')]
+        t = tx.DecredTx(
+            version=self.version,
+            tx_ins=tx_ins,
+            tx_outs=[self.tx_out] * 2,
+            lock_time=self.lock_time,
+            expiry=self.expiry,
+            tx_witnesses=[self.witness] * 2)
+        script = b'\x51'
+        blank = self.witness.copy(stack_script=b'', redeem_script=b'')
+        signing = self.witness.copy(stack_script=script, redeem_script=b'')
+
+        copy_tx = t.copy(
+            tx_ins=[tx_ins[0].copy(sequence=b'\x00' * 4), tx_ins[1]],
+            tx_outs=[tx.DecredTxOut(b'\xff' * 8, self.tx_out.version, b''),
+                     self.tx_out],
+            tx_witnesses=[blank, signing])
+        self.assertEqual(
+            t.sighash_single(1, script),
+            utils.blake256(
+                utils.i2le_padded(0x03, 4)
+                + copy_tx.prefix_hash()
+                + copy_tx.witness_signing_hash()))
+
     def test_copy(self):
         res = tx.DecredTx(
             version=self.version,
@@ -519,6 +582,39 @@ class TestDecredTx(DecredTestCase):
         self.assertEqual(res, copy)
         self.assertIsNot(res, copy)
 
+    def test_copy_keeps_tx_id(self):
+        res = tx.DecredTx(
+            version=self.version,
+            tx_ins=[self.tx_in],
+            tx_outs=[self.tx_out],
+            lock_time=self.lock_time,
+            expiry=self.expiry,
+            tx_witnesses=[self.witness])
+        res.tx_id_le
+
+        copy = res.copy(
+            tx_witnesses=[self.witness.copy(stack_script=b'\x00')])
+        self.assertIn('tx_id_le', copy.__dict__)
+        self.assertEqual(copy.tx_id_le, utils.blake256(copy.prefix()))
+
+        copy = res.copy(lock_time=b'\x01' * 4)
+        self.assertNotIn('tx_id_le', copy.__dict__)
+
+    def test_with_signatures(self):
+        res = tx.DecredTx(
+            version=self.version,
+            tx_ins=[self.tx_in],
+            tx_outs=[self.tx_out],
+            lock_time=self.lock_time,
+            expiry=self.expiry,
+            tx_witnesses=[self.witness.copy(stack_script=b'',
+                                            redeem_script=b'')])
+        res.tx_id_le
+        signed = res.with_signatures(
+            {0: (self.stack_script, self.redeem_script)})
+        self.assertEqual(signed.tx_witnesses[0], self.witness)
+        self.assertIn('tx_id_le', signed.__dict__)
+
     def test_txhash(self):
         '''
         https://github.com/decred/dcrd/blob/master/wire/msgtx_test.go#L139-L140
@@ -618,6 +714,38 @@ class TestDecredTx(DecredTestCase):
 
 class TestDecredTxBuilder(DecredTestCase):
 
+    def test_tx_builder(self):
+        ser = helpers.DCR['ser']
+        tx_in = tx.DecredTxIn(
+            tx.DecredOutpoint(ser['ins'][0]['hash'], ser['ins'][0]['index'],
+                              ser['ins'][0]['tree']),
+            ser['ins'][0]['sequence'])
+        tx_out = tx.DecredTxOut(ser['outs'][0]['value'],
+                                ser['outs'][0]['version'],
+                                ser['outs'][0]['pk_script'])
+        witness = tx.DecredInputWitness(
+            value=ser['witnesses'][0]['value'],
+            height=ser['witnesses'][0]['height'],
+            index=ser['witnesses'][0]['index'],
+            stack_script=ser['witnesses'][0]['stack_script'],
+            redeem_script=ser['witnesses'][0]['redeem_script'])
+        builder = tb.TxBuilder(
+            version=utils.le2i(ser['version']),
+            lock_time=utils.le2i(ser['locktime']),
+            expiry=utils.le2i(ser['expiry']))
+        builder.add_input(tx_in)
+        builder.add_output(tx_out)
+        with self.assertRaises(ValueError) as context:
+            builder.build()
+        self.assertIn('Expected a witness for each', str(context.exception))
+
+        builder.remove_input()
+        builder.add_input(tx_in, witness)
+        res = builder.build()
+        self.assertEqual(builder.size, len(res))
+        self.assertEqual(builder.weight, len(res) * 4)
+        self.assertEqual(builder.fee, res.calculate_fee())
+
     def test_make_decred_output(self):
         riemann.select_network('decred_main')
         self.assertEqual(
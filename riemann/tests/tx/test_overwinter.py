@@ -117,3 +117,9 @@ class OverwinterSighash(unittest.TestCase):
                 script_code=helpers.SCRIPT_CODE,
                 prevout_value=helpers.PREVOUT_VALUE),
             helpers.SIGHASH)
+
+    def test_sighashes(self):
+        spec = (1, helpers.SCRIPT_CODE, helpers.PREVOUT_VALUE,
+                tx.SIGHASH_SINGLE)
+        self.assertEqual(
+            self.tx.sighashes([spec, spec]), [helpers.SIGHASH] * 2)
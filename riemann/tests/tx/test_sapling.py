@@ -1,6 +1,7 @@
 import unittest
 import riemann
 from riemann import utils
+from riemann.tx import shared
 from riemann.tx import sapling
 from riemann.tests.tx.helpers import sapling_helpers
 
@@ -216,6 +217,56 @@ class TestSaplingTx(SaplingTestCase):
                     pair[0].spend_auth_sig.hex(),
                     pair[1]['spend_auth_sig'])
 
+    def test_copy(self):
+        for txn in sapling_helpers.TXNS:
+            test_tx = sapling.SaplingTx.from_hex(txn['hex'])
+            self.assertEqual(test_tx.copy(), test_tx)
+            self.assertIsNot(test_tx.copy(), test_tx)
+
+    def test_with_signatures(self):
+        for txn in sapling_helpers.TXNS:
+            test_tx = sapling.SaplingTx.from_hex(txn['hex'])
+            if len(test_tx.tx_ins) == 0:
+                continue
+            tx_in = test_tx.tx_ins[0]
+            res = test_tx.with_signatures({0: (b'\x00', b'')})
+            self.assertEqual(res.tx_ins[0].stack_script, b'\x00')
+            self.assertEqual(res.tx_ins[0].outpoint, tx_in.outpoint)
+            self.assertEqual(res.tx_ins[1:], test_tx.tx_ins[1:])
+
+            with self.assertRaises(ValueError) as context:
+                test_tx.with_signatures({0: [b'\x00']})
+            self.assertIn('does not support witnesses',
+                          str(context.exception))
+
+    def test_copy_carries_hashes(self):
+        for txn in sapling_helpers.SIGHASH:
+            if txn['joinsplit'] or txn['anyone_can_pay']:
+                continue
+            test_tx = sapling.SaplingTx.from_hex(txn['hex'])
+            if len(test_tx.tx_ins) == 0:
+                continue
+            spec = (txn['index'],
+                    bytes.fromhex(txn['script_code']),
+                    bytes.fromhex(txn['amount']),
+                    txn['sighash_type'])
+            test_tx.sighashes([spec])
+
+            tx_ins = list(test_tx.tx_ins)
+            tx_ins[0] = tx_ins[0].copy(stack_script=b'\x00')
+            copy = test_tx.copy(tx_ins=tx_ins)
+            self.assertIn('_hash_prevouts_all', copy.__dict__)
+            self.assertIn('_hash_outputs_all', copy.__dict__)
+            self.assertNotIn('tx_id_le', copy.__dict__)
+            uncached = sapling.SaplingTx.from_hex(txn['hex'])
+            self.assertEqual(
+                copy.sighashes([spec]),
+                uncached.copy(tx_ins=tx_ins).sighashes([spec]))
+
+            tx_ins[0] = tx_ins[0].copy(sequence=b'\x00' * 4)
+            copy = test_tx.copy(tx_ins=tx_ins)
+            self.assertNotIn('_hash_sequence_all', copy.__dict__)
+
     def test_init_network_error(self):
         riemann.select_network('zcash_sprout_main')
         with self.assertRaises(ValueError) as context:
@@ -297,3 +348,20 @@ class TestSaplingTx(SaplingTestCase):
                     anyone_can_pay=txn['anyone_can_pay'],
                     prevout_value=bytes.fromhex(txn['amount'])).hex(),
                 txn['sighash'])
+
+    def test_sighashes(self):
+        for txn in sapling_helpers.SIGHASH:
+            if txn['joinsplit']:
+                continue
+            test_tx = sapling.SaplingTx.from_hex(txn['hex'])
+            sighash_type = txn['sighash_type']
+            if txn['anyone_can_pay']:
+                sighash_type |= shared.SIGHASH_ANYONECANPAY
+            spec = (txn['index'],
+                    bytes.fromhex(txn['script_code']),
+                    bytes.fromhex(txn['amount']),
+                    sighash_type)
+            self.assertEqual(
+                test_tx.sighashes([spec, spec]),
+                [bytes.fromhex(txn['sighash'])] * 2)
+            self.assertIn('_hash_shielded_spends_all', test_tx.__dict__)
@@ -69,6 +69,25 @@ class TestByteData(unittest.TestCase):
             str(context.exception))
 
 
+class TestCachedProperty(unittest.TestCase):
+
+    def test_computes_once(self):
+        calls = []
+
+        class Cached(tx.ByteData):
+            @tx.cached_property
+            def value(self):
+                calls.append(1)
+                return len(calls)
+
+        c = Cached()
+        c._make_immutable()
+        self.assertEqual(c.value, 1)
+        self.assertEqual(c.value, 1)
+        self.assertEqual(len(calls), 1)
+        self.assertIsInstance(Cached.value, tx.cached_property)
+
+
 class TestVarInt(unittest.TestCase):
 
     def setUp(self):
@@ -147,6 +166,22 @@ class TestVarInt(unittest.TestCase):
             'Malformed VarInt. Got: fe',
             str(context.exception))
 
+    def test_read_number(self):
+        view = memoryview(b'\xaa\xfc\xfd\x00\x01\xfe\x01\x00\x00\x01')
+        self.assertEqual(tx.VarInt._read_number(view, 1), (0xfc, 2))
+        self.assertEqual(tx.VarInt._read_number(view, 2), (0x100, 5))
+        self.assertEqual(tx.VarInt._read_number(view, 5), (0x1000001, 10))
+
+        with self.assertRaises(IndexError):
+            tx.VarInt._read_number(view[:8], 5)
+        with self.assertRaises(IndexError):
+            tx.VarInt._read_number(view, 10)
+
+    def test_encode(self):
+        for number in [0, 0xfc, 0xfd, 0xffff, 0x10000, 0xffffffff,
+                       0x100000000, 0xffffffffffffffff]:
+            self.assertEqual(tx.VarInt._encode(number), tx.VarInt(number))
+
     def test_zcash_compact_enforcement(self):
         riemann.select_network('zcash_overwinter_main')
 
@@ -1,6 +1,7 @@
 import riemann
 import unittest
 from riemann import tx
+from riemann import utils
 from riemann.tests.helpers import P2SH
 from riemann.tests.tx.helpers import overwinter_helpers as helpers
 
@@ -216,6 +217,32 @@ class TestSproutTx(SproutTestCase):
         t = tx.SproutTx(**self.tx)
         print('SproutTx Test Sighash:', t.sighash_all())
 
+    def test_sighash_no_script(self):
+        t = tx.SproutTx(
+            version=utils.i2le_padded(1, 4),
+            tx_ins=[tx.TxIn.from_bytes(P2SH['ser']['ins'][0]['input'])],
+            tx_outs=[self.tx_out],
+            lock_time=self.tx['lock_time'],
+            tx_joinsplits=[],
+            joinsplit_pubkey=None,
+            joinsplit_sig=None)
+
+        self.assertEqual(t.sighash_all(0), t.sighash_all(0, b''))
+        self.assertEqual(t.sighash_single(0), t.sighash_single(0, b''))
+        self.assertEqual(
+            t.sighash_single(0, None, anyone_can_pay=True),
+            t.sighash_single(0, b'', anyone_can_pay=True))
+
+        for sighash in [t.sighash_all, t.sighash_single]:
+            with self.assertRaises(ValueError) as context:
+                sighash(0, 'not bytes')
+            self.assertIn('Expected byte-like object',
+                          str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            tx.SproutTx(**self.tx).sighash_single(0)
+        self.assertIn('not permitted with joinsplits', str(context.exception))
+
     def test_calculate_fee(self):
         t = tx.SproutTx(**self.tx)
         self.assertEqual(
@@ -1,8 +1,13 @@
+import io
+import pickle
 import riemann
 import unittest
+from unittest import mock
 from riemann import tx
 from riemann import utils
 from riemann.tests import helpers
+from riemann.tests.tx.helpers import taproot_helpers
+from riemann.tx.tx import _spent_output_digests
 
 
 class TestOutpoint(unittest.TestCase):
@@ -153,6 +158,32 @@ class TestTxIn(unittest.TestCase):
             tx_in.redeem_script,
             helpers.P2SH['ser']['ins'][0]['redeem_script'])
 
+    def test_from_bytes_script_sig_too_long(self):
+        raw = (b'\x11' * 36 + tx.VarInt(1700).to_bytes() + b'\x00' * 1700
+               + b'\xff' * 4)
+        with self.assertRaises(ValueError) as context:
+            tx.TxIn.from_bytes(raw)
+        self.assertIn(
+            'Input script_sig is too long. Expected <= 1650 bytes.',
+            str(context.exception))
+
+    def test_from_bytes_non_minimal_push(self):
+        # An OP_PUSHDATA1 push of a redeem script is kept as it was
+        redeem = bytes([0x51, 0x87])  # OP_1 OP_EQUAL
+        script_sig = b'\x00' + b'\x4c\x02' + redeem
+        raw = (b'\x11' * 36 + bytes([len(script_sig)]) + script_sig
+               + b'\xff' * 4)
+        tx_in = tx.TxIn.from_bytes(raw)
+        self.assertEqual(tx_in, raw)
+        self.assertEqual(tx_in.stack_script, b'\x00')
+        self.assertEqual(tx_in.redeem_script, b'\x4c\x02' + redeem)
+
+        # A push that isn't a script is part of the stack script
+        raw = raw[:37] + b'\x00\x4c\x02\x4c\x05' + raw[-4:]
+        tx_in = tx.TxIn.from_bytes(raw)
+        self.assertEqual(tx_in.stack_script, b'\x00\x4c\x02\x4c\x05')
+        self.assertEqual(tx_in.redeem_script, b'')
+
     def test_from_bytes_wsh(self):
         tx_in = tx.TxIn.from_bytes(helpers.P2WSH['ser']['ins'][0]['input'])
         self.assertEqual(tx_in, helpers.P2WSH['ser']['ins'][0]['input'])
@@ -165,6 +196,44 @@ class TestTxIn(unittest.TestCase):
         self.assertEqual(tx_in.stack_script, b'')
         self.assertEqual(tx_in.redeem_script, b'')
 
+    def test_compact(self):
+        tx_in = tx.TxIn.from_bytes(helpers.P2SH['ser']['ins'][0]['input'])
+        self.assertFalse(hasattr(tx_in, '__dict__'))
+        self.assertEqual(
+            tx_in.script_sig,
+            tx_in.stack_script + tx_in.redeem_script)
+        self.assertEqual(tx_in.script_len, len(tx_in.script_sig))
+        self.assertTrue(tx_in.is_p2sh())
+
+        with self.assertRaises(TypeError):
+            tx_in.sequence = b'\x00' * 4
+        with self.assertRaises(TypeError):
+            tx_in._redeem_start = 0
+
+    def test_deferred_split(self):
+        raw = helpers.P2SH['ser']['ins'][0]['input']
+        tx_in = tx.TxIn.from_bytes(raw)
+        self.assertIsNone(tx_in._redeem_start)
+        self.assertEqual(tx_in, raw)
+        self.assertEqual(
+            tx_in.redeem_script,
+            helpers.P2SH['ser']['ins'][0]['redeem_script'])
+        self.assertIsNotNone(tx_in._redeem_start)
+
+        tx_in = pickle.loads(pickle.dumps(tx.TxIn.from_bytes(raw)))
+        self.assertEqual(
+            tx_in.stack_script,
+            helpers.P2SH['ser']['ins'][0]['stack_script'])
+
+        # The split uses the opcodes of the network the input was parsed in
+        redeem = b'\xc0\x51\x87'  # OP_SHA256 OP_1 OP_EQUAL in Decred
+        raw = b'\x11' * 36 + b'\x05\x00\x03' + redeem + b'\xff' * 4
+        riemann.select_network('decred_main')
+        tx_in = tx.TxIn.from_bytes(raw)
+        riemann.select_network('bitcoin_main')
+        self.assertEqual(tx_in.redeem_script, b'\x03' + redeem)
+        self.assertEqual(tx.TxIn.from_bytes(raw).redeem_script, b'')
+
 
 class TestTxOut(unittest.TestCase):
 
@@ -194,6 +263,14 @@ class TestTxOut(unittest.TestCase):
             tx_out.output_script,
             helpers.P2PKH1['ser']['outs'][0]['pk_script'])
 
+    def test_compact(self):
+        tx_out = tx.TxOut(self.value, self.output_script)
+        self.assertFalse(hasattr(tx_out, '__dict__'))
+        self.assertEqual(tx_out.value, self.value)
+        self.assertEqual(tx_out.output_script_len, len(self.output_script))
+        with self.assertRaises(TypeError):
+            tx_out.value = self.value
+
     def test_from_bytes_long(self):
         with self.assertRaises(NotImplementedError) as context:
             tx.TxOut.from_bytes(b'\xff' * 10)
@@ -232,6 +309,13 @@ class TestWitnessStackItem(unittest.TestCase):
             'Item is too large. Expected <=520 bytes. ',
             str(context.exception))
 
+        raw = tx.VarInt(600).to_bytes() + b'\xff' * 600
+        with self.assertRaises(ValueError) as context:
+            tx.WitnessStackItem.from_bytes(raw)
+        self.assertIn(
+            'Item is too large. Expected <=520 bytes. ',
+            str(context.exception))
+
     def test_null_item_from_bytes(self):
         w = tx.WitnessStackItem.from_bytes(b'\x00')
         self.assertEqual(w, b'\x00')
@@ -455,6 +539,23 @@ class TestTx(unittest.TestCase):
         self.assertEqual(t.tx_id, helpers.P2PKH1['ser']['tx']['hash'])
         self.assertEqual(t.tx_id_le, helpers.P2PKH1['ser']['tx']['hash_le'])
 
+    def test_tx_id_deferred(self):
+        t = tx.Tx.from_hex(helpers.P2WSH['human']['tx']['signed'])
+        self.assertNotIn('tx_id_le', t.__dict__)
+        self.assertNotIn('wtx_id_le', t.__dict__)
+
+        self.assertEqual(t.tx_id_le, utils.hash256(t.no_witness()))
+        self.assertEqual(t.wtx_id_le, utils.hash256(t.to_bytes()))
+        self.assertIs(t.tx_id_le, t.tx_id_le)
+        self.assertEqual(
+            t.no_witness(),
+            tx.Tx(t.version, None, t.tx_ins, t.tx_outs, None,
+                  t.lock_time).to_bytes())
+
+        t = tx.Tx.from_hex(helpers.P2PKH1['human']['tx']['signed'])
+        self.assertIsNone(t.wtx_id)
+        self.assertEqual(t.no_witness(), t.to_bytes())
+
     def test_from_hex_pkh(self):
         t = tx.Tx.from_hex(helpers.P2PKH1['human']['tx']['signed'])
         self.assertEqual(t.version, helpers.P2PKH1['ser']['version'])
@@ -547,6 +648,123 @@ class TestTx(unittest.TestCase):
         self.assertEqual(t.lock_time, helpers.P2WSH['ser']['locktime'])
         self.assertEqual(t, helpers.P2WSH['ser']['tx']['signed'])
 
+    def test_from_bytes_many_inputs(self):
+        t = tx.Tx(self.version, self.none_flag, self.tx_ins * 500,
+                  self.tx_outs, self.none_witnesses, self.lock_time)
+
+        res = tx.Tx.from_bytes(t.to_bytes())
+        self.assertEqual(res, t)
+        self.assertEqual(len(res.tx_ins), 500)
+        self.assertEqual(res.tx_ins[-1], self.tx_in)
+
+    def test_from_bytes_memoryview(self):
+        raw = helpers.P2WSH['ser']['tx']['signed']
+        t = tx.Tx.from_bytes(memoryview(bytearray(raw)))
+        self.assertEqual(t, raw)
+        self.assertIsInstance(t.version, bytes)
+        self.assertIsInstance(t.tx_ins[0].stack_script, bytes)
+        self.assertIsInstance(t.tx_witnesses[0].stack[0].item, bytes)
+
+    def test_from_bytes_truncated(self):
+        raw = helpers.P2WSH['ser']['tx']['signed']
+        for end in [len(raw) - 1, len(raw) - 4, 100, 50]:
+            with self.assertRaises((ValueError, IndexError)):
+                tx.Tx.from_bytes(raw[:end])
+
+        with self.assertRaises(ValueError) as context:
+            tx.Tx.from_bytes(raw[:-1])
+        self.assertIn('extends past the end', str(context.exception))
+
+    def test_from_trusted_parts(self):
+        t = tx.Tx.from_bytes(helpers.P2WSH['ser']['tx']['signed'])
+        trusted = tx.Tx._from_trusted_parts(
+            t.version, t.flag, t.tx_ins, t.tx_outs,
+            t.tx_witnesses, t.lock_time)
+        self.assertEqual(trusted, t)
+        self.assertEqual(trusted.tx_ins, t.tx_ins)
+        with self.assertRaises(TypeError):
+            trusted.version = b'\x00' * 4
+
+        tx_in = tx.TxIn._from_trusted_parts(
+            self.outpoint, self.stack_script,
+            self.redeem_script, self.sequence)
+        self.assertEqual(tx_in, self.tx_in)
+        self.assertEqual(tx_in.redeem_script, self.redeem_script)
+
+    def test_sighash_bad_script(self):
+        t = tx.Tx(self.version, self.none_flag, self.tx_ins, self.tx_outs,
+                  self.none_witnesses, self.lock_time)
+        with self.assertRaises(ValueError) as context:
+            t.sighash_all(0, script='OP_TRUE')
+        self.assertIn('Expected byte-like object', str(context.exception))
+
+    def test_pickle(self):
+        t = tx.Tx.from_bytes(helpers.P2WSH['ser']['tx']['signed'])
+        t.tx_id
+        res = pickle.loads(pickle.dumps(t))
+        self.assertEqual(res, t)
+        self.assertEqual(res.tx_id, t.tx_id)
+        self.assertEqual(
+            res.tx_ins[0].redeem_script, t.tx_ins[0].redeem_script)
+        self.assertEqual(res.tx_witnesses, t.tx_witnesses)
+        with self.assertRaises(TypeError):
+            res.version = b'\x00' * 4
+
+        # Cached midstates don't pickle. They are recomputed
+        script = helpers.P2PKH1['ser']['ins'][0]['pk_script']
+        t = tx.Tx(self.version, None, self.tx_ins, self.tx_outs,
+                  None, self.lock_time)
+        sighash = t.sighash_all(0, script)
+        res = pickle.loads(pickle.dumps(t))
+        self.assertNotIn('_legacy_prefix', res.__dict__)
+        self.assertEqual(res.sighash_all(0, script), sighash)
+        with self.assertRaises(TypeError):
+            res.tx_ins[0]._redeem_start = 0
+
+    def test_parse_at_offset(self):
+        raw = helpers.P2PKH1['ser']['tx']['signed']
+        view = memoryview(b'\xff' * 7 + raw + b'\xff' * 7)
+        t, offset = tx.Tx._parse(view, 7)
+        self.assertEqual(t, raw)
+        self.assertEqual(offset, 7 + len(raw))
+
+    def test_read_from(self):
+        raws = [helpers.P2PKH1['ser']['tx']['signed'],
+                helpers.P2WSH['ser']['tx']['signed'],
+                helpers.P2SH['ser']['tx']['signed']]
+        buf = b''.join(raws)
+
+        offset = 0
+        for raw in raws:
+            t, offset = tx.Tx.read_from(buf, offset)
+            self.assertEqual(t, raw)
+        self.assertEqual(offset, len(buf))
+
+    def test_iter_from_stream(self):
+        raws = [helpers.P2PKH1['ser']['tx']['signed'],
+                helpers.P2WSH['ser']['tx']['signed'],
+                helpers.P2SH['ser']['tx']['signed']] * 3
+        stream = io.BytesIO(b''.join(raws))
+
+        res = list(tx.iter_from_stream(stream, chunk_size=7))
+        self.assertEqual(len(res), len(raws))
+        for t, raw in zip(res, raws):
+            self.assertEqual(t, raw)
+
+        stream = io.BytesIO(b''.join(raws))
+        res = list(tx.iter_from_stream(stream))
+        self.assertEqual(len(res), len(raws))
+
+    def test_iter_from_stream_truncated(self):
+        raw = helpers.P2WSH['ser']['tx']['signed']
+        stream = io.BytesIO(raw + raw[:-3])
+
+        res = tx.iter_from_stream(stream, chunk_size=16)
+        self.assertEqual(next(res), raw)
+        with self.assertRaises(ValueError) as context:
+            next(res)
+        self.assertIn('Stream ended inside a Tx.', str(context.exception))
+
     def test_calculate_fee(self):
         t = tx.Tx(self.version, self.none_flag, self.tx_ins, self.tx_outs,
                   self.none_witnesses, self.lock_time)
@@ -571,6 +789,131 @@ class TestTx(unittest.TestCase):
         self.assertEqual(t, t_copy)
         self.assertIsNot(t, t_copy)
 
+    def test_copy_reuses_sections(self):
+        t = tx.Tx(self.version, self.segwit_flag, self.tx_ins * 3,
+                  self.tx_outs, self.tx_witnesses * 3, self.lock_time)
+        script = helpers.P2WSH['ser']['ins'][0]['pk_script']
+        sighash_all = tx.shared.SIGHASH_ALL
+        sighash = t.segwit_sighash(0, script, self.value_0, sighash_all)
+        t.tx_id_le
+
+        # Replacing only witnesses keeps the tx_id and the sighash caches
+        witness = tx.InputWitness(self.stack[:1])
+        t_copy = t.copy(tx_witnesses=[self.tx_witnesses[0], witness,
+                                      self.tx_witnesses[0]])
+        self.assertIn('tx_id_le', t_copy.__dict__)
+        self.assertIn('_hash_outputs_all', t_copy.__dict__)
+        self.assertEqual(t_copy.tx_witnesses[1], witness)
+        expected = tx.Tx.from_bytes(t_copy.to_bytes())
+        self.assertEqual(t_copy, expected)
+        self.assertEqual(t_copy.tx_id, expected.tx_id)
+        self.assertEqual(t_copy.wtx_id, expected.wtx_id)
+        self.assertEqual(
+            t_copy.segwit_sighash(0, script, self.value_0, sighash_all),
+            sighash)
+
+        # New scripts spending the same outpoints keep the prevout hashes
+        tx_in = self.tx_in.copy(stack_script=b'\x00')
+        t_copy = t.copy(tx_ins=[self.tx_in, tx_in, self.tx_in])
+        self.assertIn('_hash_prevouts_all', t_copy.__dict__)
+        self.assertNotIn('tx_id_le', t_copy.__dict__)
+        expected = tx.Tx.from_bytes(t_copy.to_bytes())
+        self.assertEqual(t_copy, expected)
+        self.assertEqual(t_copy.tx_id, expected.tx_id)
+        self.assertEqual(
+            t_copy.segwit_sighash(1, script, self.value_0, sighash_all),
+            expected.segwit_sighash(1, script, self.value_0, sighash_all))
+
+        # A new outpoint doesn't
+        tx_in = self.tx_in.copy(
+            outpoint=tx.Outpoint(b'\x00' * 32, b'\x00' * 4))
+        t_copy = t.copy(tx_ins=[self.tx_in, tx_in, self.tx_in],
+                        version=b'\x02\x00\x00\x00')
+        self.assertNotIn('_hash_prevouts_all', t_copy.__dict__)
+        self.assertIn('_hash_outputs_all', t_copy.__dict__)
+        expected = tx.Tx.from_bytes(t_copy.to_bytes())
+        self.assertEqual(t_copy, expected)
+        self.assertEqual(t_copy.version, b'\x02\x00\x00\x00')
+        self.assertEqual(t_copy.tx_ins[1], tx_in)
+        self.assertEqual(
+            t_copy.segwit_sighash(1, script, self.value_0, sighash_all),
+            expected.segwit_sighash(1, script, self.value_0, sighash_all))
+
+        # Changing the number of outputs
+        t_copy = t.copy(tx_outs=self.tx_outs[:1], lock_time=b'\x01' * 4)
+        self.assertEqual(t_copy, tx.Tx.from_bytes(t_copy.to_bytes()))
+        self.assertEqual(len(t_copy.tx_outs), 1)
+
+    def test_with_signatures(self):
+        signed = tx.Tx.from_bytes(helpers.P2PKH1['ser']['tx']['signed'])
+        tx_in = signed.tx_ins[0]
+        unsigned = signed.copy(
+            tx_ins=[tx_in.copy(stack_script=b'', redeem_script=b'')] * 2)
+        res = unsigned.with_signatures({
+            0: (tx_in.stack_script, tx_in.redeem_script),
+            1: (tx_in.stack_script, tx_in.redeem_script)})
+        self.assertEqual(res.tx_ins, (tx_in, tx_in))
+        self.assertIsNone(res.flag)
+        self.assertEqual(res, tx.Tx.from_bytes(res.to_bytes()))
+
+        signed = tx.Tx.from_bytes(helpers.P2WSH['ser']['tx']['signed'])
+        items = helpers.P2WSH['ser']['witnesses'][0]['wit_stack_items']
+        unsigned = signed.copy(tx_witnesses=[tx.InputWitness([])])
+        unsigned.tx_id_le
+        res = unsigned.with_signatures({0: items})
+        self.assertEqual(res, signed)
+        self.assertIn('tx_id_le', res.__dict__)
+        self.assertEqual(
+            unsigned.with_signatures({0: signed.tx_witnesses[0]}), signed)
+
+        # Adding a witness to a legacy tx fills in empty ones
+        legacy = tx.Tx(self.version, None, self.tx_ins * 2, self.tx_outs,
+                       None, self.lock_time)
+        res = legacy.with_signatures({1: items, 0: (b'\x00', b'')})
+        self.assertEqual(res.flag, riemann.network.SEGWIT_TX_FLAG)
+        self.assertEqual(res.tx_witnesses[0], tx.InputWitness([]))
+        self.assertEqual(res.tx_witnesses[1], signed.tx_witnesses[0])
+        self.assertEqual(res.tx_ins[0].stack_script, b'\x00')
+        self.assertEqual(res, tx.Tx.from_bytes(res.to_bytes()))
+
+        with self.assertRaises(IndexError):
+            legacy.with_signatures({2: items})
+
+        # A scriptSig tuple can't replace a witness
+        with self.assertRaises(ValueError) as context:
+            signed.with_signatures({0: (b'\x00', b'')})
+        self.assertIn('Input 0 has a witness', str(context.exception))
+        self.assertEqual(
+            unsigned.with_signatures({0: (b'\x00', b'')}).tx_witnesses,
+            unsigned.tx_witnesses)
+
+    def test_copy_errors(self):
+        t = tx.Tx(self.version, self.segwit_flag, self.tx_ins,
+                  self.tx_outs, self.tx_witnesses, self.lock_time)
+        with self.assertRaises(ValueError) as context:
+            t.copy(tx_ins=[self.tx_in, self.tx_out_0])
+        self.assertIn('Expected instance of TxIn', str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            t.copy(tx_outs=[self.tx_in])
+        self.assertIn('Expected instance of TxOut', str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            t.copy(tx_witnesses=[self.tx_in])
+        self.assertIn('Expected instance of InputWitness',
+                      str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            t.copy(tx_ins=self.tx_ins * 2)
+        self.assertIn('same length', str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            t.copy(tx_outs=[])
+        self.assertIn('Too few inputs or outputs', str(context.exception))
+
+        with self.assertRaises(ValueError):
+            t.copy(version=b'\x01')
+
     def test_is_witness(self):
         t = tx.Tx(self.version, self.none_flag, self.tx_ins, self.tx_outs,
                   self.none_witnesses, self.lock_time)
@@ -622,6 +965,27 @@ class TestTx(unittest.TestCase):
                 anyone_can_pay=True),
             helpers.P2WPKH['ser']['segwit_sighash']['single_anyonecanpay'])
 
+    def test_segwit_sighash_cache(self):
+        t = tx.Tx.from_bytes(helpers.P2WPKH['ser']['tx']['signed'])
+        script = helpers.P2WPKH['ser']['ins'][0]['pk_script']
+        value = helpers.P2WPKH['ser']['ins'][0]['value']
+
+        self.assertNotIn('_hash_prevouts_all', t.__dict__)
+        t.sighash_all(0, script, prevout_value=value)
+        self.assertEqual(
+            t.__dict__['_hash_prevouts_all'],
+            utils.hash256(b''.join(i.outpoint.to_bytes() for i in t.tx_ins)))
+        self.assertIn('_hash_sequence_all', t.__dict__)
+        self.assertIn('_hash_outputs_all', t.__dict__)
+
+        # Later inputs and sighash types reuse the cached hashes
+        self.assertEqual(
+            t.sighash_all(0, script, prevout_value=value),
+            helpers.P2WPKH['ser']['segwit_sighash']['all'])
+        self.assertEqual(
+            t.sighash_single(0, script, prevout_value=value),
+            helpers.P2WPKH['ser']['segwit_sighash']['single'])
+
     def test_presegwit_sighashes(self):
         ''' all, all anyonecanpay, single, single_anyonecanpay.
         Marks transaction as pre- or non-segwit in a segwit network.
@@ -656,6 +1020,76 @@ class TestTx(unittest.TestCase):
                 anyone_can_pay=True),
             helpers.P2PKH1['ser']['sighash']['single_anyonecanpay'])
 
+    def test_presegwit_sighash_single_outputs(self):
+        # SIGHASH_SINGLE keeps index + 1 outputs, whatever the input count
+        t = tx.Tx(self.version, None, self.tx_ins * 3, self.tx_outs,
+                  self.none_witnesses, self.lock_time)
+        script = helpers.P2PKH1['ser']['ins'][0]['pk_script']
+
+        blank = tx.TxIn(self.outpoint, b'', b'', b'\x00' * 4)
+        expected = tx.Tx(
+            self.version, None,
+            [blank, tx.TxIn(self.outpoint, b'', script, self.sequence),
+             blank],
+            [tx.TxOut(b'\xff' * 8, b''), self.tx_out_1],
+            None, self.lock_time)
+        self.assertEqual(
+            t.sighash_single(1, script),
+            utils.hash256(expected.to_bytes() + b'\x03\x00\x00\x00'))
+
+        expected = expected.copy(tx_ins=[expected.tx_ins[1]])
+        self.assertEqual(
+            t.sighash_single(1, script, anyone_can_pay=True),
+            utils.hash256(expected.to_bytes() + b'\x83\x00\x00\x00'))
+
+    def test_sighashes(self):
+        ALL = tx.shared.SIGHASH_ALL
+        SINGLE = tx.shared.SIGHASH_SINGLE
+        ACP = tx.shared.SIGHASH_ANYONECANPAY
+
+        t = tx.Tx.from_bytes(helpers.P2WPKH['ser']['tx']['signed'])
+        script = helpers.P2WPKH['ser']['ins'][0]['pk_script']
+        value = helpers.P2WPKH['ser']['ins'][0]['value']
+        self.assertEqual(
+            t.sighashes([(0, script, value, ALL),
+                         (0, script, value, ALL | ACP),
+                         (0, script, value, SINGLE),
+                         (0, script, value, SINGLE | ACP)]),
+            [helpers.P2WPKH['ser']['segwit_sighash']['all'],
+             helpers.P2WPKH['ser']['segwit_sighash']['all_anyonecanpay'],
+             helpers.P2WPKH['ser']['segwit_sighash']['single'],
+             helpers.P2WPKH['ser']['segwit_sighash']['single_anyonecanpay']])
+
+        t = tx.Tx(self.version, None, self.tx_ins * 2, self.tx_outs,
+                  None, self.lock_time)
+        script = helpers.P2PKH1['ser']['ins'][0]['pk_script']
+        self.assertEqual(
+            t.sighashes([(1, script, None, ALL),
+                         (0, script, None, SINGLE | ACP)]),
+            [t.sighash_all(1, script),
+             t.sighash_single(0, script, anyone_can_pay=True)])
+
+        riemann.select_network('bitcoin_cash_main')
+        value = helpers.P2PKH1['ser']['ins'][0]['value']
+        self.assertEqual(
+            t.sighashes([(0, script, value, ALL | tx.shared.SIGHASH_FORKID)]),
+            [t.sighash_all(0, script, prevout_value=value)])
+
+    def test_sighashes_errors(self):
+        t = tx.Tx(self.version, None, self.tx_ins * 3, self.tx_outs,
+                  None, self.lock_time)
+        script = helpers.P2PKH1['ser']['ins'][0]['pk_script']
+        with self.assertRaises(NotImplementedError) as context:
+            t.sighashes([(2, script, None, tx.shared.SIGHASH_SINGLE)])
+        self.assertIn('SIGHASH_SINGLE bug', str(context.exception))
+
+        with self.assertRaises(NotImplementedError):
+            t.sighashes([(0, script, None, tx.shared.SIGHASH_NONE)])
+
+        with self.assertRaises(ValueError) as context:
+            t.sighashes([(0, script, None, 0x04)])
+        self.assertIn('Unknown sighash type', str(context.exception))
+
     def test_sighash_single_bug(self):
         with self.assertRaises(NotImplementedError) as context:
             t = tx.Tx(self.version, self.none_flag, self.tx_ins * 3,
@@ -723,3 +1157,278 @@ class TestTx(unittest.TestCase):
         self.assertEqual(
             sighash,
             helpers.SIGHASH_FORKID['all_anyone_can_pay'])
+
+
+class TestTaprootSighash(unittest.TestCase):
+
+    def setUp(self):
+        self.vectors = taproot_helpers.KEY_PATH
+        self.tx = tx.Tx.from_hex(self.vectors['tx'])
+        self.values = [utils.i2le_padded(u['value'], 8)
+                       for u in self.vectors['utxos']]
+        self.scripts = [bytes.fromhex(u['pk_script'])
+                        for u in self.vectors['utxos']]
+
+    def sighash_args(self, vector):
+        sighash_type = vector['hash_type'] & 0x7f
+        return dict(
+            index=vector['index'],
+            prevout_values=self.values,
+            prevout_scripts=self.scripts,
+            sighash_type=sighash_type,
+            anyone_can_pay=vector['hash_type'] & 0x80 == 0x80)
+
+    def test_key_path_vectors(self):
+        for vector in self.vectors['inputs']:
+            if vector['hash_type'] & 0x7f == tx.shared.SIGHASH_NONE:
+                continue  # We refuse SIGHASH_NONE
+            args = self.sighash_args(vector)
+            # The vectors include the epoch byte in the sig_msg
+            sig_msg = b'\x00' + self.tx._taproot_sig_msg(
+                annex=None, leaf_hash=None, codesep_pos=0xffffffff, **args)
+            self.assertEqual(sig_msg.hex(), vector['sig_msg'])
+            self.assertEqual(
+                self.tx.taproot_sighash(**args).hex(), vector['sighash'])
+
+    def test_aggregates(self):
+        self.tx.taproot_sighash(0, self.values, self.scripts)
+        amounts, scriptpubkeys = self.tx._taproot_spent[1]
+        self.assertEqual(amounts.hex(), self.vectors['hash_amounts'])
+        self.assertEqual(
+            scriptpubkeys.hex(), self.vectors['hash_scriptpubkeys'])
+        self.assertEqual(
+            self.tx._sha_prevouts.hex(), self.vectors['hash_prevouts'])
+        self.assertEqual(
+            self.tx._sha_sequences.hex(), self.vectors['hash_sequences'])
+        self.assertEqual(
+            self.tx._sha_outputs.hex(), self.vectors['hash_outputs'])
+
+    def test_in_place_change(self):
+        values = [bytearray(value) for value in self.values]
+        first = self.tx.taproot_sighash(0, values, self.scripts)
+        values[1][0] ^= 1
+        self.assertNotEqual(
+            self.tx.taproot_sighash(0, values, self.scripts), first)
+        self.assertEqual(
+            self.tx.taproot_sighash(0, values, self.scripts),
+            tx.Tx.from_hex(self.vectors['tx']).taproot_sighash(
+                0, values, self.scripts))
+
+    def test_aggregates_hashed_once(self):
+        with mock.patch('riemann.tx.tx._spent_output_digests',
+                        wraps=_spent_output_digests) as digests:
+            for index in range(len(self.tx.tx_ins)):
+                self.tx.taproot_sighash(index, self.values, self.scripts)
+            self.assertEqual(digests.call_count, 1)
+
+            # New sequences are hashed again
+            self.tx.taproot_sighash(0, list(self.values), self.scripts)
+            self.assertEqual(digests.call_count, 2)
+
+    def test_taproot_sighashes(self):
+        specs = []
+        expected = []
+        for vector in self.vectors['inputs']:
+            if vector['hash_type'] & 0x7f == tx.shared.SIGHASH_NONE:
+                continue
+            specs.append((vector['index'], vector['hash_type']))
+            expected.append(bytes.fromhex(vector['sighash']))
+        specs.append((3, tx.shared.SIGHASH_ALL, b'\x50', b'\x11' * 32, 7))
+        expected.append(self.tx.taproot_sighash(
+            3, self.values, self.scripts, tx.shared.SIGHASH_ALL,
+            annex=b'\x50', leaf_hash=b'\x11' * 32, codesep_pos=7))
+        self.assertEqual(
+            self.tx.taproot_sighashes(specs, self.values, self.scripts),
+            expected)
+
+    def test_annex_and_script_path(self):
+        annex = b'\x50\x01\x02'
+        leaf_hash = b'\x11' * 32
+        sig_msg = self.tx._taproot_sig_msg(
+            index=3,
+            prevout_values=self.values,
+            prevout_scripts=self.scripts,
+            sighash_type=tx.shared.SIGHASH_ALL,
+            anyone_can_pay=False,
+            annex=annex,
+            leaf_hash=leaf_hash,
+            codesep_pos=7)
+        expected = b''.join([
+            b'\x01',
+            self.tx.version,
+            self.tx.lock_time,
+            bytes.fromhex(self.vectors['hash_prevouts']),
+            bytes.fromhex(self.vectors['hash_amounts']),
+            bytes.fromhex(self.vectors['hash_scriptpubkeys']),
+            bytes.fromhex(self.vectors['hash_sequences']),
+            bytes.fromhex(self.vectors['hash_outputs']),
+            b'\x03',
+            b'\x03\x00\x00\x00',
+            utils.sha256(b'\x03' + annex),
+            leaf_hash,
+            b'\x00',
+            b'\x07\x00\x00\x00'])
+        self.assertEqual(sig_msg, expected)
+        self.assertEqual(
+            self.tx.taproot_sighash(
+                3, self.values, self.scripts, tx.shared.SIGHASH_ALL,
+                annex=annex, leaf_hash=leaf_hash, codesep_pos=7),
+            utils.tagged_hash(b'TapSighash', b'\x00' + expected))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError) as context:
+            self.tx.taproot_sighash(0, self.values[:-1], self.scripts)
+        self.assertIn('Expected a prevout value and script',
+                      str(context.exception))
+
+        with self.assertRaises(NotImplementedError):
+            self.tx.taproot_sighash(
+                0, self.values, self.scripts, tx.shared.SIGHASH_NONE)
+
+        with self.assertRaises(ValueError) as context:
+            self.tx.taproot_sighash(0, self.values, self.scripts, 0x04)
+        self.assertIn('Unknown sighash type', str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            self.tx.taproot_sighash(
+                0, self.values, self.scripts, anyone_can_pay=True)
+        self.assertIn('ANYONECANPAY', str(context.exception))
+
+        with self.assertRaises(NotImplementedError) as context:
+            self.tx.taproot_sighash(
+                2, self.values, self.scripts, tx.shared.SIGHASH_SINGLE)
+        self.assertIn('SIGHASH_SINGLE bug', str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            self.tx.taproot_sighash(
+                0, self.values, self.scripts, annex=b'\x51')
+        self.assertIn('0x50', str(context.exception))
+
+        with self.assertRaises(ValueError):
+            self.tx.taproot_sighash(
+                0, self.values, self.scripts, leaf_hash=b'\x00' * 31)
+
+        with self.assertRaises(ValueError):
+            self.tx.taproot_sighash(
+                0, [b'\x00' * 7] * 9, self.scripts)
+
+
+class TestTxIdsFromBytes(unittest.TestCase):
+
+    def setUp(self):
+        self.raws = [helpers.P2PKH1['ser']['tx']['signed'],
+                     helpers.P2WSH['ser']['tx']['signed'],
+                     helpers.P2SH['ser']['tx']['signed'],
+                     helpers.P2WPKH['ser']['tx']['signed']]
+        self.txs = [tx.Tx.from_bytes(raw) for raw in self.raws]
+
+    def test_txid_from_bytes(self):
+        for raw, t in zip(self.raws, self.txs):
+            self.assertEqual(tx.txid_from_bytes(raw), t.tx_id)
+            self.assertEqual(tx.txid_from_bytes(memoryview(raw)), t.tx_id)
+            self.assertEqual(tx.wtxid_from_bytes(raw), t.wtx_id)
+        self.assertIsNone(tx.wtxid_from_bytes(self.raws[0]))
+        self.assertIsNotNone(tx.wtxid_from_bytes(self.raws[1]))
+
+    def test_bulk(self):
+        self.assertEqual(
+            tx.txids_from_bytes(iter(self.raws)),
+            [t.tx_id for t in self.txs])
+        self.assertEqual(
+            tx.wtxids_from_bytes(self.raws),
+            [t.wtx_id for t in self.txs])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError) as context:
+            tx.txid_from_bytes(self.raws[1] + b'\x00')
+        self.assertIn('1 trailing bytes', str(context.exception))
+
+        with self.assertRaises(ValueError):
+            tx.txid_from_bytes(self.raws[1][:-5])
+
+        with self.assertRaises(ValueError):
+            tx.wtxid_from_bytes(self.raws[0][:10])
+
+
+class TestLazyTx(unittest.TestCase):
+
+    def tearDown(self):
+        riemann.select_network('bitcoin_main')
+
+    def test_from_bytes(self):
+        for raw in [helpers.P2PKH1['ser']['tx']['signed'],
+                    helpers.P2SH['ser']['tx']['signed'],
+                    helpers.P2WSH['ser']['tx']['signed']]:
+            t = tx.Tx.from_bytes(raw)
+            lazy = tx.LazyTx.from_bytes(raw)
+
+            self.assertIsInstance(lazy, tx.Tx)
+            self.assertEqual(lazy, raw)
+            self.assertEqual(lazy.version, t.version)
+            self.assertEqual(lazy.flag, t.flag)
+            self.assertEqual(lazy.lock_time, t.lock_time)
+            self.assertEqual(lazy.tx_ins, t.tx_ins)
+            self.assertEqual(lazy.tx_outs, t.tx_outs)
+            self.assertEqual(lazy.tx_witnesses, t.tx_witnesses)
+            self.assertEqual(lazy.no_witness(), t.no_witness())
+            self.assertEqual(lazy.tx_id, t.tx_id)
+            self.assertEqual(lazy.tx_id_le, t.tx_id_le)
+            self.assertEqual(lazy.wtx_id, t.wtx_id)
+            self.assertEqual(lazy.is_witness(), t.is_witness())
+
+    def test_decodes_on_demand(self):
+        lazy = tx.LazyTx.from_hex(helpers.P2WSH['human']['tx']['signed'])
+        self.assertNotIn('tx_ins', lazy.__dict__)
+        self.assertNotIn('tx_witnesses', lazy.__dict__)
+
+        self.assertEqual(
+            lazy.output_script(1),
+            helpers.P2WSH['ser']['outs'][1]['pk_script'])
+        self.assertEqual(
+            lazy.tx_out(3),
+            helpers.P2WSH['ser']['outs'][3]['output'])
+        self.assertEqual(
+            lazy.tx_in(0),
+            helpers.P2WSH['ser']['ins'][0]['input'])
+        self.assertNotIn('tx_outs', lazy.__dict__)
+
+        tx_ins = lazy.tx_ins
+        self.assertIs(lazy.tx_ins, tx_ins)
+
+    def test_immutable(self):
+        lazy = tx.LazyTx.from_bytes(helpers.P2PKH1['ser']['tx']['signed'])
+        with self.assertRaises(TypeError):
+            lazy.lock_time = b'\x00' * 4
+        with self.assertRaises(TypeError):
+            lazy.flag = None
+
+    def test_trailing_bytes(self):
+        raw = helpers.P2PKH1['ser']['tx']['signed']
+        with self.assertRaises(ValueError) as context:
+            tx.LazyTx(raw + b'\x00')
+        self.assertIn('Got 1 trailing bytes.', str(context.exception))
+
+        t, offset = tx.LazyTx.read_from(raw + raw, len(raw))
+        self.assertIsInstance(t, tx.LazyTx)
+        self.assertEqual(t, raw)
+        self.assertEqual(offset, 2 * len(raw))
+
+    def test_sighash(self):
+        t = tx.LazyTx.from_bytes(helpers.P2WPKH['ser']['tx']['signed'])
+        self.assertEqual(
+            t.sighash_all(
+                0,
+                helpers.P2WPKH['ser']['ins'][0]['pk_script'],
+                prevout_value=helpers.P2WPKH['ser']['ins'][0]['value']),
+            helpers.P2WPKH['ser']['segwit_sighash']['all'])
+
+        t = tx.LazyTx.from_bytes(helpers.P2PKH1['ser']['tx']['signed'])
+        self.assertEqual(
+            t.sighash_single(0, helpers.P2PKH1['ser']['ins'][0]['pk_script']),
+            helpers.P2PKH1['ser']['sighash']['single'])
+
+    def test_copy(self):
+        lazy = tx.LazyTx.from_bytes(helpers.P2WSH['ser']['tx']['signed'])
+        t = lazy.copy()
+        self.assertEqual(t, lazy)
+        self.assertIs(type(t), tx.Tx)
@@ -1,6 +1,8 @@
 import unittest
 import riemann
 from unittest import mock
+from riemann import tx
+from riemann import utils
 from riemann.tests import helpers
 from riemann.tx import tx_builder as tb
 
@@ -22,6 +24,11 @@ class TestTxBuilder(unittest.TestCase):
                 helpers.P2WSH['human']['witnesses'][0]['wit_script'],
                 witness=True),
             helpers.P2WSH['ser']['ins'][0]['pk_script'])
+        self.assertEqual(
+            tb.make_sh_output_script(
+                helpers.P2WSH['ser']['witnesses'][0]['wit_script'],
+                witness=True),
+            helpers.P2WSH['ser']['ins'][0]['pk_script'])
 
         riemann.select_network('bitcoin_cash_main')
         with self.assertRaises(ValueError) as context:
@@ -194,3 +201,97 @@ class TestTxBuilder(unittest.TestCase):
         self.assertEqual(
             tb.make_tx(0, 0, 0, 0, expiry=0),
             0)
+
+
+class TestIncrementalTxBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.t = tx.Tx.from_bytes(helpers.P2WSH['ser']['tx']['signed'])
+        self.legacy = tx.Tx.from_bytes(helpers.P2PKH1['ser']['tx']['signed'])
+
+    def tearDown(self):
+        riemann.select_network('bitcoin_main')
+
+    def check(self, builder):
+        res = builder.build()
+        self.assertEqual(builder.size, len(res))
+        if isinstance(res, tx.Tx):
+            self.assertEqual(
+                builder.weight, len(res.no_witness()) * 3 + len(res))
+        else:
+            self.assertEqual(builder.weight, len(res) * 4)
+        self.assertEqual(builder.vsize, (builder.weight + 3) // 4)
+        return res
+
+    def test_witness(self):
+        builder = tb.TxBuilder(
+            version=utils.le2i(self.t.version),
+            lock_time=utils.le2i(self.t.lock_time))
+        self.assertEqual(
+            builder.add_input(self.t.tx_ins[0], self.t.tx_witnesses[0],
+                              value=100000),
+            0)
+        for tx_out in self.t.tx_outs:
+            builder.add_output(tx_out)
+        self.assertEqual(self.check(builder), self.t)
+        self.assertEqual(
+            builder.fee,
+            100000 - sum(utils.le2i(o.value) for o in self.t.tx_outs))
+
+        # A second input without a witness gets an empty one
+        builder.add_input(self.legacy.tx_ins[0])
+        self.assertIsNone(builder.fee)
+        self.assertIsNone(builder.input_value)
+        res = self.check(builder)
+        self.assertEqual(res.tx_witnesses[1], tb.make_empty_witness())
+
+        builder.remove_input()
+        self.assertEqual(builder.input_value, 100000)
+        self.assertEqual(self.check(builder), self.t)
+
+        builder.set_witness(0, None)
+        res = self.check(builder)
+        self.assertIsNone(res.flag)
+        builder.set_witness(0, self.t.tx_witnesses[0])
+        self.assertEqual(self.check(builder), self.t)
+
+    def test_legacy(self):
+        builder = tb.TxBuilder(
+            version=utils.le2i(self.legacy.version),
+            lock_time=utils.le2i(self.legacy.lock_time))
+        for tx_in in self.legacy.tx_ins:
+            builder.add_input(tx_in, value=10 ** 8)
+        for tx_out in self.legacy.tx_outs:
+            builder.add_output(tx_out)
+        self.assertEqual(self.check(builder), self.legacy)
+        self.assertEqual(builder.weight, len(self.legacy) * 4)
+
+        outputs_value = sum(utils.le2i(o.value) for o in self.legacy.tx_outs)
+        self.assertEqual(builder.output_value, outputs_value)
+        self.assertEqual(builder.fee, 10 ** 8 - outputs_value)
+
+        last = builder.remove_output()
+        self.assertEqual(last, self.legacy.tx_outs[-1])
+        self.assertEqual(builder.output_value,
+                         outputs_value - utils.le2i(last.value))
+        self.check(builder)
+
+        for _ in range(300):  # VarInt grows past 0xfc
+            builder.add_output(last)
+        self.check(builder)
+
+    def test_zcash(self):
+        tx_in = self.legacy.tx_ins[0]
+        for network in ('zcash_overwinter_main', 'zcash_sapling_main'):
+            riemann.select_network(network)
+            builder = tb.TxBuilder(expiry=10)
+            builder.add_input(tx_in)
+            builder.add_output(self.legacy.tx_outs[0])
+            res = self.check(builder)
+            self.assertEqual(res.expiry_height, utils.i2le_padded(10, 4))
+
+            builder.set_witness(0, self.t.tx_witnesses[0])
+            with self.assertRaises(ValueError) as context:
+                builder.build()
+            self.assertIn('does not support witnesses',
+                          str(context.exception))
@@ -6,3 +6,5 @@ from .sapling import *  # noqa
 from .overwinter import * # noqa
 from .tx_builder import *  # noqa
 from .zcash_shared import *  # noqa
+from .batch import *  # noqa
+from .bulk import *  # noqa
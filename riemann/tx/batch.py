@@ -0,0 +1,182 @@
+from riemann.script.classification import classify_many
+from riemann.tx.shared import VarInt
+from riemann.tx.tx import _layout
+
+
+def _numpy():
+    '''
+    None -> module
+    numpy is optional. Only TxBatch needs it.
+    '''
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            'TxBatch requires numpy. Install it with `pip install numpy`.')
+    return numpy
+
+
+class TxBatch():
+    '''
+    iterable(byte-like) -> TxBatch
+    Parses many serialized Txs into columns of NumPy arrays.
+    Txs are walked with the layout scanner. No Tx objects are built.
+
+    Per tx (length num_txs):
+        version, lock_time     uint32
+        size, weight           uint64
+        tx_ins, tx_outs        int64, num_txs + 1 boundaries. The inputs of
+                               tx i are in_*[tx_ins[i]:tx_ins[i + 1]], and
+                               likewise for outputs
+    Per input (length num_inputs):
+        in_tx                  int64, index of the spending tx
+        in_tx_id               uint8, shape (num_inputs, 32), little-endian
+        in_index, in_sequence  uint32
+    Per output (length num_outputs):
+        out_tx                 int64, index of the creating tx
+        out_value              uint64
+        out_script_offset      uint64, offset into scripts
+        out_script_len         uint64
+    scripts is one bytes object holding every output script back to back.
+    '''
+
+    def __init__(self, raw_txs):
+        self._start()
+        for raw_tx in raw_txs:
+            view = memoryview(raw_tx)
+            end = self._add(view, 0)
+            if end != len(view):
+                raise ValueError(
+                    'Expected a single serialized Tx. '
+                    'Got {} trailing bytes.'.format(len(view) - end))
+        self._finish()
+
+    @classmethod
+    def from_buffer(TxBatch, byte_string):
+        '''
+        byte-like -> TxBatch
+        Parses a buffer of back-to-back serialized Txs
+        '''
+        batch = TxBatch.__new__(TxBatch)
+        batch._start()
+        view = memoryview(byte_string)
+        offset = 0
+        while offset < len(view):
+            offset = batch._add(view, offset)
+        batch._finish()
+        return batch
+
+    def _start(self):
+        self._header = bytearray()  # version and lock_time, 8 bytes per tx
+        self._sizes = []
+        self._weights = []
+        self._tx_ins = [0]
+        self._tx_outs = [0]
+        self._outpoints = bytearray()  # outpoint and sequence, 40 per input
+        self._values = bytearray()
+        self._script_offsets = []
+        self._script_lens = []
+        self._scripts = bytearray()
+
+    def _add(self, view, offset):
+        '''
+        memoryview, int -> int
+        Appends the Tx at offset to the columns. Returns the offset after it
+        '''
+        try:
+            segwit, tx_ins, tx_outs, tx_witnesses, end = _layout(view, offset)
+        except IndexError:
+            raise ValueError('Tx extends past the end of the buffer.')
+
+        self._header += view[offset:offset + 4]
+        self._header += view[end - 4:end]
+
+        size = end - offset
+        base_size = size
+        if segwit:
+            base_size -= 2 + tx_witnesses[-1] - tx_witnesses[0]
+        self._sizes.append(size)
+        self._weights.append(base_size * 3 + size)
+
+        for start, stop in zip(tx_ins, tx_ins[1:]):
+            self._outpoints += view[start:start + 36]
+            self._outpoints += view[stop - 4:stop]
+        self._tx_ins.append(self._tx_ins[-1] + len(tx_ins) - 1)
+
+        read = VarInt._read_number
+        for start, stop in zip(tx_outs, tx_outs[1:]):
+            self._values += view[start:start + 8]
+            script_len, script_start = read(view, start + 8)
+            self._script_offsets.append(len(self._scripts))
+            self._script_lens.append(script_len)
+            self._scripts += view[script_start:stop]
+        self._tx_outs.append(self._tx_outs[-1] + len(tx_outs) - 1)
+
+        return end
+
+    def _finish(self):
+        np = _numpy()
+
+        header = np.frombuffer(
+            bytes(self._header),
+            dtype=np.dtype([('version', '<u4'), ('lock_time', '<u4')]))
+        self.version = header['version'].astype(np.uint32)
+        self.lock_time = header['lock_time'].astype(np.uint32)
+        self.size = np.array(self._sizes, dtype=np.uint64)
+        self.weight = np.array(self._weights, dtype=np.uint64)
+        self.tx_ins = np.array(self._tx_ins, dtype=np.int64)
+        self.tx_outs = np.array(self._tx_outs, dtype=np.int64)
+
+        outpoints = np.frombuffer(
+            bytes(self._outpoints),
+            dtype=np.dtype([('tx_id', 'u1', (32,)),
+                            ('index', '<u4'),
+                            ('sequence', '<u4')]))
+        self.in_tx = np.repeat(
+            np.arange(len(self.size), dtype=np.int64), np.diff(self.tx_ins))
+        self.in_tx_id = np.ascontiguousarray(outpoints['tx_id'])
+        self.in_index = outpoints['index'].astype(np.uint32)
+        self.in_sequence = outpoints['sequence'].astype(np.uint32)
+
+        self.out_tx = np.repeat(
+            np.arange(len(self.size), dtype=np.int64), np.diff(self.tx_outs))
+        self.out_value = np.frombuffer(
+            bytes(self._values), dtype='<u8').astype(np.uint64)
+        self.out_script_offset = np.array(
+            self._script_offsets, dtype=np.uint64)
+        self.out_script_len = np.array(self._script_lens, dtype=np.uint64)
+        self.scripts = bytes(self._scripts)
+
+        del (self._header, self._sizes, self._weights, self._tx_ins,
+             self._tx_outs, self._outpoints, self._values,
+             self._script_offsets, self._script_lens, self._scripts)
+
+    def __len__(self):
+        return len(self.size)
+
+    def output_script(self, index):
+        '''
+        int -> bytes
+        The script of the output at index in the output columns
+        '''
+        start = int(self.out_script_offset[index])
+        return self.scripts[start:start + int(self.out_script_len[index])]
+
+    def classify_outputs(self):
+        '''
+        TxBatch -> (np.ndarray, np.ndarray, np.ndarray)
+        The ScriptType of every output, and the offset and length of its
+        payload in scripts. See riemann.script.classify_many
+        '''
+        return classify_many(
+            self.scripts, self.out_script_offset, self.out_script_len)
+
+    def output_values_by_tx(self):
+        '''
+        TxBatch -> np.ndarray
+        Total output value of each tx, as uint64
+        '''
+        np = _numpy()
+        running = np.zeros(len(self.out_value) + 1, dtype=np.uint64)
+        np.cumsum(self.out_value, out=running[1:])
+        return running[self.tx_outs[1:]] - running[self.tx_outs[:-1]]
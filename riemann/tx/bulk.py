@@ -0,0 +1,118 @@
+import os
+import itertools
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+import riemann
+from riemann.tx.tx import Tx
+
+
+def _parse_chunk(network_name, raw_txs):
+    '''
+    str, list(bytes) -> list(Tx)
+    Runs in a worker process
+    '''
+    riemann.select_network(network_name)
+    return [Tx.from_bytes(raw_tx) for raw_tx in raw_txs]
+
+
+def _parse_hex_chunk(network_name, hex_txs):
+    '''
+    str, list(str) -> list(Tx)
+    Runs in a worker process
+    '''
+    riemann.select_network(network_name)
+    return [Tx.from_hex(hex_tx) for hex_tx in hex_txs]
+
+
+def _check_pool_args(workers, chunksize):
+    '''
+    int, int -> int
+    Returns the number of workers to use
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1 or chunksize < 1:
+        raise ValueError(
+            'Expected at least 1 worker and chunksize of at least 1. '
+            'Got {} and {}.'.format(workers, chunksize))
+    return workers
+
+
+def _sighash_chunk(network_name, txs_and_specs):
+    '''
+    str, list(tuple) -> list(list(bytes))
+    Runs in a worker process
+    '''
+    riemann.select_network(network_name)
+    return [t.sighashes(specs) for t, specs in txs_and_specs]
+
+
+def _iter_pooled(do_chunk, items, workers, chunksize, network_name):
+    '''
+    function, iterable, int, int, str -> generator
+    Sends chunks of items to a process pool and yields the results in
+    input order. At most two chunks per worker are in flight, so long or
+    unbounded inputs are read as the results are consumed.
+    Each chunk carries the network name, and workers select it.
+    '''
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(itertools.islice(items, chunksize))
+                if len(chunk) == 0:
+                    break
+                pending.append(
+                    executor.submit(do_chunk, network_name, chunk))
+            if len(pending) == 0:
+                return
+            yield from pending.popleft().result()
+
+
+def parse_many(raw_txs, workers=None, chunksize=256, stream=False):
+    '''
+    iterable(bytes), int, int, bool -> list(Tx) or generator(Tx)
+    Parses many serialized Txs across a pool of worker processes.
+    Workers use the network that is selected when this is called.
+    Results are in input order. workers defaults to the number of CPUs.
+    If stream is True, returns a generator instead of a list.
+    '''
+    workers = _check_pool_args(workers, chunksize)
+    raw_txs = (bytes(raw_tx) for raw_tx in raw_txs)  # memoryviews don't pickle
+    parsed = _iter_pooled(_parse_chunk, raw_txs, workers, chunksize,
+                          riemann.get_current_network_name())
+    if stream:
+        return parsed
+    return list(parsed)
+
+
+def parse_many_hex(hex_txs, workers=None, chunksize=256, stream=False):
+    '''
+    iterable(str), int, int, bool -> list(Tx) or generator(Tx)
+    Like parse_many, but for hex strings. Workers do the hex decoding.
+    '''
+    workers = _check_pool_args(workers, chunksize)
+    parsed = _iter_pooled(_parse_hex_chunk, hex_txs, workers, chunksize,
+                          riemann.get_current_network_name())
+    if stream:
+        return parsed
+    return list(parsed)
+
+
+def batch_sighashes(txs_and_specs, workers=None, chunksize=64, stream=False):
+    '''
+    iterable(tuple(Tx, list(tuple))), int, int, bool
+        -> list(list(bytes)) or generator(list(bytes))
+    Runs Tx.sighashes for many (tx, specs) pairs across a pool of worker
+    processes. Specs are as in Tx.sighashes. Results are in input order,
+    one list of digests per tx. workers defaults to the number of CPUs.
+    If stream is True, returns a generator instead of a list.
+    '''
+    workers = _check_pool_args(workers, chunksize)
+    digests = _iter_pooled(_sighash_chunk, txs_and_specs, workers, chunksize,
+                           riemann.get_current_network_name())
+    if stream:
+        return digests
+    return list(digests)
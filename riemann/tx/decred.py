@@ -1,7 +1,6 @@
 import riemann
 from riemann import utils
 from riemann.tx import shared
-from riemann.tx.tx import TxOut
 
 
 class DecredByteData(shared.ByteData):
@@ -202,18 +201,15 @@ class DecredTx(DecredByteData):
                     'Expected instance of DecredInputWitness. Got {}'
                     .format(type(tx_witness).__name__))
 
-        self += version
-        self += shared.VarInt(len(tx_ins))
-        for tx_in in tx_ins:
-            self += tx_in
-        self += shared.VarInt(len(tx_outs))
-        for tx_out in tx_outs:
-            self += tx_out
-        self += lock_time
-        self += expiry
-        self += shared.VarInt(len(tx_witnesses))
-        for tx_witness in tx_witnesses:
-            self += tx_witness
+        parts = [version, shared.VarInt._encode(len(tx_ins))]
+        parts.extend(tx_ins)
+        parts.append(shared.VarInt._encode(len(tx_outs)))
+        parts.extend(tx_outs)
+        parts.append(lock_time)
+        parts.append(expiry)
+        parts.append(shared.VarInt._encode(len(tx_witnesses)))
+        parts.extend(tx_witnesses)
+        self._write(parts)
 
         self.version = version
         self.tx_ins = tx_ins
@@ -227,26 +223,26 @@ class DecredTx(DecredByteData):
                 'Tx is too large. '
                 'Expect less than 100kB. Got: {} bytes'.format(len(self)))
 
-        # TODO: check this
-        self.tx_id_le = self.prefix_hash()
-        self.tx_id = utils.change_endianness(self.tx_id_le)
-
-        # Ignoring this, as it's only used for in-block merkle trees
-        # self.tx_id_full_le = utils.blake256(self.tx_id_le
-        #                                     + self.witness_hash())
-        # self.tx_id_full = utils.change_endianness(self.tx_id_full_le)
+        # Ignoring the full tx id, as it's only used for in-block merkle trees
+        # tx_id_full_le = utils.blake256(self.tx_id_le + self.witness_hash())
 
         self._make_immutable()
 
+    @shared.cached_property
+    def tx_id_le(self):
+        # TODO: check this
+        return utils.blake256(self.prefix())
+
+    @shared.cached_property
+    def tx_id(self):
+        return utils.change_endianness(self.tx_id_le)
+
     @classmethod
     def from_bytes(DecredTx, byte_string):
         raise NotImplementedError('TODO')
 
     def prefix_hash(self):
-        try:
-            return self.tx_id_le  # Prevent redundant hashing
-        except AttributeError:
-            return utils.blake256(self.prefix())
+        return self.tx_id_le  # Prevent redundant hashing
 
     def witness_hash(self):
         return utils.blake256(self.witness())
@@ -294,7 +290,13 @@ class DecredTx(DecredByteData):
 
     def copy(self, version=None, tx_ins=None, tx_outs=None,
              lock_time=None, expiry=None, tx_witnesses=None):
-        return DecredTx(
+        '''
+        DecredTx, ... -> DecredTx
+        Makes a copy. Allows over-writing specific pieces.
+        The tx_id covers only the prefix. If the prefix is unchanged, e.g.
+        when only witnesses are replaced, the copy keeps it.
+        '''
+        tx = DecredTx(
             version=version if version is not None else self.version,
             tx_ins=tx_ins if tx_ins is not None else self.tx_ins,
             tx_outs=tx_outs if tx_outs is not None else self.tx_outs,
@@ -303,85 +305,112 @@ class DecredTx(DecredByteData):
             expiry=expiry if expiry is not None else self.expiry,
             tx_witnesses=(tx_witnesses if tx_witnesses is not None
                           else self.tx_witnesses))
+        if tx_ins is not None:
+            changed = shared._changed_indices(tx_ins, self.tx_ins)
+            same_ins = changed is not None and all(
+                tx_ins[i] == self.tx_ins[i] for i in changed)
+        else:
+            same_ins = True
+        if (same_ins
+                and tx.version[:2] == self.version[:2]
+                and (tx_outs is None or shared._changed_indices(
+                    tx_outs, self.tx_outs) == [])
+                and tx.lock_time == self.lock_time
+                and tx.expiry == self.expiry):
+            tx._carry_cached(self, ('tx_id_le', 'tx_id'))
+        return tx
+
+    def with_signatures(self, signatures):
+        '''
+        DecredTx, dict(int: tuple(byte-like, byte-like)) -> DecredTx
+        Fills in many witness scripts at once. Keys are input indices,
+        values are (stack_script, redeem_script). Makes one copy, which
+        keeps the tx_id.
+        '''
+        tx_witnesses = list(self.tx_witnesses)
+        for index, (stack_script, redeem_script) in signatures.items():
+            tx_witnesses[index] = tx_witnesses[index].copy(
+                stack_script=stack_script, redeem_script=redeem_script)
+        return self.copy(tx_witnesses=tx_witnesses)
 
     def sighash_none(self):
         raise NotImplementedError('SIGHASH_NONE is a bad idea.')
 
-    def _sighash_prep(self, index, script=None):
-        copy_tx_witnesses = [w.copy(stack_script=b'', redeem_script=b'')
-                             for w in self.tx_witnesses]
-        copy_tx_witnesses[index] = \
-            copy_tx_witnesses[index].copy(stack_script=script,
-                                          redeem_script=b'')
-
-        return self.copy(tx_witnesses=copy_tx_witnesses)
+    def _sighash_witness_signing(self, index, script):
+        '''
+        DecredTx, int, byte-like -> bytes
+        The witness signing serialization of a copy of this tx in which
+        every script_sig is empty except the one at index, which is the
+        script. An empty script_sig serializes to a single 0 byte, so we
+        can write it out directly.
+        '''
+        if script is None:
+            script = b''
+        num_witnesses = len(self.tx_witnesses)
+        return b''.join((
+            self.version[:2],
+            b'\x03\x00',  # Serialization type 3 (witness signing)
+            shared.VarInt._encode(num_witnesses),
+            b'\x00' * index,
+            shared.VarInt._encode(len(script)),
+            bytes(script),
+            b'\x00' * (num_witnesses - index - 1)))
+
+    def _sighash_single_prefix(self, index):
+        '''
+        DecredTx, int -> bytes
+        The prefix serialization of a SIGHASH_SINGLE copy of this tx.
+        Other inputs get sequence 0. Outputs after index are removed, and
+        outputs before it get value -1 and an empty script. They keep their
+        script version.
+        '''
+        if index >= len(self.tx_outs):
+            raise NotImplementedError(
+                'I refuse to implement the SIGHASH_SINGLE bug.')
+        parts = [self.version[:2],
+                 b'\x01\x00',  # Serialization type 1 (prefix only)
+                 shared.VarInt._encode(len(self.tx_ins))]
+        for i, tx_in in enumerate(self.tx_ins):
+            if i == index:
+                parts.append(tx_in.to_bytes())
+            else:
+                parts.append(tx_in[:37] + b'\x00' * 4)
+        parts.append(shared.VarInt._encode(index + 1))
+        for tx_out in self.tx_outs[:index]:
+            parts.append(b'\xff' * 8 + tx_out.version + b'\x00')
+        parts.append(self.tx_outs[index].to_bytes())
+        parts.append(self.lock_time)
+        parts.append(self.expiry)
+        return b''.join(parts)
 
     def sighash_single(self, index, script=None,
                        anyone_can_pay=False):
         '''
         https://github.com/decred/dcrd/blob/master/txscript/script.go
         '''
-        copy_tx = self._sighash_prep(
-            index=index,
-            script=script)
-
-        try:
-            copy_tx_outs = copy_tx.tx_outs[:index + 1]
-            copy_tx_outs = [TxOut(value=b'\xff' * 8, output_script=b'')
-                            for _ in copy_tx.tx_ins]
-            copy_tx_outs[index] = copy_tx.tx_outs[index]
-        except IndexError:
-            raise NotImplementedError(
-                'I refuse to implement the SIGHASH_SINGLE bug.')
-
-        copy_tx_ins = [tx_in.copy(sequence=b'\x00\x00\x00\x00')
-                       for tx_in in copy_tx.tx_ins]
-        copy_tx_ins[index] = copy_tx.tx_ins[index]
-        copy_tx = copy_tx.copy(tx_ins=copy_tx_ins, tx_outs=copy_tx_outs)
-
-        if anyone_can_pay:
-            return self._sighash_anyone_can_pay(
-                index=index,
-                copy_tx=copy_tx,
-                sighash_type=shared.SIGHASH_SINGLE)
-
         return self._sighash_final_hashing(
-            index=index,
-            copy_tx=copy_tx,
-            sighash_type=shared.SIGHASH_SINGLE)
+            prefix_hash=utils.blake256(self._sighash_single_prefix(index)),
+            witness_signing=self._sighash_witness_signing(index, script),
+            sighash_type=shared.SIGHASH_SINGLE,
+            anyone_can_pay=anyone_can_pay)
 
     def sighash_all(self, index, script=None, anyone_can_pay=False):
         '''
         https://gist.github.com/davecgh/b00ec6e11f73620c3deddf160353961c
         https://github.com/decred/dcrd/blob/master/txscript/script.go
         '''
-        copy_tx = self._sighash_prep(index, script)
-
-        if anyone_can_pay:
-            return self._sighash_anyone_can_pay(
-                index=index,
-                copy_tx=copy_tx,
-                sighash_type=shared.SIGHASH_ALL)
-
+        # Signing changes only witnesses, so the prefix is our own
         return self._sighash_final_hashing(
-            index=index,
-            copy_tx=copy_tx,
-            sighash_type=shared.SIGHASH_ALL)
-
-    def _sighash_anyone_can_pay(self, index, copy_tx, sighash_type):
-        copy_tx_witnesses = [w.copy(stack_script=b'', redeem_script=b'')
-                             for w in copy_tx.tx_witnesses]
-        copy_tx_witnesses[index] = copy_tx.tx_witnesses[index]
-        copy_tx = copy_tx.copy(tx_witnesses=copy_tx_witnesses)
+            prefix_hash=self.prefix_hash(),
+            witness_signing=self._sighash_witness_signing(index, script),
+            sighash_type=shared.SIGHASH_ALL,
+            anyone_can_pay=anyone_can_pay)
 
-        return self._sighash_final_hashing(
-            index=index,
-            copy_tx=copy_tx,
-            sighash_type=sighash_type | shared.SIGHASH_ANYONECANPAY)
-
-    def _sighash_final_hashing(self, index, copy_tx, sighash_type):
-        sighash = DecredByteData()
-        sighash += utils.i2le_padded(sighash_type, 4)
-        sighash += copy_tx.prefix_hash()
-        sighash += copy_tx.witness_signing_hash()
-        return utils.blake256(sighash.to_bytes())
+    def _sighash_final_hashing(self, prefix_hash, witness_signing,
+                               sighash_type, anyone_can_pay):
+        if anyone_can_pay:
+            sighash_type = sighash_type | shared.SIGHASH_ANYONECANPAY
+        return utils.blake256(b''.join((
+            utils.i2le_padded(sighash_type, 4),
+            prefix_hash,
+            utils.blake256(witness_signing))))
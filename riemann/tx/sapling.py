@@ -1,7 +1,7 @@
 import riemann
 from riemann import utils
 from riemann.tx import shared
-from riemann.tx.tx import TxIn, TxOut
+from riemann.tx.tx import TxIn, TxOut, _same_prevouts, _with_script_sigs
 from riemann.tx import zcash_shared as z
 
 
@@ -256,38 +256,31 @@ class SaplingTx(z.ZcashByteData):
         if len(tx_joinsplits) + len(tx_ins) + len(tx_shielded_spends) == 0:
             raise ValueError('Transaction must have some input value.')
 
-        self += b'\x04\x00\x00\x00'  # Sapling is always v4
-        self += b'\x85\x20\x2f\x89'  # Sapling version group id
-        self += shared.VarInt(len(tx_ins))
-        for tx_in in tx_ins:
-            self += tx_in
-        self += shared.VarInt(len(tx_outs))
-        for tx_out in tx_outs:
-            self += tx_out
-        self += lock_time
-        self += expiry_height
-        self += value_balance
+        parts = [b'\x04\x00\x00\x00',  # Sapling is always v4
+                 b'\x85\x20\x2f\x89',  # Sapling version group id
+                 shared.VarInt._encode(len(tx_ins))]
+        parts.extend(tx_ins)
+        parts.append(shared.VarInt._encode(len(tx_outs)))
+        parts.extend(tx_outs)
+        parts.append(lock_time)
+        parts.append(expiry_height)
+        parts.append(value_balance)
 
-        self += shared.VarInt(len(tx_shielded_spends))
-        if len(tx_shielded_spends) != 0:
-            for shielded_spend in tx_shielded_spends:
-                self += shielded_spend
+        parts.append(shared.VarInt._encode(len(tx_shielded_spends)))
+        parts.extend(tx_shielded_spends)
 
-        self += shared.VarInt(len(tx_shielded_outputs))
-        if len(tx_shielded_outputs) != 0:
-            for shielded_output in tx_shielded_outputs:
-                self += shielded_output
+        parts.append(shared.VarInt._encode(len(tx_shielded_outputs)))
+        parts.extend(tx_shielded_outputs)
 
-        self += shared.VarInt(len(tx_joinsplits))
+        parts.append(shared.VarInt._encode(len(tx_joinsplits)))
         if len(tx_joinsplits) != 0:
-            for tx_joinsplit in tx_joinsplits:
-                self += tx_joinsplit
-            self += joinsplit_pubkey
-            self += joinsplit_sig
+            parts.extend(tx_joinsplits)
+            parts.append(joinsplit_pubkey)
+            parts.append(joinsplit_sig)
 
         if len(tx_shielded_outputs) + len(tx_shielded_spends) != 0:
-            self += binding_sig
-            self.binding_sig = binding_sig
+            parts.append(binding_sig)
+        self._write(parts)
 
         self.header = b'\x04\x00\x00\x80'  # Sapling is always v4
         self.group_id = b'\x85\x20\x2f\x89'  # Sapling version group id
@@ -311,26 +304,16 @@ class SaplingTx(z.ZcashByteData):
             self.tx_joinsplits = tuple(js for js in tx_joinsplits)
             self.joinsplit_pubkey = joinsplit_pubkey
             self.joinsplit_sig = joinsplit_sig
-            # Zcash spec 5.4.1.4 Hsig hash function
-            self.hsigs = (tuple(self._hsig(i)
-                          for i in range(len(self.tx_joinsplits))))
-            self.primary_inputs = (tuple(self._primary_input(i)
-                                   for i in range(len(self.tx_joinsplits))))
         else:
             self.tx_joinsplits = tuple()
             self.joinsplit_pubkey = None
             self.joinsplit_sig = None
-            self.hsigs = tuple()
-            self.primary_inputs = tuple()
 
         if len(tx_shielded_outputs) + len(tx_shielded_spends) != 0:
             self.binding_sig = binding_sig
         else:
             self.binding_sig = None
 
-        self.tx_id_le = self.tx_id_le = utils.hash256(self.to_bytes())
-        self.tx_id = self.tx_id_le[::-1]
-
         self._make_immutable()
 
         if len(self) > 100000:
@@ -338,6 +321,24 @@ class SaplingTx(z.ZcashByteData):
                 'Tx is too large. '
                 'Expect less than 100kB. Got: {} bytes'.format(len(self)))
 
+    @shared.cached_property
+    def tx_id_le(self):
+        return utils.hash256(self.to_bytes())
+
+    @shared.cached_property
+    def tx_id(self):
+        return self.tx_id_le[::-1]
+
+    @shared.cached_property
+    def hsigs(self):
+        # Zcash spec 5.4.1.4 Hsig hash function
+        return tuple(self._hsig(i) for i in range(len(self.tx_joinsplits)))
+
+    @shared.cached_property
+    def primary_inputs(self):
+        return tuple(self._primary_input(i)
+                     for i in range(len(self.tx_joinsplits)))
+
     def calculate_fee(self, input_values):
         '''
         SaplingTx, list(int) -> int
@@ -358,8 +359,9 @@ class SaplingTx(z.ZcashByteData):
         SaplingTx, ... -> SaplingTx
 
         Makes a copy. Allows over-writing specific pieces.
+        Cached hashes of pieces that did not change carry over.
         '''
-        return SaplingTx(
+        tx = SaplingTx(
             tx_ins=tx_ins if tx_ins is not None else self.tx_ins,
             tx_outs=tx_outs if tx_outs is not None else self.tx_outs,
             lock_time=(lock_time if lock_time is not None
@@ -379,7 +381,63 @@ class SaplingTx(z.ZcashByteData):
             joinsplit_pubkey=(joinsplit_pubkey if joinsplit_pubkey is not None
                               else self.joinsplit_pubkey),
             joinsplit_sig=(joinsplit_sig if joinsplit_sig is not None
-                           else self.joinsplit_sig))
+                           else self.joinsplit_sig),
+            binding_sig=(binding_sig if binding_sig is not None
+                         else self.binding_sig))
+        tx._carry_unchanged(self, tx_ins, tx_outs, tx_shielded_spends,
+                            tx_shielded_outputs, tx_joinsplits,
+                            joinsplit_pubkey)
+        return tx
+
+    def with_signatures(self, signatures):
+        '''
+        SaplingTx, dict(int: tuple(byte-like, byte-like)) -> SaplingTx
+        Fills in many scriptSigs at once. Keys are input indices, values
+        are (stack_script, redeem_script). Makes one copy.
+        '''
+        for signature in signatures.values():
+            if not isinstance(signature, tuple):
+                raise ValueError(
+                    'SaplingTx does not support witnesses. '
+                    'Expected (stack_script, redeem_script). Got {}.'
+                    .format(type(signature).__name__))
+        return self.copy(
+            tx_ins=_with_script_sigs(self.tx_ins, signatures))
+
+    def _carry_unchanged(self, other, tx_ins, tx_outs, tx_shielded_spends,
+                         tx_shielded_outputs, tx_joinsplits,
+                         joinsplit_pubkey):
+        '''
+        SaplingTx, SaplingTx, ... -> None
+        Takes the cached hashes of other that cover pieces copy() did not
+        replace. Arguments are as passed to copy()
+        '''
+        if tx_ins is None or _same_prevouts(
+                tx_ins, other.tx_ins,
+                shared._changed_indices(tx_ins, other.tx_ins)):
+            self._carry_cached(
+                other, ('_hash_prevouts_all', '_hash_sequence_all'))
+        if (tx_outs is None
+                or shared._changed_indices(tx_outs, other.tx_outs) == []):
+            self._carry_cached(other, ('_hash_outputs_all',))
+        if tx_shielded_spends is None:
+            changed = []
+        else:
+            changed = shared._changed_indices(
+                tx_shielded_spends, other.tx_shielded_spends)
+        if changed is not None and all(  # spend_auth_sig is not hashed
+                tx_shielded_spends[i][:320]
+                == other.tx_shielded_spends[i][:320] for i in changed):
+            self._carry_cached(other, ('_hash_shielded_spends_all',))
+        if (tx_shielded_outputs is None or shared._changed_indices(
+                tx_shielded_outputs, other.tx_shielded_outputs) == []):
+            self._carry_cached(other, ('_hash_shielded_outputs_all',))
+        if ((tx_joinsplits is None or shared._changed_indices(
+                tx_joinsplits, other.tx_joinsplits) == [])
+                and (joinsplit_pubkey is None
+                     or joinsplit_pubkey == other.joinsplit_pubkey)):
+            self._carry_cached(
+                other, ('_hash_joinsplits_all', 'hsigs', 'primary_inputs'))
 
     def _hsig(self, index):
         return utils.blake2b(
@@ -427,22 +485,17 @@ class SaplingTx(z.ZcashByteData):
                         header.hex(),
                         group_id.hex()))
 
+        view = memoryview(byte_string)
         tx_ins = []
-        tx_ins_num = shared.VarInt.from_bytes(byte_string[8:])
-
-        current = 8 + len(tx_ins_num)
+        tx_ins_num, current = shared.VarInt._parse(view, 8)
         for _ in range(tx_ins_num.number):
-            tx_in = TxIn.from_bytes(byte_string[current:])
-            current += len(tx_in)
+            tx_in, current = TxIn._parse(view, current)
             tx_ins.append(tx_in)
 
         tx_outs = []
-        tx_outs_num = shared.VarInt.from_bytes(byte_string[current:])
-
-        current += len(tx_outs_num)
+        tx_outs_num, current = shared.VarInt._parse(view, current)
         for _ in range(tx_outs_num.number):
-            tx_out = TxOut.from_bytes(byte_string[current:])
-            current += len(tx_out)
+            tx_out, current = TxOut._parse(view, current)
             tx_outs.append(tx_out)
 
         lock_time = byte_string[current:current + 4]
@@ -453,29 +506,26 @@ class SaplingTx(z.ZcashByteData):
         current += 8
 
         tx_shielded_spends = []
-        shielded_spends_num = shared.VarInt.from_bytes(byte_string[current:])
-
-        current += len(shielded_spends_num)
+        shielded_spends_num, current = shared.VarInt._parse(view, current)
         for _ in range(shielded_spends_num.number):
-            ss = SaplingShieldedSpend.from_bytes(byte_string[current:])
+            ss = SaplingShieldedSpend.from_bytes(
+                byte_string[current:current + 384])
             current += len(ss)
             tx_shielded_spends.append(ss)
 
         tx_shielded_outputs = []
-        shielded_outputs_num = shared.VarInt.from_bytes(byte_string[current:])
-
-        current += len(shielded_outputs_num)
+        shielded_outputs_num, current = shared.VarInt._parse(view, current)
         for _ in range(shielded_outputs_num.number):
-            so = SaplingShieldedOutput.from_bytes(byte_string[current:])
+            so = SaplingShieldedOutput.from_bytes(
+                byte_string[current:current + 948])
             current += len(so)
             tx_shielded_outputs.append(so)
 
         tx_joinsplits = []
-        tx_joinsplits_num = shared.VarInt.from_bytes(byte_string[current:])
-        current += len(tx_outs_num)
+        tx_joinsplits_num, current = shared.VarInt._parse(view, current)
         for _ in range(tx_joinsplits_num.number):
             tx_joinsplit = SaplingJoinsplit.from_bytes(
-                byte_string[current:])
+                byte_string[current:current + 1698])
             current += len(tx_joinsplit)
             tx_joinsplits.append(tx_joinsplit)
 
@@ -526,59 +576,76 @@ class SaplingTx(z.ZcashByteData):
         if joinsplit and anyone_can_pay:
             raise ValueError('ANYONECANPAY can\'t be used with joinsplits')
 
-        data = z.ZcashByteData()
-
-        data += self.header
-        data += self.group_id
-
-        data += self._hash_prevouts(anyone_can_pay)
-        data += self._hash_sequence(sighash_type, anyone_can_pay)
-        data += self._hash_outputs(sighash_type, index)
-        data += self._hash_joinsplits()
-        data += self._hash_shielded_spends()
-        data += self._hash_shielded_outputs()
-
-        data += self.lock_time
-        data += self.expiry_height
-        data += self.value_balance
+        parts = [
+            self.header,
+            self.group_id,
+            self._hash_prevouts(anyone_can_pay),
+            self._hash_sequence(sighash_type, anyone_can_pay),
+            self._hash_outputs(sighash_type, index),
+            self._hash_joinsplits(),
+            self._hash_shielded_spends(),
+            self._hash_shielded_outputs(),
+            self.lock_time,
+            self.expiry_height,
+            self.value_balance,
+        ]
 
         if anyone_can_pay:
             sighash_type = sighash_type | shared.SIGHASH_ANYONECANPAY
-        data += utils.i2le_padded(sighash_type, 4)
+        parts.append(utils.i2le_padded(sighash_type, 4))
 
         if not joinsplit:
-            data += self.tx_ins[index].outpoint
-            data += script_code
-            data += prevout_value
-            data += self.tx_ins[index].sequence
+            tx_in = self.tx_ins[index]
+            parts.extend((tx_in[:36],
+                          bytes(script_code),
+                          bytes(prevout_value),
+                          tx_in.sequence))
 
         return utils.blake2b(
-            data=data.to_bytes(),
+            data=b''.join(parts),
             digest_size=32,
             person=b'ZcashSigHash' + bytes.fromhex('bb09b876'))  # Branch ID
 
+    def sighashes(self, specs):
+        '''
+        SaplingTx, iterable(tuple) -> list(bytes)
+        Computes the sighash of many inputs in one call. Each spec is a
+        tuple of (index, script_code, prevout_value, sighash_type).
+        sighash_type may include SIGHASH_ANYONECANPAY. Digests shared by all
+        inputs are computed once, on first use.
+        '''
+        digests = []
+        for index, script_code, prevout_value, sighash_type in specs:
+            anyone_can_pay = bool(sighash_type & shared.SIGHASH_ANYONECANPAY)
+            digests.append(self.sighash(
+                sighash_type=sighash_type & ~shared.SIGHASH_ANYONECANPAY,
+                index=index,
+                script_code=script_code,
+                prevout_value=prevout_value,
+                anyone_can_pay=anyone_can_pay))
+        return digests
+
     def _hash_prevouts(self, anyone_can_pay):
         if anyone_can_pay:
             return b'\x00' * 32
+        return self._hash_prevouts_all
 
-        data = z.ZcashByteData()
-        for tx_in in self.tx_ins:
-            data += tx_in.outpoint
+    @shared.cached_property
+    def _hash_prevouts_all(self):
         return utils.blake2b(
-            data=data.to_bytes(),
+            data=b''.join(tx_in[:36] for tx_in in self.tx_ins),
             digest_size=32,
             person=b'ZcashPrevoutHash')
 
     def _hash_sequence(self, sighash_type, anyone_can_pay):
         if anyone_can_pay or sighash_type == shared.SIGHASH_SINGLE:
             return b'\x00' * 32
+        return self._hash_sequence_all
 
-        data = z.ZcashByteData()
-        for tx_in in self.tx_ins:
-            data += tx_in.sequence
-
+    @shared.cached_property
+    def _hash_sequence_all(self):
         return utils.blake2b(
-            data=data.to_bytes(),
+            data=b''.join(tx_in.sequence for tx_in in self.tx_ins),
             digest_size=32,
             person=b'ZcashSequencHash')
 
@@ -586,63 +653,61 @@ class SaplingTx(z.ZcashByteData):
         if sighash_type not in [shared.SIGHASH_ALL, shared.SIGHASH_SINGLE]:
             return b'\x00' * 32
 
-        data = z.ZcashByteData()
-
         if sighash_type == shared.SIGHASH_ALL:
-            for tx_out in self.tx_outs:
-                data += tx_out
+            return self._hash_outputs_all
 
-        if sighash_type == shared.SIGHASH_SINGLE:
-            if index > len(self.tx_outs):
-                raise NotImplementedError(
-                    'I refuse to implement the SIGHASH_SINGLE bug.')
-            data += self.tx_outs[index]
+        if index > len(self.tx_outs):
+            raise NotImplementedError(
+                'I refuse to implement the SIGHASH_SINGLE bug.')
+        return utils.blake2b(
+            data=self.tx_outs[index].to_bytes(),
+            digest_size=32,
+            person=b'ZcashOutputsHash')
 
+    @shared.cached_property
+    def _hash_outputs_all(self):
         return utils.blake2b(
-            data=data.to_bytes(),
+            data=b''.join(tx_out.to_bytes() for tx_out in self.tx_outs),
             digest_size=32,
             person=b'ZcashOutputsHash')
 
     def _hash_joinsplits(self):
+        return self._hash_joinsplits_all
+
+    @shared.cached_property
+    def _hash_joinsplits_all(self):
         if len(self.tx_joinsplits) == 0:
             return b'\x00' * 32
 
-        data = z.ZcashByteData()
-
-        for joinsplit in self.tx_joinsplits:
-            data += joinsplit
-
-        data += self.joinsplit_pubkey
-
         return utils.blake2b(
-            data=data.to_bytes(),
+            data=b''.join([js.to_bytes() for js in self.tx_joinsplits]
+                          + [self.joinsplit_pubkey]),
             digest_size=32,
             person=b'ZcashJSplitsHash')
 
     def _hash_shielded_spends(self):
+        return self._hash_shielded_spends_all
+
+    @shared.cached_property
+    def _hash_shielded_spends_all(self):
         if len(self.tx_shielded_spends) == 0:
             return b'\x00' * 32
 
-        data = z.ZcashByteData()
-
-        for ss in self.tx_shielded_spends:
-            data += ss[:320]  # Strip off spend_auth_sig
-
         return utils.blake2b(
-            data=data.to_bytes(),
+            # Strip off spend_auth_sig
+            data=b''.join(ss[:320] for ss in self.tx_shielded_spends),
             digest_size=32,
             person=b'ZcashSSpendsHash')
 
     def _hash_shielded_outputs(self):
+        return self._hash_shielded_outputs_all
+
+    @shared.cached_property
+    def _hash_shielded_outputs_all(self):
         if len(self.tx_shielded_outputs) == 0:
             return b'\x00' * 32
 
-        data = z.ZcashByteData()
-
-        for so in self.tx_shielded_outputs:
-            data += so
-
         return utils.blake2b(
-            data=data.to_bytes(),
+            data=b''.join(so.to_bytes() for so in self.tx_shielded_outputs),
             digest_size=32,
             person=b'ZcashSOutputHash')
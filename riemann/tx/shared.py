@@ -1,7 +1,11 @@
+import operator
+import itertools
+
 import riemann
 from riemann import utils
 
 
+SIGHASH_DEFAULT = 0x00  # BIP341 only. Signs like SIGHASH_ALL
 SIGHASH_ALL = 0x01
 SIGHASH_NONE = 0x02
 SIGHASH_SINGLE = 0x03
@@ -9,6 +13,57 @@ SIGHASH_FORKID = 0x40
 SIGHASH_ANYONECANPAY = 0x80
 
 
+class cached_property():
+    '''
+    Decorator for a property that is computed once, on first access.
+    The result is stored in the instance __dict__, where it shadows the
+    property on later lookups. This bypasses the ByteData immutability check.
+    '''
+
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self.func(instance)
+        instance.__dict__[self.func.__name__] = value
+        return value
+
+
+def _changed_indices(items, old_items):
+    '''
+    sequence, sequence -> list(int) or None
+    Indices of the items that are not the same object as the old item at
+    that index. None if the lengths differ.
+    Lets copy() validate and compare only what was replaced.
+    '''
+    if len(items) != len(old_items):
+        return None
+    return list(itertools.compress(
+        range(len(items)), map(operator.is_not, items, old_items)))
+
+
+_get_bytes = operator.attrgetter('_bytes')
+
+
+def _join_bytes(items):
+    '''
+    iterable(ByteData) -> bytes
+    Joins the serializations of already-built items
+    '''
+    return b''.join(map(_get_bytes, items))
+
+
+def _items_len(items):
+    '''
+    iterable(ByteData) -> int
+    Total serialized length of already-built items
+    '''
+    return sum(map(len, map(_get_bytes, items)))
+
+
 class ByteData():
     '''
     Wrapper class for byte-like data
@@ -18,12 +73,42 @@ class ByteData():
     self._bytes is a byte object when immutable
     Should be mostly transparent to the user
     Can be treated like bytes or a bytearray in most cases
+    Subclasses that declare __slots__ have no instance __dict__
     '''
-    __immutable = False
+    __slots__ = ('_bytes', '__immutable')
 
     def __init__(self):
+        object.__setattr__(self, '_ByteData__immutable', False)
         self._bytes = bytearray()
 
+    def __getstate__(self):
+        '''
+        ByteData -> dict
+        Supports pickling, e.g. to send instances between processes.
+        Collects slots and __dict__ entries alike. Cached properties are
+        left out and recomputed on demand.
+        '''
+        state = dict(
+            (key, value)
+            for key, value in getattr(self, '__dict__', {}).items()
+            if not isinstance(getattr(type(self), key, None),
+                              cached_property))
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name.startswith('__'):
+                    name = '_{}{}'.format(cls.__name__, name)  # mangled
+                if hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        '''
+        dict -> None
+        Restores pickled state without tripping the immutability check
+        '''
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
     def __iter__(self):
         return iter(self._bytes)
 
@@ -96,6 +181,43 @@ class ByteData():
         '''
         return self._bytes.hex()
 
+    @classmethod
+    def _from_trusted_parts(C, *args, **kwargs):
+        '''
+        Builds an instance without validating the arguments.
+        Subclasses that support this define _build, which serializes and
+        stores already-validated fields.
+        Only for data that is known to be well-formed, e.g. the output of
+        our own parsers or the fields of an existing instance. Use the
+        constructor for anything else.
+        '''
+        obj = C.__new__(C)
+        ByteData.__init__(obj)
+        obj._build(*args, **kwargs)
+        return obj
+
+    def _write(self, parts):
+        '''
+        list(byte-like) -> None
+        Sizes all parts, then copies each of them once into a new buffer.
+        Replaces a chain of += calls. The result is already immutable
+        bytes, so _make_immutable does not copy it again.
+        '''
+        self._bytes = b''.join(
+            part._bytes if isinstance(part, ByteData) else part
+            for part in parts)
+
+    def _carry_cached(self, other, names):
+        '''
+        ByteData, iterable(str) -> None
+        Copies the cached properties in names that other has already
+        computed. Only for properties computed from fields that are the
+        same in both.
+        '''
+        cached = other.__dict__
+        self.__dict__.update(
+            (name, cached[name]) for name in names if name in cached)
+
     def _make_immutable(self):
         '''
         Prevents any future changes to the object
@@ -210,3 +332,43 @@ class VarInt(ByteData):
             length=len(num) + 1 if non_compact else 0)
 
         return ret
+
+    @staticmethod
+    def _encode(number):
+        '''
+        int -> bytes
+        Serializes a non-negative number as a compact VarInt without
+        building a VarInt. For use by serializers.
+        '''
+        if number <= 0xfc:
+            return bytes((number,))
+        if number <= 0xffff:
+            return b'\xfd' + number.to_bytes(2, 'little')
+        if number <= 0xffffffff:
+            return b'\xfe' + number.to_bytes(4, 'little')
+        return b'\xff' + number.to_bytes(8, 'little')
+
+    @staticmethod
+    def _read_number(view, offset):
+        '''
+        memoryview, int -> (int, int)
+        Reads the number encoded by a VarInt at offset without building a
+        VarInt. Returns it and the offset after it.
+        Raises IndexError if the view ends before the VarInt does.
+        '''
+        prefix = view[offset]
+        if prefix <= 0xfc:
+            return prefix, offset + 1
+        end = offset + (3 if prefix == 0xfd else 5 if prefix == 0xfe else 9)
+        if end > len(view):
+            raise IndexError('VarInt extends past the end of the buffer.')
+        return utils.le2i(view[offset + 1:end]), end
+
+    @classmethod
+    def _parse(VarInt, view, offset):
+        '''
+        memoryview, int -> (VarInt, int)
+        Parses a VarInt at offset. Returns it and the offset after it
+        '''
+        ret = VarInt.from_bytes(view[offset:offset + 9])
+        return ret, offset + len(ret)
@@ -1,11 +1,12 @@
 import riemann
 from riemann import utils
 from riemann.tx import shared
-from riemann.tx.tx import TxIn, TxOut
+from riemann.tx.tx import TxIn, TxOut, _LegacySighashParts
+from riemann.tx.tx import _legacy_sighash, _with_script_sigs
 from riemann.tx import zcash_shared as z
 
 
-class SproutTx(z.ZcashByteData):
+class SproutTx(_LegacySighashParts, z.ZcashByteData):
 
     def __init__(self, version, tx_ins, tx_outs, lock_time,
                  tx_joinsplits, joinsplit_pubkey, joinsplit_sig):
@@ -57,21 +58,18 @@ class SproutTx(z.ZcashByteData):
             raise ValueError('Version must be 1 or 2. '
                              'Got: {}'.format(utils.le2i(version)))
 
-        self += version
-        self += shared.VarInt(len(tx_ins))
-        for tx_in in tx_ins:
-            self += tx_in
-        self += shared.VarInt(len(tx_outs))
-        for tx_out in tx_outs:
-            self += tx_out
-        self += lock_time
+        parts = [version, shared.VarInt._encode(len(tx_ins))]
+        parts.extend(tx_ins)
+        parts.append(shared.VarInt._encode(len(tx_outs)))
+        parts.extend(tx_outs)
+        parts.append(lock_time)
 
         if version == utils.i2le_padded(2, 4):
-            self += shared.VarInt(len(tx_joinsplits))
-            for tx_joinsplit in tx_joinsplits:
-                self += tx_joinsplit
-            self += joinsplit_pubkey
-            self += joinsplit_sig
+            parts.append(shared.VarInt._encode(len(tx_joinsplits)))
+            parts.extend(tx_joinsplits)
+            parts.append(joinsplit_pubkey)
+            parts.append(joinsplit_sig)
+        self._write(parts)
 
         self.version = version
         self.tx_ins = tuple(tx_in for tx_in in tx_ins)
@@ -82,19 +80,9 @@ class SproutTx(z.ZcashByteData):
         if version == utils.i2le_padded(2, 4):
             self.joinsplit_pubkey = joinsplit_pubkey
             self.joinsplit_sig = joinsplit_sig
-            # Zcash spec 5.4.1.4 Hsig hash function
-            self.hsigs = (tuple(self._hsig(i)
-                          for i in range(len(self.tx_joinsplits))))
-            self.primary_inputs = (tuple(self._primary_input(i)
-                                   for i in range(len(self.tx_joinsplits))))
         else:
             self.joinsplit_pubkey = None
             self.joinsplit_sig = None
-            self.hsigs = None
-            self.primary_inputs = None
-
-        self.tx_id_le = utils.hash256(self.to_bytes()).hex()
-        self.tx_id = utils.hash256(self.to_bytes())[::-1].hex()
 
         self._make_immutable()
 
@@ -103,6 +91,28 @@ class SproutTx(z.ZcashByteData):
                 'Tx is too large. '
                 'Expect less than 100kB. Got: {} bytes'.format(len(self)))
 
+    @shared.cached_property
+    def tx_id_le(self):
+        return utils.hash256(self.to_bytes()).hex()
+
+    @shared.cached_property
+    def tx_id(self):
+        return utils.hash256(self.to_bytes())[::-1].hex()
+
+    @shared.cached_property
+    def hsigs(self):
+        if self.version != utils.i2le_padded(2, 4):
+            return None
+        # Zcash spec 5.4.1.4 Hsig hash function
+        return tuple(self._hsig(i) for i in range(len(self.tx_joinsplits)))
+
+    @shared.cached_property
+    def primary_inputs(self):
+        if self.version != utils.i2le_padded(2, 4):
+            return None
+        return tuple(self._primary_input(i)
+                     for i in range(len(self.tx_joinsplits)))
+
     def _hsig(self, index):
         return utils.blake2b(
             data=self._hsig_input(index),
@@ -139,22 +149,17 @@ class SproutTx(z.ZcashByteData):
         byte-like -> SproutTx
         '''
         version = byte_string[0:4]
+        view = memoryview(byte_string)
         tx_ins = []
-        tx_ins_num = shared.VarInt.from_bytes(byte_string[4:])
-
-        current = 4 + len(tx_ins_num)
+        tx_ins_num, current = shared.VarInt._parse(view, 4)
         for _ in range(tx_ins_num.number):
-            tx_in = TxIn.from_bytes(byte_string[current:])
-            current += len(tx_in)
+            tx_in, current = TxIn._parse(view, current)
             tx_ins.append(tx_in)
 
         tx_outs = []
-        tx_outs_num = shared.VarInt.from_bytes(byte_string[current:])
-
-        current += len(tx_outs_num)
+        tx_outs_num, current = shared.VarInt._parse(view, current)
         for _ in range(tx_outs_num.number):
-            tx_out = TxOut.from_bytes(byte_string[current:])
-            current += len(tx_out)
+            tx_out, current = TxOut._parse(view, current)
             tx_outs.append(tx_out)
 
         lock_time = byte_string[current:current + 4]
@@ -165,11 +170,11 @@ class SproutTx(z.ZcashByteData):
         joinsplit_sig = None
         if utils.le2i(version) == 2:  # If we expect joinsplits
             tx_joinsplits = []
-            tx_joinsplits_num = shared.VarInt.from_bytes(byte_string[current:])
-            current += len(tx_joinsplits_num)
+            tx_joinsplits_num, current = shared.VarInt._parse(view, current)
 
             for _ in range(tx_joinsplits_num.number):
-                joinsplit = z.SproutJoinsplit.from_bytes(byte_string[current:])
+                joinsplit = z.SproutJoinsplit.from_bytes(
+                    byte_string[current:current + 1802])
                 current += len(joinsplit)
                 tx_joinsplits.append(joinsplit)
             joinsplit_pubkey = byte_string[current:current + 32]
@@ -216,28 +221,32 @@ class SproutTx(z.ZcashByteData):
             joinsplit_sig=(joinsplit_sig if joinsplit_sig is not None
                            else self.joinsplit_sig))
 
-    def _sighash_prep(self, index, script):
+    def with_signatures(self, signatures):
         '''
-        SproutTx, int, byte-like -> SproutTx
-        Sighashes suck
-        Performs the sighash setup described here:
-        https://en.bitcoin.it/wiki/OP_CHECKSIG#How_it_works
-        https://bitcoin.stackexchange.com/questions/3374/how-to-redeem-a-basic-tx
-        We save on complexity by refusing to support OP_CODESEPARATOR
+        SproutTx, dict(int: tuple(byte-like, byte-like)) -> SproutTx
+        Fills in many scriptSigs at once. Keys are input indices, values
+        are (stack_script, redeem_script). Makes one copy.
         '''
-
-        if len(self.tx_ins) == 0:
-            return self.copy(joinsplit_sig=b'')
-        # 0 out scripts in tx_ins
-        copy_tx_ins = [tx_in.copy(stack_script=b'', redeem_script=b'')
-                       for tx_in in self.tx_ins]
-
-        # NB: The script for the current transaction input in txCopy is set to
-        #     subScript (lead in by its length as a var-integer encoded!)
-        copy_tx_ins[index] = \
-            copy_tx_ins[index].copy(stack_script=b'', redeem_script=script)
-
-        return self.copy(tx_ins=copy_tx_ins, joinsplit_sig=b'')
+        for signature in signatures.values():
+            if not isinstance(signature, tuple):
+                raise ValueError(
+                    'SproutTx does not support witnesses. '
+                    'Expected (stack_script, redeem_script). Got {}.'
+                    .format(type(signature).__name__))
+        return self.copy(
+            tx_ins=_with_script_sigs(self.tx_ins, signatures))
+
+    @shared.cached_property
+    def _legacy_tail(self):
+        '''
+        lock_time and the joinsplits. The joinsplit_sig is left out
+        '''
+        if self.joinsplit_pubkey is None:
+            return self.lock_time
+        return b''.join(
+            [self.lock_time, shared.VarInt._encode(len(self.tx_joinsplits))]
+            + [js.to_bytes() for js in self.tx_joinsplits]
+            + [self.joinsplit_pubkey])
 
     def sighash_all(self, index=0, script=None,
                     prevout_value=None, anyone_can_pay=False):
@@ -255,12 +264,12 @@ class SproutTx(z.ZcashByteData):
                                         sighash_type=shared.SIGHASH_ALL,
                                         anyone_can_pay=anyone_can_pay)
 
-        copy_tx = self._sighash_prep(index=index, script=script)
         if anyone_can_pay:
-            return self._sighash_anyone_can_pay(
-                index=index, copy_tx=copy_tx, sighash_type=shared.SIGHASH_ALL)
-
-        return self._sighash_final_hashing(copy_tx, shared.SIGHASH_ALL)
+            self._check_anyone_can_pay()
+        script = script if script is not None else b''
+        self.validate_bytes(script, None)
+        return _legacy_sighash(self, index, script,
+                               shared.SIGHASH_ALL, anyone_can_pay)
 
     def sighash_single(self, index=0, script=None,
                        prevout_value=None, anyone_can_pay=False):
@@ -273,7 +282,7 @@ class SproutTx(z.ZcashByteData):
         https://github.com/petertodd/python-bitcoinlib/blob/051ec4e28c1f6404fd46713c2810d4ebbed38de4/bitcoin/core/script.py#L913-L965
         '''
 
-        if self.tx_joinsplits is not None:
+        if len(self.tx_joinsplits) != 0:
             raise ValueError('Sighash single not permitted with joinsplits.')
 
         if index >= len(self.tx_outs):
@@ -287,57 +296,17 @@ class SproutTx(z.ZcashByteData):
                                         sighash_type=shared.SIGHASH_SINGLE,
                                         anyone_can_pay=anyone_can_pay)
 
-        copy_tx = self._sighash_prep(index=index, script=script)
-
-        # Remove outputs after the one we're signing
-        # Other tx_outs are set to -1 value and null scripts
-        copy_tx_outs = copy_tx.tx_outs[:index + 1]
-        copy_tx_outs = [TxOut(value=b'\xff' * 8, output_script=b'')
-                        for _ in copy_tx.tx_ins]  # Null them all
-        copy_tx_outs[index] = copy_tx.tx_outs[index]  # Fix the current one
-
-        # Other tx_ins sequence numbers are set to 0
-        copy_tx_ins = [tx_in.copy(sequence=b'\x00\x00\x00\x00')
-                       for tx_in in copy_tx.tx_ins]  # Set all to 0
-        copy_tx_ins[index] = copy_tx.tx_ins[index]  # Fix the current one
-
-        copy_tx = copy_tx.copy(
-            tx_ins=copy_tx_ins,
-            tx_outs=copy_tx_outs)
-
-        if anyone_can_pay:  # Forward onwards
-            return self._sighash_anyone_can_pay(
-                index, copy_tx, shared.SIGHASH_SINGLE)
-
-        return self._sighash_final_hashing(copy_tx, shared.SIGHASH_SINGLE)
+        if anyone_can_pay:
+            self._check_anyone_can_pay()
+        script = script if script is not None else b''
+        self.validate_bytes(script, None)
+        return _legacy_sighash(self, index, script,
+                               shared.SIGHASH_SINGLE, anyone_can_pay)
 
-    def _sighash_anyone_can_pay(self, index, copy_tx, sighash_type):
+    def _check_anyone_can_pay(self):
         '''
-        int, SproutTx, int -> bytes
-        Applies SIGHASH_ANYONECANPAY procedure.
-        Should be called by another SIGHASH procedure.
-        Not on its own.
         https://en.bitcoin.it/wiki/OP_CHECKSIG#Procedure_for_Hashtype_SIGHASH_ANYONECANPAY
         '''
-
-        if self.tx_joinsplits is not None:
+        if len(self.tx_joinsplits) != 0:
             raise ValueError(
                 'Sighash anyonecanpay not permitted with joinsplits.')
-
-        # The txCopy input vector is resized to a length of one.
-        copy_tx_ins = [copy_tx.tx_ins[index]]
-        copy_tx = copy_tx.copy(tx_ins=copy_tx_ins)
-
-        return self._sighash_final_hashing(
-            copy_tx, sighash_type | shared.SIGHASH_ANYONECANPAY)
-
-    def _sighash_final_hashing(self, copy_tx, sighash_type):
-        '''
-        SproutTx, int -> bytes
-        Returns the hash that should be signed
-        https://en.bitcoin.it/wiki/OP_CHECKSIG#Procedure_for_Hashtype_SIGHASH_ANYONECANPAY
-        '''
-        sighash = z.ZcashByteData()
-        sighash += copy_tx.to_bytes()
-        sighash += utils.i2le_padded(sighash_type, 4)
-        return utils.hash256(sighash.to_bytes())
@@ -1,14 +1,186 @@
+import hashlib
 import riemann
 from riemann import utils
 from riemann.tx import shared
 from riemann.script import serialization
-from riemann.tx.shared import ByteData, VarInt
+from riemann.script.opcodes import compiled_tables
+from riemann.tx.shared import ByteData, VarInt, cached_property
+
+
+def _layout(view, offset):
+    '''
+    memoryview, int -> (bool, list(int), list(int), list(int), int)
+    Walks the VarInt structure of the Tx at offset without building objects.
+    Returns the segwit flag, the input, output and witness boundaries, and
+    the offset after the Tx. Each boundary list holds the start of every
+    item followed by the end of the last one. Witnesses are None if the Tx
+    has no segwit flag.
+    Raises IndexError if the view ends before the Tx does.
+    '''
+    read = VarInt._read_number
+    segwit = view[offset + 4:offset + 6] == riemann.network.SEGWIT_TX_FLAG
+
+    tx_ins_num, current = read(view, offset + (6 if segwit else 4))
+    tx_ins = [current]
+    for _ in range(tx_ins_num):
+        script_len, current = read(view, current + 36)
+        current += script_len + 4
+        tx_ins.append(current)
+
+    tx_outs_num, current = read(view, current)
+    tx_outs = [current]
+    for _ in range(tx_outs_num):
+        script_len, current = read(view, current + 8)
+        current += script_len
+        tx_outs.append(current)
+
+    tx_witnesses = None
+    if segwit:
+        tx_witnesses = [current]
+        for _ in range(tx_ins_num):
+            stack_len, current = read(view, current)
+            for _ in range(stack_len):
+                item_len, current = read(view, current)
+                current += item_len
+            tx_witnesses.append(current)
+
+    end = current + 4
+    if end > len(view):
+        raise IndexError('Tx extends past the end of the buffer.')
+    return segwit, tx_ins, tx_outs, tx_witnesses, end
+
+
+def iter_from_stream(stream, chunk_size=1 << 16):
+    '''
+    file-like, int -> generator(Tx)
+    Parses back-to-back serialized Txs from a binary stream.
+    Reads chunk_size bytes at a time with readinto. At most one partial Tx
+    and one chunk are buffered, so memory use does not grow with the stream.
+    '''
+    chunk = bytearray(chunk_size)
+    buf = bytearray()
+    while True:
+        n = stream.readinto(chunk)
+        if not n:
+            break
+        buf += memoryview(chunk)[:n]
+
+        offset = 0
+        with memoryview(buf) as view:
+            while offset < len(view):
+                try:
+                    end = _layout(view, offset)[-1]
+                except IndexError:
+                    break  # Partial Tx. Wait for the next chunk
+                yield Tx._parse(view[:end], offset)[0]
+                offset = end
+        del buf[:offset]
+
+    if len(buf) != 0:
+        raise ValueError(
+            'Stream ended inside a Tx. Got {} trailing bytes.'
+            .format(len(buf)))
+
+
+def _id_layout(raw_tx):
+    '''
+    byte-like -> (memoryview, bool, int, int)
+    Lays out a single serialized Tx for hashing. Returns the view, the segwit
+    flag, and the start and end of the witnesses
+    '''
+    view = memoryview(raw_tx)
+    try:
+        segwit, _, tx_outs, tx_witnesses, end = _layout(view, 0)
+    except IndexError:
+        raise ValueError('Tx extends past the end of the buffer.')
+    if end != len(view):
+        raise ValueError(
+            'Expected a single serialized Tx. '
+            'Got {} trailing bytes.'.format(len(view) - end))
+    if segwit:
+        return view, True, tx_witnesses[0], tx_witnesses[-1]
+    return view, False, end - 4, end - 4
+
+
+def _txid_le(view, segwit, witness_start):
+    if not segwit:
+        return utils.hash256(view)
+    h = hashlib.sha256(view[:4])  # Skip the flag and the witnesses
+    h.update(view[6:witness_start])
+    h.update(view[-4:])
+    return utils.sha256(h.digest())
+
+
+def txid_from_bytes(raw_tx):
+    '''
+    byte-like -> bytes
+    The tx_id of a serialized Tx, without parsing it into objects.
+    Hashes the non-witness byte ranges of the buffer in place.
+    '''
+    view, segwit, witness_start, _ = _id_layout(raw_tx)
+    return utils.change_endianness(_txid_le(view, segwit, witness_start))
+
+
+def wtxid_from_bytes(raw_tx):
+    '''
+    byte-like -> bytes
+    The wtx_id of a serialized Tx, without parsing it into objects.
+    None if the Tx has no segwit flag, as for Tx.wtx_id
+    '''
+    view, segwit, _, _ = _id_layout(raw_tx)
+    if not segwit:
+        return None
+    return utils.change_endianness(utils.hash256(view))
+
+
+def txids_from_bytes(raw_txs):
+    '''
+    iterable(byte-like) -> list(bytes)
+    txid_from_bytes for many serialized Txs
+    '''
+    return [txid_from_bytes(raw_tx) for raw_tx in raw_txs]
+
+
+def wtxids_from_bytes(raw_txs):
+    '''
+    iterable(byte-like) -> list(bytes)
+    wtxid_from_bytes for many serialized Txs
+    '''
+    return [wtxid_from_bytes(raw_tx) for raw_tx in raw_txs]
+
+
+def _same_prevouts(tx_ins, old_tx_ins, changed):
+    '''
+    list(TxIn), list(TxIn), list(int) -> bool
+    Whether the inputs at the changed indices, as from
+    shared._changed_indices, have the same outpoints and sequences as the
+    old ones. Hashes of prevouts and sequences survive e.g. new scripts.
+    '''
+    return changed is not None and all(
+        tx_ins[i][:36] == old_tx_ins[i][:36]
+        and tx_ins[i].sequence == old_tx_ins[i].sequence
+        for i in changed)
+
+
+def _with_script_sigs(tx_ins, script_sigs):
+    '''
+    tuple(TxIn), dict(int: tuple(byte-like, byte-like)) -> list(TxIn)
+    Copies of the inputs at the keys of script_sigs, with the new
+    (stack_script, redeem_script) pairs. The other inputs are the same
+    objects, so copy() reuses their bytes and hashes.
+    '''
+    tx_ins = list(tx_ins)
+    for index, (stack_script, redeem_script) in script_sigs.items():
+        tx_ins[index] = tx_ins[index].copy(
+            stack_script=stack_script, redeem_script=redeem_script)
+    return tx_ins
 
 
 class Outpoint(ByteData):
     '''
     NB: Args must be little-endian
     '''
+    __slots__ = ()
 
     def __init__(self, tx_id, index):
         super().__init__()
@@ -16,15 +188,24 @@ class Outpoint(ByteData):
         self.validate_bytes(tx_id, 32)
         self.validate_bytes(index, 4)
 
-        self += tx_id
-        self += index
+        self._build(tx_id, index)
 
-        self.tx_id = tx_id
-        self.index = index
+    def _build(self, tx_id, index):
+        self._write([tx_id, index])
 
         self._make_immutable()
 
+    @property
+    def tx_id(self):
+        return self._bytes[:32]
+
+    @property
+    def index(self):
+        return self._bytes[32:36]
+
     def copy(self, tx_id=None, index=None):
+        if tx_id is None and index is None:
+            return Outpoint._from_trusted_parts(self.tx_id, self.index)
         return Outpoint(
             tx_id=tx_id if tx_id is not None else self.tx_id,
             index=index if index is not None else self.index)
@@ -38,13 +219,29 @@ class Outpoint(ByteData):
             tx_id=byte_string[:32],
             index=byte_string[32:36])
 
+    @classmethod
+    def _parse(Outpoint, view, offset):
+        '''
+        memoryview, int -> (Outpoint, int)
+        Parses an Outpoint at offset. Returns it and the offset after it
+        '''
+        if offset + 36 > len(view):
+            raise ValueError('Outpoint extends past the end of the buffer.')
+        outpoint = Outpoint._from_trusted_parts(
+            tx_id=bytes(view[offset:offset + 32]),
+            index=bytes(view[offset + 32:offset + 36]))
+        return outpoint, offset + 36
+
 
 class TxIn(ByteData):
     '''
     Outpoint, byte-like, byte-like, byte-like -> TxIn
     stack_script and redeem_script should already be serialized
     NB: sequence must be little-endian
+    Fields are read from the serialization. Only the offset of the
+    redeem_script is stored. Parsed inputs find it on first use.
     '''
+    __slots__ = ('_redeem_start', '_opcode_names')
 
     def __init__(self, outpoint, stack_script, redeem_script, sequence):
         super().__init__()
@@ -59,26 +256,64 @@ class TxIn(ByteData):
                              'Expected <= 1650 bytes. Got {} bytes.'
                              .format(len(stack_script) + len(redeem_script)))
 
-        self += outpoint
-        self += VarInt(len(stack_script) + len(redeem_script))
-        self += stack_script
-        self += redeem_script
-        self += sequence
+        self._build(outpoint, stack_script, redeem_script, sequence)
 
-        self.outpoint = outpoint
-        self.script_len = len(stack_script + redeem_script)
-        self.stack_script = stack_script
-        self.redeem_script = redeem_script
-        self.script_sig = self.stack_script + self.redeem_script
-        self.sequence = sequence
+    def _build(self, outpoint, stack_script, redeem_script, sequence):
+        script_len = VarInt._encode(len(stack_script) + len(redeem_script))
+        self._write(
+            [outpoint, script_len, stack_script, redeem_script, sequence])
+        self._redeem_start = 36 + len(script_len) + len(stack_script)
 
         self._make_immutable()
 
+    @property
+    def outpoint(self):
+        return Outpoint._from_trusted_parts(
+            self._bytes[:32], self._bytes[32:36])
+
+    @property
+    def script_len(self):
+        return len(self) - 4 - self._script_start
+
+    @property
+    def _script_start(self):
+        return VarInt._read_number(self._bytes, 36)[1]
+
+    @property
+    def script_sig(self):
+        return self._bytes[self._script_start:-4]
+
+    @property
+    def _redeem_offset(self):
+        if self._redeem_start is None:
+            script_start = self._script_start
+            split = TxIn._find_redeem_script(
+                self._bytes[script_start:-4], self._opcode_names)
+            object.__setattr__(self, '_redeem_start', script_start + split)
+        return self._redeem_start
+
+    @property
+    def stack_script(self):
+        return self._bytes[self._script_start:self._redeem_offset]
+
+    @property
+    def redeem_script(self):
+        return self._bytes[self._redeem_offset:-4]
+
+    @property
+    def sequence(self):
+        return self._bytes[-4:]
+
     def copy(self, outpoint=None, stack_script=None,
              redeem_script=None, sequence=None):
         '''
         TxIn -> TxIn
         '''
+        if (outpoint is None and stack_script is None
+                and redeem_script is None and sequence is None):
+            return TxIn._from_trusted_parts(
+                self.outpoint, self.stack_script,
+                self.redeem_script, self.sequence)
         return TxIn(
             outpoint=outpoint if outpoint is not None else self.outpoint,
             stack_script=(stack_script if stack_script is not None
@@ -88,30 +323,26 @@ class TxIn(ByteData):
             sequence=sequence if sequence is not None else self.sequence)
 
     def is_p2sh(self):
-        return self.redeem_script is not b''
+        return self.redeem_script != b''
 
-    @classmethod
-    def _parse_script_sig(TxIn, script_sig):
-        '''
-        byte_string -> (byte_string, byte_string)
-        '''
-        # Is there a better way to do this?
-        stack_script = script_sig
-        redeem_script = b''
-        try:
-            # If the last entry deserializes, it's a p2sh input
-            # There is a vanishingly small edge case where the pubkey
-            #   forms a deserializable script.
-            # Edge case: serialization errors on CODESEPARATOR
-            deserialized = serialization.deserialize(script_sig)
-            items = deserialized.split()
-            serialization.hex_deserialize(items[-1])
-            stack_script = serialization.serialize(' '.join(items[:-1]))
-            redeem_script = serialization.serialize(items[-1])
-        except (IndexError, ValueError, NotImplementedError):
-            pass
-
-        return stack_script, redeem_script
+    @staticmethod
+    def _find_redeem_script(script_sig, int_to_code):
+        '''
+        byte_string, tuple -> int
+        Where the redeem_script starts in the script_sig. The end of the
+        script_sig if there is none.
+        '''
+        # If the last op is a push that deserializes, it's a p2sh input
+        # There is a vanishingly small edge case where the pubkey
+        #   forms a deserializable script.
+        # Edge case: serialization errors on CODESEPARATOR
+        last = serialization._last_push(script_sig, int_to_code)
+        if last is None or last[1] in (-1, len(script_sig)):
+            return len(script_sig)
+        if serialization._last_push(
+                memoryview(script_sig)[last[1]:], int_to_code) is None:
+            return len(script_sig)
+        return last[0]
 
     @classmethod
     def from_bytes(TxIn, byte_string):
@@ -119,30 +350,46 @@ class TxIn(ByteData):
         byte_string -> TxIn
         parses a TxIn from a byte-like object
         '''
-        outpoint = Outpoint.from_bytes(byte_string[:36])
+        return TxIn._parse(memoryview(byte_string), 0)[0]
+
+    @classmethod
+    def _parse(TxIn, view, offset):
+        '''
+        memoryview, int -> (TxIn, int)
+        Parses a TxIn at offset. Returns it and the offset after it
+        '''
+        outpoint, current = Outpoint._parse(view, offset)
 
-        script_sig_len = VarInt.from_bytes(byte_string[36:45])
-        script_start = 36 + len(script_sig_len)
+        script_sig_len, script_start = VarInt._parse(view, current)
         script_end = script_start + script_sig_len.number
-        script_sig = byte_string[script_start:script_end]
+        if script_end + 4 > len(view):
+            raise ValueError('TxIn extends past the end of the buffer.')
+        if script_sig_len.number > 1650:
+            raise ValueError('Input script_sig is too long. '
+                             'Expected <= 1650 bytes. Got {} bytes.'
+                             .format(script_sig_len.number))
+        script_sig = bytes(view[script_start:script_end])
 
-        sequence = byte_string[script_end:script_end + 4]
-        if script_sig == b'':
-            stack_script = b''
-            redeem_script = b''
-        else:
-            stack_script, redeem_script = TxIn._parse_script_sig(script_sig)
-        return TxIn(
+        sequence = bytes(view[script_end:script_end + 4])
+        tx_in = TxIn._from_trusted_parts(
             outpoint=outpoint,
-            stack_script=stack_script,
-            redeem_script=redeem_script,
+            stack_script=script_sig,
+            redeem_script=b'',
             sequence=sequence)
+        if script_sig != b'':
+            # Split the script_sig when stack_script or redeem_script is
+            # first read, with this network's opcodes
+            object.__setattr__(tx_in, '_redeem_start', None)
+            object.__setattr__(tx_in, '_opcode_names',
+                               compiled_tables(riemann.network)[1])
+        return tx_in, script_end + 4
 
 
 class TxOut(ByteData):
     '''
     NB: value must be little-endian
     '''
+    __slots__ = ()
 
     def __init__(self, value, output_script):
         super().__init__()
@@ -150,17 +397,29 @@ class TxOut(ByteData):
         self.validate_bytes(value, 8)
         self.validate_bytes(output_script, None)
 
-        self += value
-        self += VarInt(len(output_script))
-        self += output_script
+        self._build(value, output_script)
 
-        self.value = value
-        self.output_script_len = len(output_script)
-        self.output_script = output_script
+    def _build(self, value, output_script):
+        self._write(
+            [value, VarInt._encode(len(output_script)), output_script])
 
         self._make_immutable()
 
+    @property
+    def value(self):
+        return self._bytes[:8]
+
+    @property
+    def output_script_len(self):
+        return VarInt._read_number(self._bytes, 8)[0]
+
+    @property
+    def output_script(self):
+        return self._bytes[VarInt._read_number(self._bytes, 8)[1]:]
+
     def copy(self, value=None, output_script=None):
+        if value is None and output_script is None:
+            return TxOut._from_trusted_parts(self.value, self.output_script)
         return TxOut(
             value=value if value is not None else self.value,
             output_script=(output_script if output_script is not None
@@ -168,19 +427,29 @@ class TxOut(ByteData):
 
     @classmethod
     def from_bytes(TxOut, byte_string):
-        n = VarInt.from_bytes(byte_string[8:])
-        script_start = 8 + len(n)
+        return TxOut._parse(memoryview(byte_string), 0)[0]
+
+    @classmethod
+    def _parse(TxOut, view, offset):
+        '''
+        memoryview, int -> (TxOut, int)
+        Parses a TxOut at offset. Returns it and the offset after it
+        '''
+        n, script_start = VarInt._parse(view, offset + 8)
         script_end = script_start + n.number
-        if n.number < 0xfc:
-            return TxOut(
-                value=byte_string[:8],
-                output_script=byte_string[script_start:script_end])
-        else:
+        if n.number >= 0xfc:
             raise NotImplementedError(
                 'No support for abnormally long pk_scripts.')
+        if script_end > len(view):
+            raise ValueError('TxOut extends past the end of the buffer.')
+        tx_out = TxOut._from_trusted_parts(
+            value=bytes(view[offset:offset + 8]),
+            output_script=bytes(view[script_start:script_end]))
+        return tx_out, script_end
 
 
 class WitnessStackItem(ByteData):
+    __slots__ = ()
 
     def __init__(self, item):
         super().__init__()
@@ -190,23 +459,48 @@ class WitnessStackItem(ByteData):
             raise ValueError(
                 'Item is too large. Expected <=520 bytes. '
                 'Got: {} bytes'.format(len(item)))
-        self += VarInt(len(item))
-        self += item
 
-        self.item_len = len(item)
-        self.item = item
+        self._build(item)
+
+    def _build(self, item):
+        self._write([VarInt._encode(len(item)), item])
 
         self._make_immutable()
 
+    @property
+    def item_len(self):
+        return VarInt._read_number(self._bytes, 0)[0]
+
+    @property
+    def item(self):
+        return self._bytes[VarInt._read_number(self._bytes, 0)[1]:]
+
     @classmethod
     def from_bytes(WitnessStackItem, byte_string):
-        n = VarInt.from_bytes(byte_string)
-        item_start = len(n)
+        return WitnessStackItem._parse(memoryview(byte_string), 0)[0]
+
+    @classmethod
+    def _parse(WitnessStackItem, view, offset):
+        '''
+        memoryview, int -> (WitnessStackItem, int)
+        Parses a WitnessStackItem at offset. Returns it and the offset after it
+        '''
+        n, item_start = VarInt._parse(view, offset)
         item_end = item_start + n.number
-        return WitnessStackItem(byte_string[item_start:item_end])
+        if item_end > len(view):
+            raise ValueError(
+                'WitnessStackItem extends past the end of the buffer.')
+        if n.number > 520:
+            raise ValueError(
+                'Item is too large. Expected <=520 bytes. '
+                'Got: {} bytes'.format(n.number))
+        item = WitnessStackItem._from_trusted_parts(
+            bytes(view[item_start:item_end]))
+        return item, item_end
 
 
 class InputWitness(ByteData):
+    __slots__ = ()
 
     def __init__(self, stack):
         '''
@@ -220,32 +514,164 @@ class InputWitness(ByteData):
                     'Expected WitnessStackItem. Got {}'
                     .format(item))
 
-        self += VarInt(len(stack))
-        for item in stack:
-            self += item
+        self._build(stack)
 
-        self.stack_len = len(stack)
-        self.stack = [item for item in stack]
+    def _build(self, stack):
+        self._write([VarInt._encode(len(stack))] + list(stack))
 
         self._make_immutable()
 
+    @property
+    def stack_len(self):
+        return VarInt._read_number(self._bytes, 0)[0]
+
+    @property
+    def stack(self):
+        '''
+        Stack items are re-read from the serialization on each access
+        '''
+        view = memoryview(self._bytes)
+        stack_len, current = VarInt._read_number(view, 0)
+        items = []
+        for _ in range(stack_len):
+            item, current = WitnessStackItem._parse(view, current)
+            items.append(item)
+        return items
+
     @classmethod
     def from_bytes(InputWitness, byte_string):
-        stack_items = VarInt.from_bytes(byte_string)
-        item_start = len(stack_items)
+        return InputWitness._parse(memoryview(byte_string), 0)[0]
+
+    @classmethod
+    def _parse(InputWitness, view, offset):
+        '''
+        memoryview, int -> (InputWitness, int)
+        Parses an InputWitness at offset. Returns it and the offset after it
+        '''
+        stack_items, current = VarInt._parse(view, offset)
         items = []
         while len(items) < stack_items.number:
-            item = WitnessStackItem.from_bytes(byte_string[item_start:])
-            item_start += len(item)
+            item, current = WitnessStackItem._parse(view, current)
             items.append(item)
-        return InputWitness(items)
+        return InputWitness._from_trusted_parts(items), current
 
     def copy(self, stack=None):
+        if stack is None:
+            return InputWitness._from_trusted_parts(self.stack)
         return InputWitness(
             stack=stack if stack is not None else self.stack)
 
 
-class Tx(ByteData):
+# A blanked SIGHASH_SINGLE output. -1 value and an empty script
+_NULL_TX_OUT = b'\xff' * 8 + b'\x00'
+
+
+def _legacy_sighash(tx, index, script, sighash_type, anyone_can_pay):
+    '''
+    Tx or SproutTx, int, byte-like, int, bool -> bytes
+    Sighashes suck
+    Streams the legacy pre-image into sha256, piece by piece. The pieces
+    are slices of the tx's own serialization, so we build no Tx, TxIn or
+    TxOut. The tx provides:
+        _legacy_prefix      sha256 midstate over version and input count
+        _legacy_blank_ins   every input with an empty script_sig, 41 bytes
+        _legacy_outputs     output count and outputs
+        _legacy_tail        everything from lock_time on
+    https://en.bitcoin.it/wiki/OP_CHECKSIG#How_it_works
+    We save on complexity by refusing to support OP_CODESEPARATOR
+    '''
+    if isinstance(script, ByteData):
+        script = script.to_bytes()
+    tx_ins = tx.tx_ins
+    blank_ins = tx._legacy_blank_ins
+
+    if sighash_type == shared.SIGHASH_SINGLE:
+        # Other tx_ins sequence numbers are set to 0
+        blank_ins = bytearray(blank_ins)
+        for i in range(37, 41):
+            blank_ins[i::41] = bytes(len(tx_ins))
+        # Remove outputs after the one we're signing
+        # Other tx_outs are set to -1 value and null scripts
+        outputs = b''.join((VarInt._encode(index + 1),
+                            _NULL_TX_OUT * index,
+                            tx.tx_outs[index].to_bytes()))
+    else:
+        outputs = tx._legacy_outputs
+
+    if anyone_can_pay:
+        # The txCopy input vector is resized to a length of one.
+        sighash_type |= shared.SIGHASH_ANYONECANPAY
+        h = hashlib.sha256(tx.version)
+        h.update(b'\x01')
+    else:
+        h = tx._legacy_prefix.copy()
+
+    if len(tx_ins) != 0:
+        # NB: The script for the current transaction input in txCopy is set
+        #     to subScript (lead in by its length as a var-integer encoded!)
+        tx_in = tx_ins[index]
+        blanks = memoryview(blank_ins)
+        if not anyone_can_pay:
+            h.update(blanks[:index * 41])
+        h.update(tx_in[:36])
+        h.update(VarInt._encode(len(script)))
+        h.update(script)
+        h.update(tx_in.sequence)
+        if not anyone_can_pay:
+            h.update(blanks[(index + 1) * 41:])
+
+    h.update(outputs)
+    h.update(tx._legacy_tail)
+    h.update(utils.i2le_padded(sighash_type, 4))
+    return utils.sha256(h.digest())
+
+
+def _spent_snapshot(prevout_values, prevout_scripts):
+    '''
+    list(byte-like), list(byte-like) -> tuple
+    Immutable copies of the prevouts, to notice changes made in place
+    '''
+    return (tuple(bytes(value) for value in prevout_values),
+            tuple(bytes(script) for script in prevout_scripts))
+
+
+def _spent_output_digests(prevout_values, prevout_scripts):
+    '''
+    list(byte-like), list(byte-like) -> (bytes, bytes)
+    The BIP341 sha_amounts and sha_scriptpubkeys
+    '''
+    scripts = [bytes(script) for script in prevout_scripts]
+    return (
+        utils.sha256(b''.join(bytes(value) for value in prevout_values)),
+        utils.sha256(b''.join(VarInt._encode(len(script)) + script
+                              for script in scripts)))
+
+
+class _LegacySighashParts():
+    '''
+    The pieces of the legacy pre-image that _legacy_sighash reuses across
+    inputs. Shared by Tx and SproutTx, which add their own _legacy_tail
+    '''
+    __slots__ = ()
+
+    @cached_property
+    def _legacy_prefix(self):
+        h = hashlib.sha256(self.version)
+        h.update(VarInt._encode(len(self.tx_ins)))
+        return h
+
+    @cached_property
+    def _legacy_blank_ins(self):
+        return b''.join(tx_in[:36] + b'\x00' + tx_in.sequence
+                        for tx_in in self.tx_ins)
+
+    @cached_property
+    def _legacy_outputs(self):
+        return b''.join([VarInt._encode(len(self.tx_outs))]
+                        + [tx_out.to_bytes() for tx_out in self.tx_outs])
+
+
+class Tx(_LegacySighashParts, ByteData):
     '''
     byte-like, byte-like, list(TxIn),
     list(TxOut), list(InputWitness), byte-like -> Tx
@@ -299,45 +725,57 @@ class Tx(ByteData):
                     'Expected instance of TxOut. Got {}'
                     .format(type(tx_out).__name__))
 
-        self += version
+        self._build(version, flag, tx_ins, tx_outs, tx_witnesses, lock_time)
+
+    def _build(self, version, flag, tx_ins, tx_outs, tx_witnesses, lock_time):
+        parts = [version]
         if flag is not None:
-            self += flag
-        self += VarInt(len(tx_ins))
-        for tx_in in tx_ins:
-            self += tx_in
-        self += VarInt(len(tx_outs))
-        for tx_out in tx_outs:
-            self += tx_out
+            parts.append(flag)
+        parts.append(VarInt._encode(len(tx_ins)))
+        parts.extend(tx_ins)
+        parts.append(VarInt._encode(len(tx_outs)))
+        parts.extend(tx_outs)
         if tx_witnesses is not None:
-            for witness in tx_witnesses:
-                self += witness
-        self += lock_time
-
+            parts.extend(tx_witnesses)
+        parts.append(lock_time)
+        self._write(parts)
+        self._set_fields(
+            version, flag, tx_ins, tx_outs, tx_witnesses, lock_time)
+
+    def _set_fields(self, version, flag, tx_ins, tx_outs, tx_witnesses,
+                    lock_time):
         self.version = version
         self.flag = flag
         self.tx_ins_len = len(tx_ins)
-        self.tx_ins = tuple(tx_in for tx_in in tx_ins)
+        self.tx_ins = tuple(tx_ins)
         self.tx_outs_len = len(tx_outs)
-        self.tx_outs = tuple(tx_out for tx_out in tx_outs)
+        self.tx_outs = tuple(tx_outs)
         self.tx_witnesses_len = self.tx_ins_len
         self.tx_witnesses = \
-            tuple(wit for wit in tx_witnesses) if tx_witnesses is not None \
-            else None
+            tuple(tx_witnesses) if tx_witnesses is not None else None
         self.lock_time = lock_time
 
-        if flag is not None:
-            self.tx_id_le = utils.hash256(self.no_witness())
-            self.wtx_id_le = utils.hash256(self.to_bytes())
-            self.tx_id = utils.change_endianness(self.tx_id_le)
-            self.wtx_id = utils.change_endianness(self.wtx_id_le)
+        self._make_immutable()
 
-        else:
-            self.tx_id_le = utils.hash256(self.to_bytes())
-            self.tx_id = utils.change_endianness(self.tx_id_le)
-            self.wtx_id = None
-            self.wtx_le = None
+    @cached_property
+    def tx_id_le(self):
+        return utils.hash256(self.no_witness())
 
-        self._make_immutable()
+    @cached_property
+    def tx_id(self):
+        return utils.change_endianness(self.tx_id_le)
+
+    @cached_property
+    def wtx_id_le(self):
+        if self.flag is None:
+            return None
+        return utils.hash256(self.to_bytes())
+
+    @cached_property
+    def wtx_id(self):
+        if self.flag is None:
+            return None
+        return utils.change_endianness(self.wtx_id_le)
 
     @classmethod
     def from_hex(Tx, hex_string):
@@ -345,64 +783,87 @@ class Tx(ByteData):
 
     @classmethod
     def from_bytes(Tx, byte_string):
-        version = byte_string[0:4]
-        if byte_string[4:6] == riemann.network.SEGWIT_TX_FLAG:
-            tx_ins_num_loc = 6
+        return Tx._parse(memoryview(byte_string), 0)[0]
+
+    @classmethod
+    def read_from(Tx, byte_string, offset=0):
+        '''
+        byte-like, int -> (Tx, int)
+        Parses the Tx starting at offset in a buffer of back-to-back Txs.
+        Returns it and the offset of the next one.
+        '''
+        return Tx._parse(memoryview(byte_string), offset)
+
+    @classmethod
+    def _parse(Tx, view, offset):
+        '''
+        memoryview, int -> (Tx, int)
+        Parses a Tx at offset. Returns it and the offset after it
+        Advances a cursor over the view instead of copying the tail of the
+        buffer for each component. Only final field values become bytes.
+        '''
+        version = bytes(view[offset:offset + 4])
+        if view[offset + 4:offset + 6] == riemann.network.SEGWIT_TX_FLAG:
+            tx_ins_num_loc = offset + 6
             flag = riemann.network.SEGWIT_TX_FLAG
         else:
-            tx_ins_num_loc = 4
+            tx_ins_num_loc = offset + 4
             flag = None
         tx_ins = []
-        tx_ins_num = VarInt.from_bytes(byte_string[tx_ins_num_loc:])
-
-        current = tx_ins_num_loc + len(tx_ins_num)
+        tx_ins_num, current = VarInt._parse(view, tx_ins_num_loc)
 
         for _ in range(tx_ins_num.number):
-            tx_in = TxIn.from_bytes(byte_string[current:])
-            current += len(tx_in)
+            tx_in, current = TxIn._parse(view, current)
             tx_ins.append(tx_in)
 
         tx_outs = []
-        tx_outs_num = VarInt.from_bytes(byte_string[current:])
-        current += len(tx_outs_num)
+        tx_outs_num, current = VarInt._parse(view, current)
         for _ in range(tx_outs_num.number):
-            tx_out = TxOut.from_bytes(byte_string[current:])
-            current += len(tx_out)
+            tx_out, current = TxOut._parse(view, current)
             tx_outs.append(tx_out)
 
-        if flag and len(byte_string[current:]) > 4:
+        if flag and len(view) - current > 4:
             tx_witnesses = []
             tx_witnesses_num = tx_ins_num
             for _ in range(tx_witnesses_num.number):
-                tx_witness = InputWitness.from_bytes(byte_string[current:])
-                current += len(tx_witness)
+                tx_witness, current = InputWitness._parse(view, current)
                 tx_witnesses.append(tx_witness)
         else:
             tx_witnesses = None
 
-        lock_time = byte_string[current:current + 4]
-        return Tx(
+        if current + 4 > len(view):
+            raise ValueError('Tx extends past the end of the buffer.')
+        lock_time = bytes(view[current:current + 4])
+        if min(len(tx_ins), len(tx_outs)) == 0:
+            raise ValueError('Too few inputs or outputs. Stop that.')
+        tx = Tx._from_trusted_parts(
             version=version,
             flag=flag,
             tx_ins=tx_ins,
             tx_outs=tx_outs,
             tx_witnesses=tx_witnesses,
             lock_time=lock_time)
+        return tx, current + 4
 
     def no_witness(self):
         '''
         Tx -> bytes
         '''
-        tx = bytes()
-        tx += self.version
-        tx += VarInt(len(self.tx_ins)).to_bytes()
-        for tx_in in self.tx_ins:
-            tx += tx_in.to_bytes()
-        tx += VarInt(len(self.tx_outs)).to_bytes()
-        for tx_out in self.tx_outs:
-            tx += tx_out.to_bytes()
-        tx += self.lock_time
-        return bytes(tx)
+        return self._no_witness
+
+    @cached_property
+    def _no_witness(self):
+        '''
+        The serialization without flag and witnesses, sliced from our own
+        '''
+        if self.flag is None:
+            return self.to_bytes()
+        witnesses_len = 0
+        if self.tx_witnesses is not None:
+            witnesses_len = sum(len(w) for w in self.tx_witnesses)
+        return (self._bytes[:4]
+                + self._bytes[6:len(self) - 4 - witnesses_len]
+                + self._bytes[-4:])
 
     def is_witness(self):
         return self.flag is not None or self.tx_witnesses is not None
@@ -426,35 +887,196 @@ class Tx(ByteData):
         list(TxOut), list(InputWitness), byte-like -> Tx
 
         Makes a copy. Allows over-writing specific pieces.
+        A copy with nothing over-written skips re-validation.
+        Otherwise only the new pieces are validated, and sections of our
+        serialization that did not change are reused.
         '''
-        return Tx(version=version if version is not None else self.version,
-                  flag=flag if flag is not None else self.flag,
-                  tx_ins=tx_ins if tx_ins is not None else self.tx_ins,
-                  tx_outs=tx_outs if tx_outs is not None else self.tx_outs,
-                  tx_witnesses=(tx_witnesses if tx_witnesses is not None
-                                else self.tx_witnesses),
-                  lock_time=(lock_time if lock_time is not None
-                             else self.lock_time))
-
-    def _sighash_prep(self, index, script):
+        if all(arg is None for arg in (version, flag, tx_ins, tx_outs,
+                                       tx_witnesses, lock_time)):
+            return Tx._from_trusted_parts(
+                self.version, self.flag, self.tx_ins, self.tx_outs,
+                self.tx_witnesses, self.lock_time)
+        if ((flag is not None and flag != self.flag)
+                or (tx_witnesses is not None and self.tx_witnesses is None)):
+            return Tx(
+                version=version if version is not None else self.version,
+                flag=flag if flag is not None else self.flag,
+                tx_ins=tx_ins if tx_ins is not None else self.tx_ins,
+                tx_outs=tx_outs if tx_outs is not None else self.tx_outs,
+                tx_witnesses=(tx_witnesses if tx_witnesses is not None
+                              else self.tx_witnesses),
+                lock_time=(lock_time if lock_time is not None
+                           else self.lock_time))
+        return self._splice(version, tx_ins, tx_outs, tx_witnesses,
+                            lock_time)
+
+    @cached_property
+    def _sections(self):
         '''
-        Tx, int, byte-like -> Tx
-        Sighashes suck
-        Performs the sighash setup described here:
-        https://en.bitcoin.it/wiki/OP_CHECKSIG#How_it_works
-        https://bitcoin.stackexchange.com/questions/3374/how-to-redeem-a-basic-tx
-        We save on complexity by refusing to support OP_CODESEPARATOR
+        Where the outputs and the witnesses start in our serialization
+        '''
+        outs_start = (4 if self.flag is None else 6) \
+            + len(VarInt._encode(len(self.tx_ins))) \
+            + shared._items_len(self.tx_ins)
+        witnesses_start = outs_start \
+            + len(VarInt._encode(len(self.tx_outs))) \
+            + shared._items_len(self.tx_outs)
+        return outs_start, witnesses_start
+
+    def with_signatures(self, signatures):
+        '''
+        Tx, dict(int: tuple(byte-like, byte-like)
+                 or InputWitness or list(byte-like)) -> Tx
+        Fills in many scriptSigs and witnesses at once. Keys are input
+        indices. A tuple (stack_script, redeem_script) sets the scriptSig.
+        An InputWitness or a list of stack items sets the witness.
+        Inputs without a witness get an empty one. A tuple for an input
+        that already has a witness is rejected, as the old witness would
+        be kept.
+        Makes one copy, so the tx is serialized once. Hashes are computed
+        lazily on the result, not per signature.
         '''
-        # 0 out scripts in tx_ins
-        copy_tx_ins = [tx_in.copy(stack_script=b'', redeem_script=b'')
-                       for tx_in in self.tx_ins]
+        script_sigs = {}
+        witnesses = {}
+        for index, signature in signatures.items():
+            if isinstance(signature, tuple):
+                if (self.tx_witnesses is not None
+                        and len(self.tx_witnesses[index].stack) != 0):
+                    raise ValueError(
+                        'Input {} has a witness. Expected InputWitness or '
+                        'list of stack items. Got: tuple'.format(index))
+                script_sigs[index] = signature
+            elif isinstance(signature, InputWitness):
+                witnesses[index] = signature
+            else:
+                witnesses[index] = InputWitness(
+                    [WitnessStackItem(item) for item in signature])
+
+        tx_ins = _with_script_sigs(self.tx_ins, script_sigs)
+        if len(witnesses) == 0:
+            return self.copy(tx_ins=tx_ins)
+
+        if self.tx_witnesses is not None:
+            tx_witnesses = list(self.tx_witnesses)
+        else:
+            tx_witnesses = [InputWitness([])] * len(tx_ins)
+        for index, witness in witnesses.items():
+            tx_witnesses[index] = witness
+        return self.copy(flag=riemann.network.SEGWIT_TX_FLAG,
+                         tx_ins=tx_ins,
+                         tx_witnesses=tx_witnesses)
+
+    # Cached properties, by what they are computed from. _splice carries
+    # them over to copies in which those fields are unchanged.
+    _PREVOUT_CACHES = ('_hash_prevouts_all', '_hash_sequence_all',
+                       '_legacy_blank_ins', '_sha_prevouts',
+                       '_sha_sequences', '_taproot_spent')
+    _OUTPUT_CACHES = ('_hash_outputs_all', '_legacy_outputs', '_sha_outputs')
+    _NO_WITNESS_CACHES = ('tx_id_le', 'tx_id', '_no_witness')
+
+    def _splice(self, version, tx_ins, tx_outs, tx_witnesses, lock_time):
+        '''
+        Tx, byte-like, list(TxIn), list(TxOut),
+            list(InputWitness), byte-like -> Tx
+        Builds a copy with the same flag. Validates the pieces that are not
+        already ours, joins only the sections that changed, and carries
+        over cached hashes of the unchanged ones. Replacing only witnesses
+        keeps the tx_id.
+        '''
+        if version is None:
+            version = self.version
+        self.validate_bytes(version, 4)
+        if lock_time is None:
+            lock_time = self.lock_time
+        self.validate_bytes(lock_time, 4)
+
+        ins_start = 4 if self.flag is None else 6
+        outs_start, witnesses_start = self._sections
+        ins_bytes = self._bytes[ins_start:outs_start]
+        outs_bytes = self._bytes[outs_start:witnesses_start]
+        witnesses_bytes = self._bytes[witnesses_start:-4]
+
+        same_prevouts = same_ins = True
+        if tx_ins is not None:
+            changed = shared._changed_indices(tx_ins, self.tx_ins)
+            for tx_in in (tx_ins if changed is None
+                          else [tx_ins[i] for i in changed]):
+                if not isinstance(tx_in, TxIn):
+                    raise ValueError(
+                        'Invalid TxIn. '
+                        'Expected instance of TxIn. Got {}'
+                        .format(type(tx_in).__name__))
+            if changed != []:
+                same_ins = False
+                same_prevouts = _same_prevouts(tx_ins, self.tx_ins, changed)
+                ins_bytes = VarInt._encode(len(tx_ins)) \
+                    + shared._join_bytes(tx_ins)
+        else:
+            tx_ins = self.tx_ins
+
+        same_outs = True
+        if tx_outs is not None:
+            changed = shared._changed_indices(tx_outs, self.tx_outs)
+            for tx_out in (tx_outs if changed is None
+                           else [tx_outs[i] for i in changed]):
+                if not isinstance(tx_out, TxOut):
+                    raise ValueError(
+                        'Invalid TxOut. '
+                        'Expected instance of TxOut. Got {}'
+                        .format(type(tx_out).__name__))
+            if changed != []:
+                same_outs = False
+                outs_bytes = VarInt._encode(len(tx_outs)) \
+                    + shared._join_bytes(tx_outs)
+        else:
+            tx_outs = self.tx_outs
 
-        # NB: The script for the current transaction input in txCopy is set to
-        #     subScript (lead in by its length as a var-integer encoded!)
-        copy_tx_ins[index] = \
-            copy_tx_ins[index].copy(stack_script=b'', redeem_script=script)
+        if min(len(tx_ins), len(tx_outs)) == 0:
+            raise ValueError('Too few inputs or outputs. Stop that.')
 
-        return self.copy(tx_ins=copy_tx_ins)
+        if tx_witnesses is not None:
+            changed = shared._changed_indices(
+                tx_witnesses, self.tx_witnesses)
+            for witness in (tx_witnesses if changed is None
+                            else [tx_witnesses[i] for i in changed]):
+                if not isinstance(witness, InputWitness):
+                    raise ValueError(
+                        'Invalid InputWitness. '
+                        'Expected instance of InputWitness. Got {}'
+                        .format(type(witness)))
+            if changed != []:
+                witnesses_bytes = shared._join_bytes(tx_witnesses)
+        else:
+            tx_witnesses = self.tx_witnesses
+        if tx_witnesses is not None and len(tx_witnesses) != len(tx_ins):
+            raise ValueError(
+                'Witness and TxIn lists must be same length. '
+                'Got {} inputs and {} witnesses.'
+                .format(len(tx_ins), len(tx_witnesses)))
+
+        tx = Tx.__new__(Tx)
+        ByteData.__init__(tx)
+        tx._write([version, self._bytes[4:ins_start],
+                   ins_bytes, outs_bytes, witnesses_bytes, lock_time])
+        tx._set_fields(
+            version, self.flag, tx_ins, tx_outs, tx_witnesses, lock_time)
+
+        outs_start = ins_start + len(ins_bytes)
+        tx.__dict__['_sections'] = (outs_start, outs_start + len(outs_bytes))
+        if same_prevouts:
+            tx._carry_cached(self, self._PREVOUT_CACHES)
+            if version == self.version:
+                tx._carry_cached(self, ('_legacy_prefix',))
+        if same_outs:
+            tx._carry_cached(self, self._OUTPUT_CACHES)
+        if (same_ins and same_outs and version == self.version
+                and lock_time == self.lock_time):
+            tx._carry_cached(self, self._NO_WITNESS_CACHES)
+        return tx
+
+    @property
+    def _legacy_tail(self):
+        return self.lock_time
 
     def sighash_all(self, index, script=None,
                     prevout_value=None, anyone_can_pay=False):
@@ -480,12 +1102,9 @@ class Tx(ByteData):
                 sighash_type=shared.SIGHASH_ALL,
                 anyone_can_pay=anyone_can_pay)
 
-        copy_tx = self._sighash_prep(index=index, script=script)
-        if anyone_can_pay:
-            return self._sighash_anyone_can_pay(
-                index=index, copy_tx=copy_tx, sighash_type=shared.SIGHASH_ALL)
-
-        return self._sighash_final_hashing(copy_tx, shared.SIGHASH_ALL)
+        self.validate_bytes(script, None)
+        return _legacy_sighash(self, index, script,
+                               shared.SIGHASH_ALL, anyone_can_pay)
 
     def sighash_single(self, index, script=None,
                        prevout_value=None, anyone_can_pay=False):
@@ -517,29 +1136,52 @@ class Tx(ByteData):
                 sighash_type=shared.SIGHASH_SINGLE,
                 anyone_can_pay=anyone_can_pay)
 
-        copy_tx = self._sighash_prep(index=index, script=script)
-
-        # Remove outputs after the one we're signing
-        # Other tx_outs are set to -1 value and null scripts
-        copy_tx_outs = copy_tx.tx_outs[:index + 1]
-        copy_tx_outs = [TxOut(value=b'\xff' * 8, output_script=b'')
-                        for _ in copy_tx.tx_ins]  # Null them all
-        copy_tx_outs[index] = copy_tx.tx_outs[index]  # Fix the current one
-
-        # Other tx_ins sequence numbers are set to 0
-        copy_tx_ins = [tx_in.copy(sequence=b'\x00\x00\x00\x00')
-                       for tx_in in copy_tx.tx_ins]  # Set all to 0
-        copy_tx_ins[index] = copy_tx.tx_ins[index]  # Fix the current one
-
-        copy_tx = copy_tx.copy(
-            tx_ins=copy_tx_ins,
-            tx_outs=copy_tx_outs)
+        self.validate_bytes(script, None)
+        return _legacy_sighash(self, index, script,
+                               shared.SIGHASH_SINGLE, anyone_can_pay)
 
-        if anyone_can_pay:  # Forward onwards
-            return self._sighash_anyone_can_pay(
-                index, copy_tx, shared.SIGHASH_SINGLE)
-
-        return self._sighash_final_hashing(copy_tx, shared.SIGHASH_SINGLE)
+    def sighashes(self, specs):
+        '''
+        Tx, iterable(tuple) -> list(bytes)
+        Computes many sighashes in one call. Each spec is a tuple of
+        (index, script, prevout_value, sighash_type). sighash_type is
+        SIGHASH_ALL or SIGHASH_SINGLE, optionally | SIGHASH_ANYONECANPAY.
+        Network and witness dispatch happens once. Digests shared by all
+        inputs are computed once, on first use.
+        '''
+        if riemann.network.FORKID is not None:
+            sighash = self._sighash_forkid
+        elif self.is_witness():
+            sighash = self.segwit_sighash
+        else:
+            def sighash(index, script, prevout_value,
+                        sighash_type, anyone_can_pay):
+                self.validate_bytes(script, None)
+                return _legacy_sighash(
+                    self, index, script, sighash_type, anyone_can_pay)
+
+        digests = []
+        for index, script, prevout_value, sighash_type in specs:
+            anyone_can_pay = bool(sighash_type & shared.SIGHASH_ANYONECANPAY)
+            sighash_type &= ~(shared.SIGHASH_ANYONECANPAY
+                              | shared.SIGHASH_FORKID)
+            if sighash_type == shared.SIGHASH_NONE:
+                self.sighash_none()
+            if sighash_type not in (shared.SIGHASH_ALL,
+                                    shared.SIGHASH_SINGLE):
+                raise ValueError(
+                    'Unknown sighash type. Expected SIGHASH_ALL or '
+                    'SIGHASH_SINGLE. Got {}.'.format(sighash_type))
+            if (sighash_type == shared.SIGHASH_SINGLE
+                    and index >= len(self.tx_outs)):
+                raise NotImplementedError(
+                    'I refuse to implement the SIGHASH_SINGLE bug.')
+            digests.append(sighash(index=index,
+                                   script=script,
+                                   prevout_value=prevout_value,
+                                   sighash_type=sighash_type,
+                                   anyone_can_pay=anyone_can_pay))
+        return digests
 
     def segwit_sighash(self, index, script, prevout_value=None,
                        sighash_type=None, anyone_can_pay=False):
@@ -548,82 +1190,70 @@ class Tx(ByteData):
         https://github.com/bitcoin/bips/blob/master/bip-0143.mediawiki
         https://ricette.giallozafferano.it/Spaghetti-alla-Norma.html
         '''
-        data = ByteData()
-
-        # 1. nVersion of the transaction (4-byte little endian)
-        data += self.version
-
-        # 2. hashPrevouts (32-byte hash)
-        data += self._hash_prevouts(anyone_can_pay=anyone_can_pay)
-
-        # 3. hashSequence (32-byte hash)
-        data += self._hash_sequence(sighash_type=sighash_type,
-                                    anyone_can_pay=anyone_can_pay)
-
-        # 4. outpoint (32-byte hash + 4-byte little endian)
-        data += self.tx_ins[index].outpoint
+        return utils.hash256(self._bip143_preimage(
+            index=index,
+            script=script,
+            prevout_value=prevout_value,
+            sighash_type=sighash_type,
+            anyone_can_pay=anyone_can_pay,
+            sighash_bytes=self._segwit_sighash_adjustment(
+                sighash_type=sighash_type, anyone_can_pay=anyone_can_pay)))
+
+    def _bip143_preimage(self, index, script, prevout_value, sighash_type,
+                         anyone_can_pay, sighash_bytes):
+        '''
+        Tx, int, byte-like, byte-like, int, bool, bytes -> bytes
+        The BIP143 pre-image. Segwit and FORKID differ only in the
+        sighash type field, which the caller supplies.
+        '''
+        tx_in = self.tx_ins[index]
+        return b''.join((
+            # 1. nVersion of the transaction (4-byte little endian)
+            self.version,
 
-        # 5. scriptCode of the input (serialized as scripts inside CTxOuts)
-        data += self._adjusted_script_code(script=script)
+            # 2. hashPrevouts (32-byte hash)
+            self._hash_prevouts(anyone_can_pay=anyone_can_pay),
 
-        # 6. value of the output spent by this input (8-byte little endian)
-        data += prevout_value
+            # 3. hashSequence (32-byte hash)
+            self._hash_sequence(sighash_type=sighash_type,
+                                anyone_can_pay=anyone_can_pay),
 
-        # 7. nSequence of the input (4-byte little endian)
-        data += self.tx_ins[index].sequence
+            # 4. outpoint (32-byte hash + 4-byte little endian)
+            tx_in[:36],
 
-        # 8. hashOutputs (32-byte hash)
-        data += self._hash_outputs(index=index, sighash_type=sighash_type)
+            # 5. scriptCode of the input (serialized as scripts inside CTxOuts)
+            self._adjusted_script_code(script=script),
 
-        # 9. nLocktime of the transaction (4-byte little endian)
-        data += self.lock_time
+            # 6. value of the output spent by this input (8-byte little endian)
+            prevout_value,
 
-        # 10. sighash type of the signature (4-byte little endian)
-        data += self._segwit_sighash_adjustment(sighash_type=sighash_type,
-                                                anyone_can_pay=anyone_can_pay)
+            # 7. nSequence of the input (4-byte little endian)
+            tx_in.sequence,
 
-        return utils.hash256(data.to_bytes())
+            # 8. hashOutputs (32-byte hash)
+            self._hash_outputs(index=index, sighash_type=sighash_type),
 
-    def _sighash_anyone_can_pay(self, index, copy_tx, sighash_type):
-        '''
-        int, byte-like, Tx, int -> bytes
-        Applies SIGHASH_ANYONECANPAY procedure.
-        Should be called by another SIGHASH procedure.
-        Not on its own.
-        https://en.bitcoin.it/wiki/OP_CHECKSIG#Procedure_for_Hashtype_SIGHASH_ANYONECANPAY
-        '''
+            # 9. nLocktime of the transaction (4-byte little endian)
+            self.lock_time,
 
-        # The txCopy input vector is resized to a length of one.
-        copy_tx_ins = [copy_tx.tx_ins[index]]
-        copy_tx = copy_tx.copy(tx_ins=copy_tx_ins)
-
-        return self._sighash_final_hashing(
-            copy_tx, sighash_type | shared.SIGHASH_ANYONECANPAY)
-
-    def _sighash_final_hashing(self, copy_tx, sighash_type):
-        '''
-        Tx, int -> bytes
-        Returns the hash that should be signed
-        https://en.bitcoin.it/wiki/OP_CHECKSIG#Procedure_for_Hashtype_SIGHASH_ANYONECANPAY
-        '''
-        sighash = ByteData()
-        sighash += copy_tx.to_bytes()
-        sighash += utils.i2le_padded(sighash_type, 4)
-
-        return utils.hash256(sighash.to_bytes())
+            # 10. sighash type of the signature (4-byte little endian)
+            sighash_bytes))
 
     def _hash_prevouts(self, anyone_can_pay):
         if anyone_can_pay:
             # If the ANYONECANPAY flag is set,
             # hashPrevouts is a uint256 of 0x0000......0000.
-            hash_prevouts = b'\x00' * 32
-        else:
-            # hashPrevouts is the double SHA256 of all outpoints;
-            outpoints = ByteData()
-            for tx_in in self.tx_ins:
-                outpoints += tx_in.outpoint
-            hash_prevouts = utils.hash256(outpoints.to_bytes())
-        return hash_prevouts
+            return b'\x00' * 32
+        return self._hash_prevouts_all
+
+    @cached_property
+    def _hash_prevouts_all(self):
+        '''
+        hashPrevouts is the double SHA256 of all outpoints.
+        Shared by every input, so we compute it once per Tx
+        '''
+        return utils.hash256(
+            b''.join(tx_in.outpoint.to_bytes() for tx_in in self.tx_ins))
 
     def _hash_sequence(self, sighash_type, anyone_can_pay):
         '''BIP143 hashSequence implementation
@@ -638,12 +1268,16 @@ class Tx(ByteData):
             # If any of ANYONECANPAY, SINGLE sighash type is set,
             # hashSequence is a uint256 of 0x0000......0000.
             return b'\x00' * 32
-        else:
-            # hashSequence is the double SHA256 of nSequence of all inputs;
-            sequences = ByteData()
-            for tx_in in self.tx_ins:
-                sequences += tx_in.sequence
-            return utils.hash256(sequences.to_bytes())
+        return self._hash_sequence_all
+
+    @cached_property
+    def _hash_sequence_all(self):
+        '''
+        hashSequence is the double SHA256 of nSequence of all inputs.
+        Shared by every input, so we compute it once per Tx
+        '''
+        return utils.hash256(
+            b''.join(tx_in.sequence for tx_in in self.tx_ins))
 
     def _adjusted_script_code(self, script):
         '''
@@ -657,12 +1291,11 @@ class Tx(ByteData):
         Returns:
             (bytes): the length-prepended script (if necessary)
         '''
-        script_code = ByteData()
+        if isinstance(script, ByteData):
+            script = script.to_bytes()
         if script[0] == len(script) - 1:
             return script
-        script_code += VarInt(len(script))
-        script_code += script
-        return script_code
+        return VarInt._encode(len(script)) + script
 
     def _hash_outputs(self, index, sighash_type):
         '''BIP143 hashOutputs implementation
@@ -677,10 +1310,7 @@ class Tx(ByteData):
             # If the sighash type is ALL,
             # hashOutputs is the double SHA256 of all output amounts
             # paired up with their scriptPubKey;
-            outputs = ByteData()
-            for tx_out in self.tx_outs:
-                outputs += tx_out.to_bytes()
-            return utils.hash256(outputs.to_bytes())
+            return self._hash_outputs_all
         elif (sighash_type == shared.SIGHASH_SINGLE
               and index < len(self.tx_outs)):
             # if sighash type is SINGLE
@@ -692,6 +1322,15 @@ class Tx(ByteData):
             raise NotImplementedError(
                 'I refuse to implement the SIGHASH_SINGLE bug.')
 
+    @cached_property
+    def _hash_outputs_all(self):
+        '''
+        The SIGHASH_ALL hashOutputs.
+        Shared by every input, so we compute it once per Tx
+        '''
+        return utils.hash256(
+            b''.join(tx_out.to_bytes() for tx_out in self.tx_outs))
+
     def _forkid_sighash_adjustment(self, sighash_type, anyone_can_pay):
         # The sighash type is altered to include a 24-bit fork id
         # ss << ((GetForkID() << 8) | nHashType)
@@ -715,38 +1354,313 @@ class Tx(ByteData):
         '''
         self.validate_bytes(prevout_value, 8)
 
-        data = ByteData()
+        return utils.hash256(self._bip143_preimage(
+            index=index,
+            script=script,
+            prevout_value=prevout_value,
+            sighash_type=sighash_type,
+            anyone_can_pay=anyone_can_pay,
+            sighash_bytes=self._forkid_sighash_adjustment(
+                sighash_type=sighash_type, anyone_can_pay=anyone_can_pay)))
+
+    def taproot_sighash(self, index, prevout_values, prevout_scripts,
+                        sighash_type=shared.SIGHASH_DEFAULT,
+                        anyone_can_pay=False, annex=None, leaf_hash=None,
+                        codesep_pos=0xffffffff):
+        '''
+        Tx, int, list(byte-like), list(byte-like), int, bool,
+            byte-like, byte-like, int -> bytes
+        BIP341 signature hash, for taproot key path and script path spends
+        prevout_values and prevout_scripts describe the outputs spent by
+        every input, in order. Values are 8-byte little-endian. Scripts have
+        no length prefix.
+        To sign a script path spend, pass the tapleaf hash as leaf_hash.
+        https://github.com/bitcoin/bips/blob/master/bip-0341.mediawiki
+        https://github.com/bitcoin/bips/blob/master/bip-0342.mediawiki
+        '''
+        msg = self._taproot_sig_msg(
+            index=index,
+            prevout_values=prevout_values,
+            prevout_scripts=prevout_scripts,
+            sighash_type=sighash_type,
+            anyone_can_pay=anyone_can_pay,
+            annex=annex,
+            leaf_hash=leaf_hash,
+            codesep_pos=codesep_pos)
+        return utils.tagged_hash(b'TapSighash', b'\x00' + msg)  # Epoch 0
+
+    def taproot_sighashes(self, specs, prevout_values, prevout_scripts):
+        '''
+        Tx, iterable(tuple), list(byte-like), list(byte-like) -> list(bytes)
+        Computes many BIP341 sighashes in one call. Each spec is a tuple of
+        (index, sighash_type), optionally followed by annex, leaf_hash and
+        codesep_pos as in taproot_sighash. sighash_type is SIGHASH_DEFAULT,
+        SIGHASH_ALL or SIGHASH_SINGLE, optionally | SIGHASH_ANYONECANPAY.
+        The spent outputs are hashed once for the whole batch.
+        '''
+        spent_digests = self._sha_spent_outputs(
+            prevout_values, prevout_scripts)
+
+        digests = []
+        for index, sighash_type, *extra in specs:
+            annex, leaf_hash, codesep_pos = (
+                extra + [None, None, 0xffffffff][len(extra):])
+            anyone_can_pay = bool(sighash_type & shared.SIGHASH_ANYONECANPAY)
+            msg = self._taproot_sig_msg(
+                index=index,
+                prevout_values=prevout_values,
+                prevout_scripts=prevout_scripts,
+                sighash_type=sighash_type & ~shared.SIGHASH_ANYONECANPAY,
+                anyone_can_pay=anyone_can_pay,
+                annex=annex,
+                leaf_hash=leaf_hash,
+                codesep_pos=codesep_pos,
+                spent_digests=spent_digests)
+            digests.append(
+                utils.tagged_hash(b'TapSighash', b'\x00' + msg))  # Epoch 0
+        return digests
+
+    def _taproot_sig_msg(self, index, prevout_values, prevout_scripts,
+                         sighash_type, anyone_can_pay, annex, leaf_hash,
+                         codesep_pos, spent_digests=None):
+        '''
+        Tx, ... -> bytes
+        The BIP341 SigMsg, with the BIP342 extension for script paths
+        spent_digests are sha_amounts and sha_scriptpubkeys, if the caller
+        already has them.
+        '''
+        if (len(prevout_values) != len(self.tx_ins)
+                or len(prevout_scripts) != len(self.tx_ins)):
+            raise ValueError(
+                'Expected a prevout value and script for each of {} inputs. '
+                'Got {} values and {} scripts.'
+                .format(len(self.tx_ins),
+                        len(prevout_values),
+                        len(prevout_scripts)))
+        if sighash_type == shared.SIGHASH_NONE:
+            self.sighash_none()
+        if sighash_type not in (shared.SIGHASH_DEFAULT,
+                                shared.SIGHASH_ALL,
+                                shared.SIGHASH_SINGLE):
+            raise ValueError(
+                'Unknown sighash type. Expected SIGHASH_DEFAULT, '
+                'SIGHASH_ALL or SIGHASH_SINGLE. Got {}.'.format(sighash_type))
+        if sighash_type == shared.SIGHASH_DEFAULT and anyone_can_pay:
+            raise ValueError(
+                'SIGHASH_DEFAULT can\'t be used with ANYONECANPAY.')
+        if (sighash_type == shared.SIGHASH_SINGLE
+                and index >= len(self.tx_outs)):
+            raise NotImplementedError(
+                'I refuse to implement the SIGHASH_SINGLE bug.')
 
-        # 1. nVersion of the transaction (4-byte little endian)
-        data += self.version
+        hash_type = sighash_type
+        if anyone_can_pay:
+            hash_type |= shared.SIGHASH_ANYONECANPAY
+
+        # Control, and transaction data
+        parts = [bytes([hash_type]), self.version, self.lock_time]
+        if not anyone_can_pay:
+            if spent_digests is None:
+                spent_digests = self._sha_spent_outputs(
+                    prevout_values, prevout_scripts)
+            sha_amounts, sha_scriptpubkeys = spent_digests
+            parts.extend((self._sha_prevouts,
+                          sha_amounts,
+                          sha_scriptpubkeys,
+                          self._sha_sequences))
+        if sighash_type != shared.SIGHASH_SINGLE:
+            parts.append(self._sha_outputs)
+
+        # Data about this input
+        spend_type = 0
+        if leaf_hash is not None:
+            spend_type += 2
+        if annex is not None:
+            spend_type += 1
+        parts.append(bytes([spend_type]))
 
-        # 2. hashPrevouts (32-byte hash)
-        data += self._hash_prevouts(anyone_can_pay=anyone_can_pay)
+        if anyone_can_pay:
+            tx_in = self.tx_ins[index]
+            script = bytes(prevout_scripts[index])
+            parts.extend((tx_in[:36],
+                          bytes(prevout_values[index]),
+                          VarInt._encode(len(script)),
+                          script,
+                          tx_in.sequence))
+        else:
+            parts.append(utils.i2le_padded(index, 4))
+
+        if annex is not None:
+            self.validate_bytes(annex, None)
+            if len(annex) == 0 or annex[0] != 0x50:
+                raise ValueError('Expected annex to start with 0x50.')
+            annex = bytes(annex)
+            parts.append(utils.sha256(VarInt._encode(len(annex)) + annex))
+
+        # Data about this output
+        if sighash_type == shared.SIGHASH_SINGLE:
+            parts.append(utils.sha256(self.tx_outs[index].to_bytes()))
+
+        # BIP342 extension
+        if leaf_hash is not None:
+            self.validate_bytes(leaf_hash, 32)
+            parts.extend((bytes(leaf_hash),
+                          b'\x00',  # key_version
+                          utils.i2le_padded(codesep_pos, 4)))
+
+        return b''.join(parts)
+
+    @cached_property
+    def _sha_prevouts(self):
+        return utils.sha256(b''.join(tx_in[:36] for tx_in in self.tx_ins))
+
+    @cached_property
+    def _sha_sequences(self):
+        return utils.sha256(b''.join(tx_in.sequence for tx_in in self.tx_ins))
+
+    @cached_property
+    def _sha_outputs(self):
+        return utils.sha256(
+            b''.join(tx_out.to_bytes() for tx_out in self.tx_outs))
+
+    def _sha_spent_outputs(self, prevout_values, prevout_scripts):
+        '''
+        Tx, list(byte-like), list(byte-like) -> (bytes, bytes)
+        sha_amounts and sha_scriptpubkeys. These depend on the arguments,
+        so we keep the latest pair along with the sequences it came from.
+        Signing input by input with the same sequences hashes them once.
+        Later calls check the sequences by identity and length, so don't
+        swap their items between calls. Items that can change in place,
+        like bytearrays, are also compared by content on every call.
+        '''
+        lengths = (len(prevout_values), len(prevout_scripts))
+        cached = self.__dict__.get('_taproot_spent')
+        if cached is not None:
+            (values, scripts, cached_lengths, snapshot), digests = cached
+            if (values is prevout_values and scripts is prevout_scripts
+                    and cached_lengths == lengths
+                    and (snapshot is None
+                         or snapshot == _spent_snapshot(
+                             prevout_values, prevout_scripts))):
+                return digests
+
+        for value in prevout_values:
+            self.validate_bytes(value, 8)
+        for script in prevout_scripts:
+            self.validate_bytes(script, None)
+        snapshot = None
+        if not all(type(item) is bytes
+                   for items in (prevout_values, prevout_scripts)
+                   for item in items):
+            snapshot = _spent_snapshot(prevout_values, prevout_scripts)
+
+        digests = _spent_output_digests(prevout_values, prevout_scripts)
+        self.__dict__['_taproot_spent'] = (
+            (prevout_values, prevout_scripts, lengths, snapshot), digests)
+        return digests
+
+
+class LazyTx(Tx):
+    '''
+    byte-like -> LazyTx
+    A Tx that keeps its serialization and a table of component offsets.
+    Inputs, outputs, and witnesses are parsed on first access. Everything
+    else behaves like a Tx.
+    '''
 
-        # 3. hashSequence (32-byte hash)
-        data += self._hash_sequence(sighash_type=sighash_type,
-                                    anyone_can_pay=anyone_can_pay)
+    def __init__(self, byte_string):
+        ByteData.__init__(self)
 
-        # 4. outpoint (32-byte hash + 4-byte little endian)
-        data += self.tx_ins[index].outpoint
+        segwit, tx_ins, tx_outs, tx_witnesses, end = \
+            _layout(memoryview(byte_string), 0)
+        if end != len(byte_string):
+            raise ValueError(
+                'Expected a single serialized Tx. '
+                'Got {} trailing bytes.'.format(len(byte_string) - end))
+        if min(len(tx_ins), len(tx_outs)) == 1:
+            raise ValueError('Too few inputs or outputs. Stop that.')
 
-        # 5. scriptCode of the input (serialized as scripts inside CTxOuts)
-        data += self._adjusted_script_code(script=script)
+        self += byte_string
 
-        # 6. value of the output spent by this input (8-byte little endian)
-        data += prevout_value
+        self.flag = riemann.network.SEGWIT_TX_FLAG if segwit else None
+        self.tx_ins_len = len(tx_ins) - 1
+        self.tx_outs_len = len(tx_outs) - 1
+        self.tx_witnesses_len = self.tx_ins_len
+        self._offsets = (tx_ins, tx_outs, tx_witnesses)
 
-        # 7. nSequence of the input (4-byte little endian)
-        data += self.tx_ins[index].sequence
+        self._make_immutable()
 
-        # 8. hashOutputs (32-byte hash)
-        data += self._hash_outputs(index=index, sighash_type=sighash_type)
+    @classmethod
+    def _parse(LazyTx, view, offset):
+        '''
+        memoryview, int -> (LazyTx, int)
+        Finds the end of the Tx at offset. Returns a LazyTx over it and the
+        offset after it.
+        '''
+        end = _layout(view, offset)[-1]
+        return LazyTx(bytes(view[offset:end])), end
+
+    @property
+    def version(self):
+        return self._bytes[:4]
+
+    @property
+    def lock_time(self):
+        return self._bytes[-4:]
+
+    @cached_property
+    def tx_ins(self):
+        view = memoryview(self._bytes)
+        return tuple(TxIn._parse(view, start)[0]
+                     for start in self._offsets[0][:-1])
+
+    @cached_property
+    def tx_outs(self):
+        view = memoryview(self._bytes)
+        return tuple(TxOut._parse(view, start)[0]
+                     for start in self._offsets[1][:-1])
+
+    @cached_property
+    def tx_witnesses(self):
+        if self._offsets[2] is None:
+            return None
+        view = memoryview(self._bytes)
+        return tuple(InputWitness._parse(view, start)[0]
+                     for start in self._offsets[2][:-1])
+
+    def tx_in(self, index):
+        '''
+        int -> TxIn
+        Parses a single input without parsing the others
+        '''
+        start = self._offsets[0][:-1][index]
+        return TxIn._parse(memoryview(self._bytes), start)[0]
 
-        # 9. nLocktime of the transaction (4-byte little endian)
-        data += self.lock_time
+    def tx_out(self, index):
+        '''
+        int -> TxOut
+        Parses a single output without parsing the others
+        '''
+        start = self._offsets[1][:-1][index]
+        return TxOut._parse(memoryview(self._bytes), start)[0]
 
-        # 10. sighash type of the signature (4-byte little endian)
-        data += self._forkid_sighash_adjustment(sighash_type=sighash_type,
-                                                anyone_can_pay=anyone_can_pay)
+    def output_script(self, index):
+        '''
+        int -> bytes
+        Reads a single output script without building a TxOut
+        '''
+        start = self._offsets[1][:-1][index]
+        script_len, script_start = \
+            VarInt._read_number(memoryview(self._bytes), start + 8)
+        return self._bytes[script_start:script_start + script_len]
+
+    @cached_property
+    def _no_witness(self):
+        if self.flag is None:
+            return self._bytes
+        return (self._bytes[:4]
+                + self._bytes[6:self._offsets[1][-1]]
+                + self._bytes[-4:])
 
-        return utils.hash256(data.to_bytes())
+    def is_witness(self):
+        return self.flag is not None
@@ -21,14 +21,19 @@ def make_sh_script_pubkey(script_bytes, witness=False):
 
 def make_sh_output_script(script_string, witness=False):
     '''
-    str -> bytearray
+    str or bytes -> bytearray
+    Accepts a human-readable script, or an already serialized one
+    (e.g. from ScriptTemplate.fill)
     '''
     if witness and not riemann.network.SEGWIT:
         raise ValueError(
             'Network {} does not support witness scripts.'
             .format(riemann.get_current_network_name()))
 
-    script_bytes = serialization.serialize(script_string)
+    if isinstance(script_string, (bytes, bytearray)):
+        script_bytes = script_string
+    else:
+        script_bytes = serialization.serialize(script_string)
     return make_sh_script_pubkey(script_bytes=script_bytes, witness=witness)
 
 
@@ -325,3 +330,263 @@ def length_prepend(byte_string):
     '''
     length = tx.VarInt(len(byte_string))
     return length.to_bytes() + byte_string
+
+
+class TxBuilder():
+    '''
+    int, int, int -> TxBuilder
+    Holds inputs, outputs and witnesses in mutable lists, for txs that are
+    put together a piece at a time. Adding or removing a piece updates
+    running totals, so size, weight and fee are O(1) to check. build()
+    makes the immutable tx for the current network once, at the end.
+    NB: version, lock_time and expiry are ints, as in make_tx
+    Zcash txs are transparent only. Witnesses are Decred witnesses on
+    Decred, and optional segwit witnesses elsewhere.
+    '''
+
+    def __init__(self, version=1, lock_time=0, expiry=0):
+        self.version = version
+        self.lock_time = lock_time
+        self.expiry = expiry
+        self.tx_ins = []
+        self.tx_outs = []
+        self.tx_witnesses = []  # One per input. None if it has none
+        self.input_values = []  # One per input. None if unknown
+
+        self._ins_len = 0
+        self._outs_len = 0
+        self._witnesses_len = 0
+        self._num_witnesses = 0
+        self._input_value = 0
+        self._num_unknown_values = 0
+        self._output_value = 0
+
+    def add_input(self, tx_in, witness=None, value=None):
+        '''
+        TxIn, InputWitness, int -> int
+        Appends an input, and returns its index.
+        value is the value of the prevout in satoshi, for the fee. On
+        Decred it defaults to the value in the witness.
+        '''
+        if (value is None and witness is not None
+                and isinstance(witness, tx.DecredInputWitness)):
+            value = utils.le2i(witness.value)
+        self.tx_ins.append(tx_in)
+        self.tx_witnesses.append(witness)
+        self.input_values.append(value)
+        self._ins_len += len(tx_in)
+        self._add_witness(witness)
+        self._add_value(value)
+        return len(self.tx_ins) - 1
+
+    def remove_input(self, index=-1):
+        '''
+        int -> (TxIn, InputWitness, int)
+        Removes the input at index. Returns it with its witness and value.
+        O(1) from the end, like list.pop.
+        '''
+        tx_in = self.tx_ins.pop(index)
+        witness = self.tx_witnesses.pop(index)
+        value = self.input_values.pop(index)
+        self._ins_len -= len(tx_in)
+        self._remove_witness(witness)
+        self._remove_value(value)
+        return tx_in, witness, value
+
+    def set_witness(self, index, witness):
+        '''
+        int, InputWitness -> None
+        Replaces the witness of the input at index, e.g. after signing
+        '''
+        self._remove_witness(self.tx_witnesses[index])
+        self.tx_witnesses[index] = witness
+        self._add_witness(witness)
+
+    def add_output(self, tx_out):
+        '''
+        TxOut -> int
+        Appends an output, and returns its index
+        '''
+        self.tx_outs.append(tx_out)
+        self._outs_len += len(tx_out)
+        self._output_value += utils.le2i(tx_out.value)
+        return len(self.tx_outs) - 1
+
+    def remove_output(self, index=-1):
+        '''
+        int -> TxOut
+        Removes and returns the output at index
+        '''
+        tx_out = self.tx_outs.pop(index)
+        self._outs_len -= len(tx_out)
+        self._output_value -= utils.le2i(tx_out.value)
+        return tx_out
+
+    def _add_witness(self, witness):
+        if witness is not None:
+            self._witnesses_len += len(witness)
+            self._num_witnesses += 1
+
+    def _remove_witness(self, witness):
+        if witness is not None:
+            self._witnesses_len -= len(witness)
+            self._num_witnesses -= 1
+
+    def _add_value(self, value):
+        if value is None:
+            self._num_unknown_values += 1
+        else:
+            self._input_value += value
+
+    def _remove_value(self, value):
+        if value is None:
+            self._num_unknown_values -= 1
+        else:
+            self._input_value -= value
+
+    @property
+    def output_value(self):
+        return self._output_value
+
+    @property
+    def input_value(self):
+        '''
+        TxBuilder -> int
+        None if the value of any input is unknown
+        '''
+        if self._num_unknown_values != 0:
+            return None
+        return self._input_value
+
+    @property
+    def fee(self):
+        '''
+        TxBuilder -> int
+        None if the value of any input is unknown
+        '''
+        if self._num_unknown_values != 0:
+            return None
+        return self._input_value - self._output_value
+
+    def _base_size(self):
+        '''
+        TxBuilder -> int
+        Serialized size without segwit flag and witnesses
+        '''
+        n = riemann.get_current_network_name()
+        size = (len(tx.VarInt._encode(len(self.tx_ins))) + self._ins_len
+                + len(tx.VarInt._encode(len(self.tx_outs))) + self._outs_len)
+        if 'decred' in n:
+            # version, lock_time, expiry, and every witness
+            return (size + 12 + self._witnesses_len
+                    + len(tx.VarInt._encode(len(self.tx_witnesses))))
+        if 'overwinter' in n:
+            # header, group id, lock_time, expiry, no joinsplits
+            return size + 17
+        if 'sapling' in n:
+            # header, group id, lock_time, expiry, value_balance,
+            # no shielded spends, shielded outputs or joinsplits
+            return size + 27
+        return size + 8  # version, lock_time
+
+    def _is_witness(self):
+        '''
+        TxBuilder -> bool
+        Whether build() would make a segwit Tx
+        '''
+        return (self._num_witnesses != 0
+                and 'decred' not in riemann.get_current_network_name())
+
+    @property
+    def size(self):
+        '''
+        TxBuilder -> int
+        Serialized size of the tx build() would make, in bytes
+        '''
+        size = self._base_size()
+        if self._is_witness():
+            # Flag, witnesses, and a 1-byte empty witness for the rest
+            size += (2 + self._witnesses_len
+                     + len(self.tx_ins) - self._num_witnesses)
+        return size
+
+    @property
+    def weight(self):
+        '''
+        TxBuilder -> int
+        BIP141 weight. Witness bytes count once, everything else 4 times
+        '''
+        return self._base_size() * 3 + self.size
+
+    @property
+    def vsize(self):
+        '''
+        TxBuilder -> int
+        Weight / 4, rounded up
+        '''
+        return (self.weight + 3) // 4
+
+    def build(self):
+        '''
+        TxBuilder -> Tx
+        Makes the tx for the current network: a DecredTx, OverwinterTx,
+        SaplingTx, or Tx. Inputs without witnesses get empty witnesses if
+        any input has one.
+        '''
+        n = riemann.get_current_network_name()
+        version = utils.i2le_padded(self.version, 4)
+        lock_time = utils.i2le_padded(self.lock_time, 4)
+        if 'decred' in n:
+            if self._num_witnesses != len(self.tx_ins):
+                raise ValueError(
+                    'Expected a witness for each of {} Decred inputs. '
+                    'Got {}.'.format(len(self.tx_ins), self._num_witnesses))
+            return tx.DecredTx(
+                version=version,
+                tx_ins=self.tx_ins,
+                tx_outs=self.tx_outs,
+                lock_time=lock_time,
+                expiry=utils.i2le_padded(self.expiry, 4),
+                tx_witnesses=self.tx_witnesses)
+        if ('overwinter' in n or 'sapling' in n) and self._num_witnesses:
+            raise ValueError(
+                'Network {} does not support witnesses.'.format(n))
+        if 'overwinter' in n:
+            return tx.OverwinterTx(
+                tx_ins=self.tx_ins,
+                tx_outs=self.tx_outs,
+                lock_time=lock_time,
+                expiry_height=utils.i2le_padded(self.expiry, 4),
+                tx_joinsplits=[],
+                joinsplit_pubkey=None,
+                joinsplit_sig=None)
+        if 'sapling' in n:
+            return tx.SaplingTx(
+                tx_ins=self.tx_ins,
+                tx_outs=self.tx_outs,
+                lock_time=lock_time,
+                expiry_height=utils.i2le_padded(self.expiry, 4),
+                value_balance=b'\x00' * 8,
+                tx_shielded_spends=[],
+                tx_shielded_outputs=[],
+                tx_joinsplits=[],
+                joinsplit_pubkey=None,
+                joinsplit_sig=None,
+                binding_sig=None)
+        if self._is_witness():
+            return tx.Tx(
+                version=version,
+                flag=riemann.network.SEGWIT_TX_FLAG,
+                tx_ins=self.tx_ins,
+                tx_outs=self.tx_outs,
+                tx_witnesses=[witness if witness is not None
+                              else make_empty_witness()
+                              for witness in self.tx_witnesses],
+                lock_time=lock_time)
+        return tx.Tx(
+            version=version,
+            flag=None,
+            tx_ins=self.tx_ins,
+            tx_outs=self.tx_outs,
+            tx_witnesses=None,
+            lock_time=lock_time)
@@ -94,6 +94,25 @@ def sha256(msg_bytes):
     return hashlib.sha256(msg_bytes).digest()
 
 
+# sha256 midstates after each tag prefix, one full block
+_TAG_MIDSTATES = {}
+
+
+def tagged_hash(tag, msg_bytes):
+    '''
+    bytes, byte-like -> bytes
+    BIP340 tagged hash: sha256(sha256(tag) + sha256(tag) + msg)
+    '''
+    try:
+        midstate = _TAG_MIDSTATES[tag]
+    except KeyError:
+        midstate = hashlib.sha256(sha256(tag) * 2)
+        _TAG_MIDSTATES[tag] = midstate
+    h = midstate.copy()
+    h.update(msg_bytes)
+    return h.digest()
+
+
 def hash160(msg_bytes):
     '''
     byte-like -> bytes
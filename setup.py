@@ -11,6 +11,7 @@ setup(
     author_email='james@summa.one',
     license='LGPLv3.0',
     install_requires=[],
+    extras_require={'numpy': ['numpy']},
     packages=find_packages(),
     package_dir={'riemann': 'riemann'},
     keywords = 'bitcoin litecoin cryptocurrency decred blockchain development',